@@ -163,4 +163,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # 변환 워커 프로세스(spawn)가 EXE에서 다시 진입점을 실행하지 않도록
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -3,33 +3,67 @@ CLI 공통 기능을 제공하는 베이스 클래스
 """
 
 from __future__ import annotations
+import io
+import os
+import sys
+from collections import Counter
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import typer
 
-from ..core import (
-    split_image,
-    build_pdf_two_columns,
-    build_pdf_one_per_page,
-    compute_two_column_layout,
-)
+# 무거운 모듈(numpy/PIL/빌더)은 명령이 실제로 실행될 때 import한다.
+# `capfit --help` 같은 짧은 호출이 시작 비용을 치르지 않도록.
+from ..core.utils import IMAGE_EXTENSIONS
+
+
+def _output_bases(inputs: List[Path]) -> Dict[Path, str]:
+    """입력별 결과 파일 이름 접두사. 보통은 확장자를 뺀 이름이고, 확장자만 다른 입력끼리(a.png, a.jpg)는
+    서로의 조각/PDF를 덮어쓰지 않게 확장자까지 붙인 이름(a.png_part01.png, a.png.pdf)을 쓴다."""
+    stems = Counter(p.stem.lower() for p in inputs)
+    bases = {p: p.stem if stems[p.stem.lower()] == 1 else p.name for p in inputs}
+    seen: Dict[str, Path] = {}
+    for p, base in bases.items():
+        other = seen.setdefault(base.lower(), p)
+        if other != p:
+            raise typer.BadParameter(f"결과 파일 이름이 겹칩니다: {other.name}, {p.name}")
+    return bases
+
+
+def _log_autotune_to_stderr() -> None:
+    """auto 모드가 고른 파라미터 로그를 stderr로 보이게."""
+    import logging
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("[autotune] %(message)s"))
+    log = logging.getLogger("shared.core.autotune")
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
 
 
 class CapfitCLI:
     """Capfit CLI 공통 기능을 제공하는 베이스 클래스"""
     
     def __init__(self):
-        self.app = typer.Typer(help="capfit: 긴 캡처를 두 칼럼/페이지에 맞춰 자동 분할하고 PDF까지 생성합니다.")
+        # rich 도움말 렌더링은 `--help` 한 번에 rich 전체를 import하므로 기본 포맷 사용
+        self.app = typer.Typer(
+            help="capfit: 긴 캡처를 두 칼럼/페이지에 맞춰 자동 분할하고 PDF까지 생성합니다.",
+            rich_markup_mode=None,
+        )
         self._setup_commands()
     
     def _setup_commands(self):
         """CLI 명령어 설정"""
         self.app.command()(self.run)
+        self.app.command()(self.batch)
+        self.app.command()(self.watch)
+        self.app.command("pdf")(self.pdf)
+        self.app.command()(self.bench)
+        self.app.command()(self.startup)
     
     def run(
         self,
-        input: str = typer.Option(..., "--input", "-i", help="세로로 긴 캡처 이미지 경로 (PNG/JPG 등)"),
-        outdir: str = typer.Option("out", "--outdir", "-o", help="조각 PNG 저장 폴더"),
+        input: str = typer.Option(..., "--input", "-i", help="세로로 긴 캡처 이미지 경로 (PNG/JPG 등). '-'이면 stdin"),
+        outdir: Optional[str] = typer.Option(None, "--outdir", "-o", help="조각 PNG 저장 폴더 (기본 out). PDF를 stdout으로 보낼 때는 지정한 경우에만 저장"),
         column_width: int = typer.Option(1000, help="한 칼럼 폭(px)"),
         column_height: int = typer.Option(1400, help="한 칼럼 높이(px)"),
         overlap: int = typer.Option(40, help="조각 간 겹침(px)"),
@@ -37,7 +71,7 @@ class CapfitCLI:
         smart_band: int = typer.Option(60, help="스마트 컷 탐색 범위(px)"),
         make_pdf: bool = typer.Option(True, help="PDF도 함께 생성"),
         pdf_mode: str = typer.Option("two_columns", help="'two_columns' 또는 'one_per_page'"),
-        pdf_path: str = typer.Option("", help="PDF 저장 경로(미지정 시 out/<입력이름>.pdf)"),
+        pdf_path: str = typer.Option("", help="PDF 저장 경로(미지정 시 out/<입력이름>.pdf). '-'이면 stdout"),
         margin: int = typer.Option(60, help="PDF 페이지 여백(px)"),
         gutter: int = typer.Option(50, help="2단 사이 간격(px) - two_columns 모드에서만 사용"),
         dpi: int = typer.Option(220, help="PDF 메타 DPI 및 페이지 픽셀 계산 기준(최대 220)"),
@@ -46,6 +80,313 @@ class CapfitCLI:
         optimize_slices: bool = typer.Option(True, help="PDF 2단에 맞춰 분할 폭/높이 자동 최적화"),
     ):
         """긴 캡처 → PNG 조각 + (옵션) PDF 생성."""
+        params = self._effective_params(
+            column_width=column_width,
+            column_height=column_height,
+            overlap=overlap,
+            smart_cut=smart_cut,
+            smart_band=smart_band,
+            make_pdf=make_pdf,
+            pdf_mode=pdf_mode,
+            margin=margin,
+            gutter=gutter,
+            dpi=dpi,
+            page_width=page_width,
+            page_height=page_height,
+            optimize_slices=optimize_slices,
+        )
+        self._convert_one(input, outdir, params, pdf_path=pdf_path)
+        # PDF를 stdout으로 보내는 경우 로그는 stderr로
+        to_stderr = make_pdf and pdf_path == "-"
+        if make_pdf:
+            typer.echo("✅ Done!", err=to_stderr)
+        else:
+            typer.echo("✅ Done! (PDF skipped)")
+
+    def batch(
+        self,
+        input_dir: str = typer.Option(..., "--input-dir", "-d", help="캡처 이미지가 들어 있는 폴더"),
+        outdir: str = typer.Option("out", "--outdir", "-o", help="조각 PNG/PDF 및 매니페스트 저장 폴더"),
+        pattern: str = typer.Option("*", help="입력 파일 glob 패턴 (이미지 확장자만 처리)"),
+        force: bool = typer.Option(False, help="매니페스트를 무시하고 전부 다시 생성"),
+        column_width: int = typer.Option(1000, help="한 칼럼 폭(px)"),
+        column_height: int = typer.Option(1400, help="한 칼럼 높이(px)"),
+        overlap: int = typer.Option(40, help="조각 간 겹침(px)"),
+        smart_cut: bool = typer.Option(True, help="경계 근처에서 줄을 덜 자르는 스마트 컷"),
+        smart_band: int = typer.Option(60, help="스마트 컷 탐색 범위(px)"),
+        make_pdf: bool = typer.Option(True, help="PDF도 함께 생성"),
+        pdf_mode: str = typer.Option("two_columns", help="'two_columns' 또는 'one_per_page'"),
+        margin: int = typer.Option(60, help="PDF 페이지 여백(px)"),
+        gutter: int = typer.Option(50, help="2단 사이 간격(px) - two_columns 모드에서만 사용"),
+        dpi: int = typer.Option(220, help="PDF 메타 DPI 및 페이지 픽셀 계산 기준(최대 220)"),
+        page_width: int = typer.Option(0, help="PDF 페이지 가로(px). 0이면 A4 세로(DPI 기준)"),
+        page_height: int = typer.Option(0, help="PDF 페이지 세로(px). 0이면 A4 세로(DPI 기준)"),
+        optimize_slices: bool = typer.Option(True, help="PDF 2단에 맞춰 분할 폭/높이 자동 최적화"),
+    ):
+        """폴더 안의 캡처들을 일괄 변환. 매니페스트로 바뀐 입력만 다시 생성."""
+        from .manifest import BuildManifest
+
+        src_dir = Path(input_dir)
+        if not src_dir.is_dir():
+            raise typer.BadParameter(f"폴더가 아닙니다: {input_dir}")
+        inputs = sorted(
+            p for p in src_dir.glob(pattern)
+            if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        if not inputs:
+            typer.echo("처리할 이미지가 없습니다.")
+            return
+
+        params = self._effective_params(
+            column_width=column_width,
+            column_height=column_height,
+            overlap=overlap,
+            smart_cut=smart_cut,
+            smart_band=smart_band,
+            make_pdf=make_pdf,
+            pdf_mode=pdf_mode,
+            margin=margin,
+            gutter=gutter,
+            dpi=dpi,
+            page_width=page_width,
+            page_height=page_height,
+            optimize_slices=optimize_slices,
+        )
+        bases = _output_bases(inputs)
+        manifest = BuildManifest(outdir)
+        built = skipped = 0
+        for p in inputs:
+            digest = manifest.content_hash(str(p))
+            if not force and manifest.is_up_to_date(str(p), digest, params):
+                skipped += 1
+                typer.echo(f"[skip] {p.name}")
+                continue
+            outputs = self._convert_one(str(p), outdir, params, base=bases[p])
+            # 이전 실행에서만 만들어진 결과물(조각 수가 줄어든 경우 등) 정리
+            for old in manifest.stale_outputs(str(p), outputs):
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+            manifest.record(str(p), digest, params, outputs)
+            # 중단되어도 완료분은 다음 실행에서 건너뛰도록 입력마다 기록
+            manifest.save()
+            built += 1
+        typer.echo(f"✅ Done! built={built} skipped={skipped}")
+
+    def pdf(
+        self,
+        inputs: List[str] = typer.Argument(..., help="순서대로 이어 붙일 캡처 이미지 경로들 ('-'이면 stdin, 한 번만)"),
+        pdf_path: str = typer.Option("out/capfit.pdf", "--pdf-path", "-o", help="PDF 저장 경로. '-'이면 stdout"),
+        margin: int = typer.Option(60, help="PDF 페이지 여백(px)"),
+        gutter: int = typer.Option(50, help="2단 사이 간격(px)"),
+        dpi: int = typer.Option(220, help="PDF DPI(최대 220)"),
+        page_width: int = typer.Option(0, help="PDF 페이지 가로(px). 0이면 A4 세로(DPI 기준)"),
+        page_height: int = typer.Option(0, help="PDF 페이지 세로(px). 0이면 A4 세로(DPI 기준)"),
+        fast: bool = typer.Option(False, help="빠른 리샘플링(BILINEAR) 사용"),
+        workers: int = typer.Option(0, help="디코드/리사이즈 병렬 스레드 수. 0이면 CPU 수"),
+        search_band: int = typer.Option(60, help="스마트 컷: 버블 경계 탐색 폭(px)"),
+        bg_strip: int = typer.Option(12, help="스마트 컷: 배경 추정용 좌/우 스트립 폭(px)"),
+        bg_thresh: int = typer.Option(18, help="스마트 컷: 배경으로 볼 밝기 차 허용치"),
+        bg_ratio_hi: float = typer.Option(0.85, help="스마트 컷: 1순위 배경 비율 임계값"),
+        bg_ratio_mid: float = typer.Option(0.70, help="스마트 컷: 2순위 배경 비율 임계값"),
+        min_height_ratio: float = typer.Option(0.60, help="스마트 컷: 조각 최소 높이 비율"),
+        sample_stride: int = typer.Option(4, help="스마트 컷: 가로 샘플링 간격(px)"),
+        auto_tune: bool = typer.Option(False, help="search_band/bg_strip/sample_stride를 크기와 CPU 예산으로 자동 결정"),
+        cpu_budget_ms: float = typer.Option(0.0, help="auto 모드 스마트 컷 지표 계산 CPU 예산(ms). 0이면 기본값"),
+        dedupe_overlap: bool = typer.Option(True, help="이웃 캡처 사이 겹친 메시지 띠를 한 번만 남김"),
+        strip_chrome: bool = typer.Option(False, help="모든 캡처에 반복되는 상단바/입력창을 첫 장/마지막 장에만 남김"),
+    ):
+        """여러 캡처를 순서대로 이어 붙여 버블 인지 스마트 컷으로 2단 PDF 생성."""
+        from ..core import build_pdf_two_columns_from_source, build_pdf_two_columns_from_sources
+
+        if auto_tune:
+            _log_autotune_to_stderr()
+
+        if inputs.count("-") > 1:
+            raise typer.BadParameter("'-'(stdin)은 한 번만 사용할 수 있습니다.")
+        sources: List[Any] = [io.BytesIO(sys.stdin.buffer.read()) if p == "-" else p for p in inputs]
+        to_stdout = pdf_path == "-"
+        target: Any = sys.stdout.buffer if to_stdout else pdf_path
+        options: Dict[str, Any] = dict(
+            margin=margin,
+            gutter=gutter,
+            dpi=min(int(dpi), 220),
+            page_width=page_width or None,
+            page_height=page_height or None,
+            fast=fast,
+            search_band=search_band,
+            bg_strip=bg_strip,
+            bg_thresh=bg_thresh,
+            bg_ratio_hi=bg_ratio_hi,
+            bg_ratio_mid=bg_ratio_mid,
+            min_height_ratio=min_height_ratio,
+            sample_stride=sample_stride,
+            auto_tune=auto_tune,
+            cpu_budget_ms=cpu_budget_ms or None,
+        )
+        if len(sources) == 1:
+            build_pdf_two_columns_from_source(sources[0], target, **options)
+        else:
+            build_pdf_two_columns_from_sources(
+                sources, target, workers=(workers or os.cpu_count() or 1),
+                dedupe_overlap=dedupe_overlap, strip_chrome=strip_chrome, **options
+            )
+        typer.echo("[PDF streamed] <stdout>" if to_stdout else f"[PDF saved] {pdf_path}", err=to_stdout)
+        typer.echo("✅ Done!", err=to_stdout)
+
+    def bench(
+        self,
+        inputs: List[str] = typer.Argument(..., help="벤치마크할 캡처 이미지(여러 장이면 다중 소스 엔진)"),
+        repeat: int = typer.Option(5, "--repeat", "-n", help="측정 반복 횟수"),
+        warmup: int = typer.Option(1, help="측정 전 예열 실행 횟수"),
+        pdf_path: str = typer.Option("", help="PDF 저장 경로(미지정 시 임시 폴더)"),
+        margin: int = typer.Option(60, help="PDF 페이지 여백(px)"),
+        gutter: int = typer.Option(50, help="2단 사이 간격(px)"),
+        dpi: int = typer.Option(220, help="PDF DPI(최대 220)"),
+        fast: bool = typer.Option(False, help="빠른 리샘플링(BILINEAR) 사용"),
+        workers: int = typer.Option(1, help="디코드/리사이즈 병렬 스레드 수(1이면 단계 구분이 정확)"),
+        profile: str = typer.Option("", help="cProfile 결과(pstats) 저장 경로"),
+        collapsed: str = typer.Option("", help="flamegraph용 collapsed-stack 저장 경로"),
+        sample_ms: float = typer.Option(2.0, help="RSS/스택 샘플링 간격(ms)"),
+        auto_tune: bool = typer.Option(False, help="스마트 컷 auto 모드로 측정하고 기본값 대비 컷 품질 비교"),
+        cpu_budget_ms: float = typer.Option(0.0, help="auto 모드 CPU 예산(ms). 0이면 기본값"),
+    ):
+        """변환을 N회 실행해 단계별 벽시계/CPU 시간과 최대 RSS를 출력."""
+        import tempfile
+        from ..core import build_pdf_two_columns_from_sources
+        from .bench import compare_autotune, format_report, run_bench
+
+        options: Dict[str, Any] = dict(
+            margin=margin,
+            gutter=gutter,
+            dpi=min(int(dpi), 220),
+            fast=fast,
+            workers=workers,
+            auto_tune=auto_tune,
+            cpu_budget_ms=cpu_budget_ms or None,
+        )
+        if auto_tune:
+            cmp = compare_autotune(
+                inputs, margin=margin, gutter=gutter, dpi=options["dpi"], fast=fast,
+                cpu_budget_ms=cpu_budget_ms or None,
+            )
+            for label in ("default", "auto"):
+                r = cmp[label]
+                typer.echo(
+                    f"[autotune] {label:<7} band={r['search_band']} strip={r['bg_strip']} "
+                    f"stride={r['sample_stride']} features={r['features_ms']:.1f}ms "
+                    f"clean-cuts={r['quality']:.2f} pages={(len(r['cuts']) + 1) // 2}"
+                )
+            verdict = "OK" if cmp["within_tolerance"] else "OUT OF TOLERANCE"
+            typer.echo(f"[autotune] mean cut shift {cmp['mean_shift_px']:.1f}px → {verdict}")
+        with tempfile.TemporaryDirectory(prefix="capfit-bench-") as tmp:
+            target = pdf_path or str(Path(tmp) / "bench.pdf")
+            rec = run_bench(
+                lambda hooks: build_pdf_two_columns_from_sources(inputs, target, hooks=hooks, **options),
+                repeat=repeat,
+                warmup=warmup,
+                sample_interval=max(0.0005, sample_ms / 1000.0),
+                profile_path=profile or None,
+                collapsed_path=collapsed or None,
+            )
+        typer.echo(f"[bench] {len(inputs)} input(s), repeat={repeat}, warmup={warmup}")
+        for row in format_report(rec):
+            typer.echo(row)
+        if profile:
+            typer.echo(f"[profile] {profile}  (python -m pstats {profile})")
+        if collapsed:
+            typer.echo(f"[collapsed] {collapsed}  (flamegraph.pl {collapsed} > flame.svg)")
+
+    def startup(
+        self,
+        runs: int = typer.Option(10, help="`capfit --help` 측정 반복 횟수"),
+        budget_ms: float = typer.Option(150.0, help="시작 시간 예산(ms). 넘으면 종료 코드 1"),
+        top: int = typer.Option(15, help="import 시간 상위 N개 모듈 표시"),
+    ):
+        """CLI 시작 시간(`capfit --help`)과 import 시간 리포트."""
+        from .startup import heavy_imports, import_report, measure_help, measure_interpreter
+
+        floor_ms = measure_interpreter(runs)
+        help_ms = measure_help(runs)
+        entries = import_report()
+        typer.echo(f"[startup] python -c pass   : {floor_ms:7.1f} ms (median of {runs})")
+        typer.echo(f"[startup] capfit --help    : {help_ms:7.1f} ms (budget {budget_ms:.0f} ms)")
+        root = next((e for e in entries if e.name == "cli.app"), None)
+        if root is not None:
+            typer.echo(f"[startup] import cli.app   : {root.cumulative_us / 1000:7.1f} ms")
+        typer.echo(f"{'self ms':>8} {'cum ms':>8}  module")
+        for e in sorted(entries, key=lambda e: e.self_us, reverse=True)[:top]:
+            typer.echo(f"{e.self_us / 1000:>8.1f} {e.cumulative_us / 1000:>8.1f}  {e.name}")
+        heavy = heavy_imports(entries)
+        if heavy:
+            typer.echo(f"⚠️  시작 경로에서 무거운 모듈 import: {', '.join(heavy)}")
+        if help_ms > budget_ms or heavy:
+            raise typer.Exit(code=1)
+        typer.echo("✅ within budget")
+
+    def watch(
+        self,
+        watch_dir: str = typer.Option(..., "--watch-dir", "-w", help="감시할 폴더 (스캐너/폰 동기화 폴더)"),
+        outdir: str = typer.Option("out", "--outdir", "-o", help="PDF 및 매니페스트 저장 폴더"),
+        workers: int = typer.Option(2, help="상주 워커 프로세스 수"),
+        poll_interval: float = typer.Option(0.5, help="폴더 확인 주기(초)"),
+        settle: float = typer.Option(1.0, help="크기/수정시각이 이 시간(초) 동안 그대로면 쓰기 완료로 간주"),
+        debounce: float = typer.Option(2.0, help="마지막 파일 도착 후 이 시간(초) 동안 조용하면 한 작업으로 묶어 변환"),
+        max_group: int = typer.Option(50, help="한 작업에 묶을 최대 파일 수"),
+        margin: int = typer.Option(60, help="PDF 페이지 여백(px)"),
+        gutter: int = typer.Option(50, help="2단 사이 간격(px)"),
+        dpi: int = typer.Option(220, help="PDF DPI(최대 220)"),
+        fast: bool = typer.Option(False, help="빠른 리샘플링(BILINEAR) 사용"),
+        dedupe_overlap: bool = typer.Option(True, help="이웃 캡처 사이 겹친 메시지 띠를 한 번만 남김"),
+        strip_chrome: bool = typer.Option(False, help="모든 캡처에 반복되는 상단바/입력창을 첫 장/마지막 장에만 남김"),
+    ):
+        """폴더를 감시하며 새 캡처를 묶어 2단 PDF로 변환 (상주 모드)."""
+        from .watch import FolderWatcher
+
+        options = {
+            "margin": margin,
+            "gutter": gutter,
+            "dpi": min(int(dpi), 220),
+            "fast": fast,
+            "dedupe_overlap": dedupe_overlap,
+            "strip_chrome": strip_chrome,
+        }
+        watcher = FolderWatcher(
+            watch_dir,
+            outdir,
+            options=options,
+            workers=workers,
+            poll_interval=poll_interval,
+            settle=settle,
+            debounce=debounce,
+            max_group=max_group,
+            echo=typer.echo,
+        )
+        watcher.run_forever()
+
+    @staticmethod
+    def _effective_params(
+        *,
+        column_width: int,
+        column_height: int,
+        overlap: int,
+        smart_cut: bool,
+        smart_band: int,
+        make_pdf: bool,
+        pdf_mode: str,
+        margin: int,
+        gutter: int,
+        dpi: int,
+        page_width: int,
+        page_height: int,
+        optimize_slices: bool,
+    ) -> Dict[str, Any]:
+        """CLI 옵션 → 실제 변환에 쓰이는 파라미터(매니페스트 비교 기준)."""
+        from ..core.layout import compute_two_column_layout
+
+        if pdf_mode not in ("two_columns", "one_per_page"):
+            raise typer.BadParameter("pdf_mode must be 'two_columns' or 'one_per_page'.")
         # 2단 PDF를 생성할 경우, 불필요한 리사이즈/붙이기 최소화를 위해
         # 분할 폭/높이를 페이지 레이아웃에 맞춰 최적화
         eff_column_width = column_width
@@ -64,42 +405,95 @@ class CapfitCLI:
             # 두 컬럼 모두에 최소 1개 이상 들어가도록, 한 조각의 목표 높이를
             # 페이지 유효 높이의 절반으로 제한
             eff_column_height = max(1, min(column_height, usable_h // 2))
+        return {
+            "column_width": eff_column_width,
+            "column_height": eff_column_height,
+            "overlap": overlap,
+            "smart_cut": smart_cut,
+            "smart_band": smart_band,
+            "make_pdf": make_pdf,
+            "pdf_mode": pdf_mode,
+            "margin": margin,
+            "gutter": gutter,
+            "dpi": dpi,
+            "page_width": page_width,
+            "page_height": page_height,
+        }
 
-        paths = split_image(
-            input_path=input,
-            outdir=outdir,
-            column_width=eff_column_width,
-            column_height=eff_column_height,
-            overlap=overlap,
-            smart_cut=smart_cut,
-            smart_band=smart_band,
+    @staticmethod
+    def _convert_one(
+        input: str,
+        outdir: Optional[str],
+        params: Dict[str, Any],
+        *,
+        pdf_path: str = "",
+        base: Optional[str] = None,
+    ) -> List[str]:
+        """입력 한 장을 분할(+PDF)하고 생성된 파일 경로 목록을 반환.
+
+        - 결과 파일 이름은 base(기본: 입력 파일 이름에서 확장자를 뺀 것)로 시작
+        - input이 '-'이면 stdin에서 이미지를 읽음
+        - pdf_path가 '-'이면 PDF를 stdout으로 스트리밍하고, outdir를 지정하지 않았으면
+          조각 PNG도 파일로 남기지 않음(메모리에서 바로 PDF 조립)
+        """
+        from ..core import (
+            split_image_parts,
+            build_pdf_two_columns,
+            build_pdf_one_per_page,
+            open_rgb,
+            save_images,
         )
-        typer.echo(f"[PNG saved] {len(paths)} files")
 
-        if make_pdf:
-            base = Path(input).stem
-            pdf_file = pdf_path or str(Path(outdir) / f"{base}.pdf")
-            if pdf_mode == "two_columns":
-                pw = page_width or None
-                ph = page_height or None
+        to_stdout = params["make_pdf"] and pdf_path == "-"
+
+        def log(msg: str) -> None:
+            typer.echo(msg, err=to_stdout)
+
+        if input == "-":
+            src: Any = io.BytesIO(sys.stdin.buffer.read())
+            base = base or "stdin"
+        else:
+            src = input
+            base = base or Path(input).stem
+
+        parts = split_image_parts(
+            open_rgb(src),
+            column_width=params["column_width"],
+            column_height=params["column_height"],
+            overlap=params["overlap"],
+            smart_cut=params["smart_cut"],
+            smart_band=params["smart_band"],
+        )
+        outputs: List[str] = []
+        if outdir is not None or not to_stdout:
+            outdir = outdir or "out"
+            outputs = save_images(parts, outdir, base, ext=".png")
+            log(f"[PNG saved] {len(outputs)} files")
+
+        if params["make_pdf"]:
+            pdf_file: Any = sys.stdout.buffer if to_stdout else (pdf_path or str(Path(outdir or "out") / f"{base}.pdf"))
+            dpi = params["dpi"]
+            if params["pdf_mode"] == "two_columns":
+                pw = params["page_width"] or None
+                ph = params["page_height"] or None
                 out_pdf = build_pdf_two_columns(
-                    paths,
+                    parts,
                     pdf_file,
-                    margin=margin,
-                    gutter=gutter,
+                    margin=params["margin"],
+                    gutter=params["gutter"],
                     dpi=dpi,
                     page_width=pw,
                     page_height=ph,
                 )
-            elif pdf_mode == "one_per_page":
-                out_pdf = build_pdf_one_per_page(paths, pdf_file, margin=margin, dpi=dpi)
             else:
-                raise typer.BadParameter("pdf_mode must be 'two_columns' or 'one_per_page'.")
-            typer.echo(f"[PDF saved] {out_pdf}")
-            typer.echo("✅ Done!")
-        else:
-            typer.echo("✅ Done! (PDF skipped)")
-    
+                out_pdf = build_pdf_one_per_page(parts, pdf_file, margin=params["margin"], dpi=dpi)
+            if to_stdout:
+                log("[PDF streamed] <stdout>")
+            else:
+                log(f"[PDF saved] {out_pdf}")
+                outputs.append(out_pdf)
+        return outputs
+
     def get_app(self):
         """Typer 앱 인스턴스 반환"""
         return self.app
@@ -0,0 +1,239 @@
+"""
+변환 벤치마크 (`capfit bench`)
+
+엔진 훅으로 단계별(decode/resize/dedupe/features/plan/compose/encode/write) 벽시계 시간,
+CPU 시간, 최대 RSS를 측정한다. 선택적으로 cProfile(pstats)과 flamegraph용
+collapsed-stack 파일을 남긴다.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..core.hooks import ConversionHooks, STAGES
+
+
+def _current_rss() -> Optional[int]:
+    """현재 RSS(바이트). Linux는 /proc, 그 외에는 지금까지의 최대 RSS로 대신한다."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+@dataclass
+class StageStats:
+    wall: List[float] = field(default_factory=list)
+    cpu: List[float] = field(default_factory=list)
+    peak_rss: int = 0
+
+
+class StageRecorder(ConversionHooks):
+    """단계별 자기 시간(self time)을 누적하는 훅.
+
+    단계가 중첩되면(encode 안의 write) 자식 구간을 부모에서 빼서 기록하므로
+    단계별 합계가 전체 시간과 맞는다. RSS/스택 샘플링은 별도 스레드가 담당.
+    """
+
+    def __init__(self, *, sample_interval: float = 0.002, collect_stacks: bool = False):
+        self._local = threading.local()
+        self._main_ident = threading.get_ident()
+        self._run_wall: Dict[str, float] = defaultdict(float)
+        self._run_cpu: Dict[str, float] = defaultdict(float)
+        self.stats: Dict[str, StageStats] = {name: StageStats() for name in STAGES}
+        self.stacks: Counter = Counter()
+        self._sample_interval = sample_interval
+        self._collect_stacks = collect_stacks
+        self._sampling = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._main_stack: Optional[List[list]] = None
+
+    # ---- ConversionHooks ----
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        stack = self._stack()
+        frame = [name, 0.0, 0.0]  # [이름, 자식 wall, 자식 cpu]
+        stack.append(frame)
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            dw, dc = time.perf_counter() - w0, time.thread_time() - c0
+            stack.pop()
+            self._run_wall[name] += dw - frame[1]
+            self._run_cpu[name] += dc - frame[2]
+            if stack:
+                stack[-1][1] += dw
+                stack[-1][2] += dc
+
+    def _stack(self) -> List[list]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            if threading.get_ident() == self._main_ident:
+                self._main_stack = stack
+        return stack
+
+    # ---- 실행 단위 ----
+    def begin_run(self) -> None:
+        self._run_wall.clear()
+        self._run_cpu.clear()
+        self._stack()
+
+    def end_run(self) -> None:
+        for name in STAGES:
+            self.stats[name].wall.append(self._run_wall.get(name, 0.0))
+            self.stats[name].cpu.append(self._run_cpu.get(name, 0.0))
+
+    # ---- 샘플러 ----
+    def start_sampling(self) -> None:
+        self._sampling.set()
+        self._sampler = threading.Thread(target=self._sample_loop, name="capfit-bench-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self) -> None:
+        self._sampling.clear()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_loop(self) -> None:
+        while self._sampling.is_set():
+            stack = self._main_stack
+            current = stack[-1][0] if stack else None
+            if current is not None:
+                rss = _current_rss()
+                st = self.stats[current]
+                if rss is not None and rss > st.peak_rss:
+                    st.peak_rss = rss
+            if self._collect_stacks:
+                frame = sys._current_frames().get(self._main_ident)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+            time.sleep(self._sample_interval)
+
+
+def _collapse(frame: Any) -> str:
+    """프레임 체인을 flamegraph collapsed 형식(root;...;leaf)으로."""
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def run_bench(
+    convert: Callable[[ConversionHooks], Any],
+    *,
+    repeat: int = 5,
+    warmup: int = 1,
+    sample_interval: float = 0.002,
+    profile_path: Optional[str] = None,
+    collapsed_path: Optional[str] = None,
+) -> StageRecorder:
+    """`convert(hooks)`를 warmup + repeat회 실행하며 단계별 통계를 모은다.
+
+    cProfile은 측정을 왜곡하므로 측정 실행이 끝난 뒤 한 번 더 따로 돌린다.
+    """
+    for _ in range(max(0, warmup)):
+        convert(ConversionHooks())
+
+    rec = StageRecorder(sample_interval=sample_interval, collect_stacks=bool(collapsed_path))
+    rec.start_sampling()
+    try:
+        for _ in range(max(1, repeat)):
+            rec.begin_run()
+            convert(rec)
+            rec.end_run()
+    finally:
+        rec.stop_sampling()
+
+    if collapsed_path:
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for stack, count in rec.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    if profile_path:
+        import cProfile
+
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            convert(ConversionHooks())
+        finally:
+            prof.disable()
+        prof.dump_stats(profile_path)
+    return rec
+
+
+def format_report(rec: StageRecorder) -> List[str]:
+    """단계별 평균/최소 벽시계 시간, 평균 CPU 시간, 최대 RSS 표."""
+    rows = [f"{'stage':<10} {'wall avg':>10} {'wall min':>10} {'cpu avg':>10} {'peak RSS':>10}"]
+    total_avg = total_min = total_cpu = 0.0
+    for name in STAGES:
+        st = rec.stats[name]
+        n = max(1, len(st.wall))
+        w_avg, w_min, c_avg = sum(st.wall) / n, min(st.wall or [0.0]), sum(st.cpu) / n
+        total_avg += w_avg
+        total_min += w_min
+        total_cpu += c_avg
+        rss = f"{st.peak_rss / 2**20:.1f}MB" if st.peak_rss else "-"
+        rows.append(f"{name:<10} {w_avg * 1e3:>8.1f}ms {w_min * 1e3:>8.1f}ms {c_avg * 1e3:>8.1f}ms {rss:>10}")
+    rows.append(f"{'total':<10} {total_avg * 1e3:>8.1f}ms {total_min * 1e3:>8.1f}ms {total_cpu * 1e3:>8.1f}ms")
+    return rows
+
+
+def compare_autotune(
+    inputs: List[str],
+    *,
+    margin: int = 60,
+    gutter: int = 50,
+    dpi: int = 220,
+    fast: bool = False,
+    cpu_budget_ms: Optional[float] = None,
+) -> Dict[str, Any]:
+    """기본 스마트 컷 설정과 auto 설정의 features 시간/컷 품질 비교.
+
+    품질은 두 설정의 컷을 모두 기본 설정의 행 지표로 평가(깨끗한 공백 위 컷 비율)하고,
+    컷 위치 차이(px)도 함께 보고한다.
+    """
+    from ..core import compute_two_column_layout
+    from ..core.autotune import QUALITY_TOLERANCE, autotune_smart_cut, cut_quality
+    from ..core.pdf_builder import _load_resized, _plan_cuts, _row_features, _stack_vertically
+
+    _, _, col_w, usable_h = compute_two_column_layout(dpi=dpi, margin=margin, gutter=gutter)
+    src = _stack_vertically(_load_resized(inputs, col_w, fast=fast), col_w)
+    tuned = autotune_smart_cut(col_w, src.height, cpu_budget_ms=cpu_budget_ms)
+    defaults = {"search_band": 60, "bg_strip": 12, "sample_stride": 4}
+
+    result: Dict[str, Any] = {"col_w": col_w, "height": src.height, "auto": tuned}
+    ref_feats = None
+    for label, params in (("default", defaults), ("auto", tuned)):
+        t0 = time.process_time()
+        feats = _row_features(src, bg_strip=params["bg_strip"], sample_stride=params["sample_stride"])
+        features_ms = (time.process_time() - t0) * 1000.0
+        cuts = _plan_cuts(feats, src.height, usable_h, search_band=params["search_band"])
+        ref_feats = ref_feats or feats
+        result[label] = dict(params, features_ms=features_ms, cuts=cuts,
+                             quality=cut_quality(ref_feats.row_bg_ratio, ref_feats.row_bg_run_ratio, cuts))
+    d_cuts, a_cuts = result["default"]["cuts"], result["auto"]["cuts"]
+    shifts = [abs(a - b) for a, b in zip(d_cuts[:-1], a_cuts[:-1])]
+    result["mean_shift_px"] = sum(shifts) / len(shifts) if shifts else 0.0
+    result["within_tolerance"] = result["auto"]["quality"] >= result["default"]["quality"] - QUALITY_TOLERANCE
+    return result
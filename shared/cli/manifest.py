@@ -0,0 +1,131 @@
+"""
+배치 증분 빌드용 매니페스트
+
+출력 폴더에 입력별 내용 해시, 유효 파라미터, 생성 결과물을 기록해 두고
+다음 실행에서 해시/파라미터가 그대로인 입력은 건너뛴다(make 방식).
+결과물 경로는 매니페스트가 있는 폴더 기준 상대 경로로 기록하므로 어느 폴더에서 실행해도 같은
+파일을 가리킨다.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+MANIFEST_NAME = ".capfit-manifest.json"
+# 2: 결과물 경로를 실행 위치가 아닌 매니페스트 폴더 기준으로 기록 (1은 읽지 않고 다시 만든다)
+MANIFEST_VERSION = 2
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 sha256 해시(16진수)를 스트리밍으로 계산."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def params_digest(params: Dict[str, Any]) -> str:
+    """파라미터 딕셔너리를 키 순서와 무관하게 해시."""
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """출력 폴더의 `.capfit-manifest.json`을 읽고 쓰는 헬퍼."""
+
+    def __init__(self, outdir: str):
+        self.root = Path(os.path.abspath(outdir))
+        self.path = self.root / MANIFEST_NAME
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = dict(data.get("entries") or {})
+
+    @staticmethod
+    def key_for(input_path: str) -> str:
+        return str(Path(input_path).resolve())
+
+    def content_hash(self, input_path: str) -> str:
+        """입력 해시. 크기/mtime이 기록과 같으면 다시 읽지 않고 기록된 해시를 재사용."""
+        st = os.stat(input_path)
+        entry = self.entries.get(self.key_for(input_path))
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return str(entry["sha256"])
+        return file_sha256(input_path)
+
+    def _resolve(self, output: str) -> str:
+        """기록된 결과물 경로 → 절대 경로(매니페스트 폴더 기준)."""
+        return os.path.normpath(os.path.join(self.root, output))
+
+    def _relative(self, output: str) -> str:
+        path = os.path.abspath(output)
+        return os.path.relpath(path, self.root) if self._inside(path) else path
+
+    def _inside(self, path: str) -> bool:
+        return os.path.commonpath([self.root, os.path.abspath(path)]) == str(self.root)
+
+    def _claimed_by_others(self, input_path: str) -> Set[str]:
+        """다른 입력의 기록이 자기 결과물로 가진 경로(절대)."""
+        key = self.key_for(input_path)
+        return {self._resolve(p) for k, e in self.entries.items() if k != key for p in e.get("outputs") or []}
+
+    def is_up_to_date(self, input_path: str, sha256: str, params: Dict[str, Any]) -> bool:
+        """해시/파라미터가 같고 기록된 결과물이 모두 남아 있으며 다른 입력과 겹치지 않으면 True."""
+        entry = self.entries.get(self.key_for(input_path))
+        if not entry:
+            return False
+        if entry.get("sha256") != sha256 or entry.get("params_digest") != params_digest(params):
+            return False
+        outputs = self.outputs_for(input_path)
+        if not outputs or not all(os.path.exists(p) for p in outputs):
+            return False
+        # 같은 파일을 다른 입력도 자기 것으로 기록했다면 내용이 어느 쪽 것인지 알 수 없다
+        return not set(outputs) & self._claimed_by_others(input_path)
+
+    def outputs_for(self, input_path: str) -> List[str]:
+        """기록된 결과물 절대 경로 목록."""
+        entry = self.entries.get(self.key_for(input_path)) or {}
+        return [self._resolve(p) for p in entry.get("outputs") or []]
+
+    def stale_outputs(self, input_path: str, outputs: List[str]) -> List[str]:
+        """이전 실행에서만 만들어진 결과물(조각 수가 줄어든 경우 등) 중 지워도 되는 것.
+
+        출력 폴더 밖의 파일과 다른 입력이 기록한 파일은 지우지 않는다.
+        """
+        current = {os.path.abspath(p) for p in outputs}
+        others = self._claimed_by_others(input_path)
+        return [p for p in self.outputs_for(input_path)
+                if p not in current and p not in others and self._inside(p)]
+
+    def record(self, input_path: str, sha256: str, params: Dict[str, Any], outputs: List[str], *,
+               size: Optional[int] = None, mtime_ns: Optional[int] = None) -> None:
+        """입력의 결과물을 기록. size/mtime_ns는 sha256을 구할 때의 값(없으면 지금 파일의 값)."""
+        if size is None or mtime_ns is None:
+            st = os.stat(input_path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        self.entries[self.key_for(input_path)] = {
+            "sha256": sha256,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "params": params,
+            "params_digest": params_digest(params),
+            "outputs": [self._relative(str(p)) for p in outputs],
+        }
+
+    def save(self) -> None:
+        """임시 파일에 쓴 뒤 교체(중단되어도 매니페스트가 깨지지 않도록)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        payload = {"version": MANIFEST_VERSION, "entries": self.entries}
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,67 @@
+"""
+CLI 시작 시간 측정 (`capfit startup`)
+
+`capfit --help`를 새 프로세스로 여러 번 실행해 시작 시간을 재고,
+`python -X importtime` 결과로 어떤 모듈이 시작 비용을 차지하는지 보여 준다.
+"""
+
+from __future__ import annotations
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple
+
+# 시작 경로에서 import되면 안 되는 무거운 모듈
+HEAVY_MODULES = ("numpy", "PIL", "rich", "fastapi", "uvicorn")
+
+
+class ImportEntry(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def _time_command(cmd: List[str], runs: int) -> float:
+    """명령을 runs회 실행한 벽시계 시간의 중앙값(ms)."""
+    samples: List[float] = []
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def measure_help(runs: int = 10) -> float:
+    return _time_command([sys.executable, "-m", "cli.app", "--help"], runs)
+
+
+def measure_interpreter(runs: int = 10) -> float:
+    """인터프리터 자체 시작 시간(하한선)."""
+    return _time_command([sys.executable, "-c", "pass"], runs)
+
+
+def import_report() -> List[ImportEntry]:
+    """`import cli.app`의 -X importtime 결과를 파싱."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import cli.app"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    entries: List[ImportEntry] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            entries.append(ImportEntry(name.strip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue
+    return entries
+
+
+def heavy_imports(entries: List[ImportEntry]) -> List[str]:
+    """시작 경로에 끼어든 무거운 최상위 패키지 목록."""
+    return sorted({e.name.split(".")[0] for e in entries if e.name.split(".")[0] in HEAVY_MODULES})
@@ -0,0 +1,224 @@
+"""
+감시 폴더(watch-folder) 상주 모드
+
+폴더를 주기적으로 확인해 쓰기가 끝난 새 캡처를 찾고, 짧은 간격으로 연달아 들어온
+캡처들을 하나의 다중 소스 작업으로 묶어(debounce) 미리 데워 둔 워커 풀에서 PDF를 만든다.
+"""
+
+from __future__ import annotations
+import os
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.utils import IMAGE_EXTENSIONS
+from .manifest import BuildManifest
+
+
+def _ignore_sigint() -> None:
+    """워커 프로세스 초기화: 터미널 Ctrl-C(SIGINT)는 프로세스 그룹 전체에 가므로 워커는 무시하고,
+    부모가 남은 그룹을 제출하고 진행 중인 작업을 기다린 뒤 풀을 닫는다."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _warmup() -> int:
+    """워커 프로세스에서 무거운 모듈(numpy/PIL/빌더)을 미리 import."""
+    from ..core import pdf_builder  # noqa: F401
+    return os.getpid()
+
+
+def _build_group(paths: List[str], out_pdf: str, options: Dict[str, Any]) -> str:
+    """워커 프로세스에서 실행되는 변환 작업 (피클 가능하도록 모듈 수준 함수).
+
+    한 장짜리 그룹도 다중 소스 엔진으로 처리한다(from_source와 결과 동일, 겹침 제거는 건너뜀).
+    """
+    from ..core import build_pdf_two_columns_from_sources
+
+    return build_pdf_two_columns_from_sources(paths, out_pdf, **options)
+
+
+@dataclass
+class _Candidate:
+    size: int
+    mtime_ns: int
+    stable_since: float
+
+
+@dataclass
+class _Claim:
+    # 작업으로 넘길 때의 크기/mtime/해시 (변환한 내용이 이것이다)
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass
+class _Group:
+    paths: List[str] = field(default_factory=list)
+    last_arrival: float = 0.0
+
+
+class FolderWatcher:
+    """폴더 감시 + 디바운스 그룹핑 + 상주 워커 풀 실행기.
+
+    - settle: 크기/mtime이 이 시간(초) 동안 변하지 않으면 쓰기가 끝난 파일로 간주
+    - debounce: 마지막 파일 도착 후 이 시간(초) 동안 새 파일이 없으면 그룹을 작업으로 제출
+    - max_group: 그룹 최대 파일 수(도달 시 즉시 제출)
+    """
+
+    def __init__(
+        self,
+        watch_dir: str,
+        outdir: str,
+        *,
+        options: Dict[str, Any],
+        workers: int = 2,
+        poll_interval: float = 0.5,
+        settle: float = 1.0,
+        debounce: float = 2.0,
+        max_group: int = 50,
+        echo: Callable[[str], None] = print,
+    ):
+        self.watch_dir = Path(watch_dir)
+        self.outdir = Path(outdir)
+        self.options = dict(options)
+        self.workers = max(1, int(workers))
+        self.poll_interval = max(0.05, float(poll_interval))
+        self.settle = max(0.0, float(settle))
+        self.debounce = max(0.0, float(debounce))
+        self.max_group = max(1, int(max_group))
+        self.echo = echo
+
+        self.manifest = BuildManifest(str(self.outdir))
+        self._candidates: Dict[str, _Candidate] = {}
+        # 작업으로 넘긴 파일. 같은 이름으로 덮어쓰면(크기/mtime이 바뀌면) 다시 후보가 된다
+        self._claimed: Dict[str, _Claim] = {}
+        self._group = _Group()
+        self._inflight: List[Tuple[Future, List[str], str, float]] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # ---- 워커 풀 ----
+    def start(self) -> None:
+        """워커 풀을 만들고 모든 워커에서 import를 끝내 둔다."""
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_sigint)
+        pids = {f.result() for f in [self._pool.submit(_warmup) for _ in range(self.workers)]}
+        self.echo(f"[watch] {self.watch_dir} → {self.outdir} (workers={len(pids)})")
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._reap(block=True)
+            self._pool = None
+
+    # ---- 감시 루프 ----
+    def run_forever(self) -> None:
+        self.start()
+        try:
+            while True:
+                self.poll_once()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            self.echo("[watch] 종료 중... 진행 중인 작업을 마무리합니다.")
+            self._flush_group()
+        finally:
+            self.stop()
+
+    def poll_once(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for path in self._scan_ready(now):
+            self._group.paths.append(path)
+            self._group.last_arrival = now
+            if len(self._group.paths) >= self.max_group:
+                self._flush_group()
+        if self._group.paths and now - self._group.last_arrival >= self.debounce:
+            self._flush_group()
+        self._reap(block=False)
+
+    def _scan_ready(self, now: float) -> List[str]:
+        """쓰기가 끝난(settle 동안 크기/mtime 불변) 새 파일 목록."""
+        ready: List[str] = []
+        seen: set[str] = set()
+        busy = {p for _, paths, _, _ in self._inflight for p in paths}
+        try:
+            entries = list(os.scandir(self.watch_dir))
+        except FileNotFoundError:
+            return ready
+        for entry in entries:
+            if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = entry.path
+            seen.add(path)
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            claim = self._claimed.get(path)
+            if claim is not None:
+                if (claim.size, claim.mtime_ns) == (st.st_size, st.st_mtime_ns):
+                    continue
+                # 동기화 도구 등이 같은 이름으로 덮어쓴 파일(내용이 같으면 매니페스트가 건너뛴다).
+                # 이전 내용을 변환 중이면 같은 PDF를 두 워커가 쓰지 않도록 끝날 때까지 기다린다
+                if path in busy:
+                    continue
+                del self._claimed[path]
+            cand = self._candidates.get(path)
+            if cand is None or cand.size != st.st_size or cand.mtime_ns != st.st_mtime_ns:
+                self._candidates[path] = _Candidate(st.st_size, st.st_mtime_ns, now)
+                if self.settle > 0:
+                    continue
+                cand = self._candidates[path]
+            if st.st_size == 0 or now - cand.stable_since < self.settle:
+                continue
+            del self._candidates[path]
+            # 재시작 후에도 이미 변환한 입력은 다시 만들지 않음
+            digest = self.manifest.content_hash(path)
+            self._claimed[path] = _Claim(st.st_size, st.st_mtime_ns, digest)
+            if self.manifest.is_up_to_date(path, digest, self.options) or path in self._group.paths:
+                continue
+            ready.append(path)
+        # 사라진 파일 정리(같은 이름으로 다시 들어오면 새 파일로 처리)
+        for path in list(self._candidates):
+            if path not in seen:
+                del self._candidates[path]
+        self._claimed = {path: claim for path, claim in self._claimed.items() if path in seen}
+        return ready
+
+    def _flush_group(self) -> None:
+        from ..core import numeric_sort_key
+
+        paths = sorted(self._group.paths, key=lambda p: numeric_sort_key(os.path.basename(p)))
+        self._group = _Group()
+        if not paths or self._pool is None:
+            return
+        first, last = Path(paths[0]).stem, Path(paths[-1]).stem
+        name = first if len(paths) == 1 else f"{first}-{last}"
+        out_pdf = str(self.outdir / f"{name}.pdf")
+        fut = self._pool.submit(_build_group, paths, out_pdf, self.options)
+        self._inflight.append((fut, paths, out_pdf, time.monotonic()))
+        self.echo(f"[queued] {len(paths)} files → {out_pdf}")
+
+    def _reap(self, *, block: bool) -> None:
+        pending: List[Tuple[Future, List[str], str, float]] = []
+        for fut, paths, out_pdf, t0 in self._inflight:
+            if not block and not fut.done():
+                pending.append((fut, paths, out_pdf, t0))
+                continue
+            try:
+                fut.result()
+            except Exception as e:
+                self.echo(f"[error] {out_pdf}: {e}")
+                continue
+            for p in paths:
+                claim = self._claimed.get(p)
+                if claim is None:
+                    continue  # 그 사이 지워졌다
+                # 변환한 내용(작업으로 넘길 때의 해시/크기/mtime)으로 기록해, 그 사이 덮어쓴 파일은 다시 만든다
+                self.manifest.record(p, claim.sha256, self.options, [out_pdf],
+                                     size=claim.size, mtime_ns=claim.mtime_ns)
+            self.manifest.save()
+            self.echo(f"[PDF saved] {out_pdf} ({time.monotonic() - t0:.2f}s)")
+        self._inflight = pending
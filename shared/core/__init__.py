@@ -1,26 +1,60 @@
 """
 핵심 이미지 처리 및 PDF 생성 모듈
+
+numpy/PIL을 끌어오는 하위 모듈은 실제로 이름을 사용할 때 import한다(CLI 시작 시간 단축).
 """
 
-from .splitter import split_image
-from .pdf_builder import (
-    build_pdf_two_columns,
-    build_pdf_one_per_page,
-    build_pdf_two_columns_from_source,
-    build_pdf_two_columns_from_sources,
-    compute_two_column_layout,
-)
-from .utils import open_rgb, to_gray, ensure_dir, save_images
-
-__all__ = [
-    "split_image",
-    "build_pdf_two_columns",
-    "build_pdf_one_per_page", 
-    "build_pdf_two_columns_from_source",
-    "build_pdf_two_columns_from_sources",
-    "compute_two_column_layout",
-    "open_rgb",
-    "to_gray",
-    "ensure_dir",
-    "save_images",
-]
+from __future__ import annotations
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# 공개 이름 → 정의된 하위 모듈
+_EXPORTS = {
+    "split_image": "splitter",
+    "split_image_parts": "splitter",
+    "build_pdf_two_columns": "pdf_builder",
+    "build_pdf_one_per_page": "pdf_builder",
+    "build_pdf_two_columns_from_source": "pdf_builder",
+    "build_pdf_two_columns_from_sources": "pdf_builder",
+    "prepare_sources": "pdf_builder",
+    "PartCache": "partcache",
+    "compute_two_column_layout": "layout",
+    "ConversionHooks": "hooks",
+    "ConversionCancelled": "hooks",
+    "open_rgb": "utils",
+    "to_gray": "utils",
+    "ensure_dir": "utils",
+    "save_images": "utils",
+    "numeric_sort_key": "utils",
+    "IMAGE_EXTENSIONS": "utils",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
+
+
+if TYPE_CHECKING:
+    from .splitter import split_image, split_image_parts
+    from .pdf_builder import (
+        build_pdf_two_columns,
+        build_pdf_one_per_page,
+        build_pdf_two_columns_from_source,
+        build_pdf_two_columns_from_sources,
+        prepare_sources,
+    )
+    from .partcache import PartCache
+    from .layout import compute_two_column_layout
+    from .hooks import ConversionHooks, ConversionCancelled
+    from .utils import open_rgb, to_gray, ensure_dir, save_images, numeric_sort_key, IMAGE_EXTENSIONS
@@ -0,0 +1,90 @@
+"""
+스마트 컷 파라미터 자동 조정 (auto 모드)
+
+기본값(search_band=60, bg_strip=12, sample_stride=4)은 220DPI A4 2단의 칼럼 폭(824px)
+기준이다. auto 모드는 칼럼 폭에 비례해 밴드 크기를 맞추고, 행당 샘플 수를 일정하게
+유지하는 stride를 고른 뒤, 예상 CPU 시간이 예산을 넘으면 stride를 더 키운다.
+"""
+
+from __future__ import annotations
+import logging
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 기본 파라미터가 맞춰진 기준 칼럼 폭(220DPI, 여백 60, 거터 50)
+REF_COL_W = 824
+REF_SEARCH_BAND = 60
+REF_BG_STRIP = 12
+REF_SAMPLE_STRIDE = 4
+# 기준 설정에서 행당 배경 판정 샘플 수(좌/우 25% 영역)
+TARGET_SAMPLES = 102
+MIN_SAMPLES = 24
+DEFAULT_CPU_BUDGET_MS = 200.0
+
+# features 단계 비용 모델(`capfit bench`로 측정): 전체 폭 연산 + 행당 샘플 루프 + 행당 고정비
+COST_NS_PER_PIXEL = 6.0
+COST_NS_PER_SAMPLE = 50.0
+COST_NS_PER_ROW = 1500.0
+
+# auto 모드 컷 품질이 기본값 대비 이만큼(깨끗한 공백 위 컷 비율)까지만 떨어지도록 허용
+QUALITY_TOLERANCE = 0.05
+
+
+def _samples_per_row(col_w: int, stride: int) -> int:
+    w_sub = len(range(0, col_w, stride))
+    return 2 * max(1, w_sub // 4)
+
+
+def estimate_features_ms(col_w: int, height: int, sample_stride: int) -> float:
+    """features 단계 예상 CPU 시간(ms)."""
+    ns = (
+        COST_NS_PER_PIXEL * col_w * height
+        + COST_NS_PER_SAMPLE * height * _samples_per_row(col_w, sample_stride)
+        + COST_NS_PER_ROW * height
+    )
+    return ns / 1e6
+
+
+def autotune_smart_cut(
+    col_w: int,
+    height: int,
+    *,
+    cpu_budget_ms: Optional[float] = None,
+) -> Dict[str, int]:
+    """칼럼 폭/합성 이미지 높이/CPU 예산으로 search_band, bg_strip, sample_stride 결정."""
+    budget = DEFAULT_CPU_BUDGET_MS if cpu_budget_ms is None else float(cpu_budget_ms)
+    scale = col_w / REF_COL_W
+    search_band = max(10, int(round(REF_SEARCH_BAND * scale)))
+    bg_strip = max(2, int(round(REF_BG_STRIP * scale)))
+    # 행당 샘플 수를 기준 설정과 같게: 좁은 칼럼은 촘촘히, 넓은 칼럼은 성기게
+    stride = max(1, int(round(col_w / (2 * TARGET_SAMPLES))))
+    # 예산 초과 시 최소 샘플 수까지 stride를 늘린다(큰 이미지의 추가 절감)
+    max_stride = max(stride, int(math.floor(col_w / (2 * MIN_SAMPLES))))
+    while stride < max_stride and estimate_features_ms(col_w, height, stride) > budget:
+        stride += 1
+    est = estimate_features_ms(col_w, height, stride)
+    params = {"search_band": search_band, "bg_strip": bg_strip, "sample_stride": stride}
+    logger.info(
+        "autotune col_w=%d height=%d budget=%.0fms -> search_band=%d bg_strip=%d sample_stride=%d "
+        "(samples/row=%d, est=%.0fms%s)",
+        col_w, height, budget, search_band, bg_strip, stride,
+        _samples_per_row(col_w, stride), est, "" if est <= budget else ", over budget",
+    )
+    return params
+
+
+def cut_quality(row_bg_ratio: np.ndarray, row_bg_run_ratio: np.ndarray, cuts: List[int],
+                *, bg_ratio_hi: float = 0.85) -> float:
+    """내부 컷 중 '깨끗한 공백'(배경 비율/연속 구간이 1순위 기준 이상) 행에 떨어진 비율.
+
+    비교할 때는 두 설정 모두 기준(기본값) 지표로 평가한다.
+    """
+    inner = [c for c in cuts[:-1] if 0 <= c < len(row_bg_ratio)]
+    if not inner:
+        return 1.0
+    ok = sum(1 for c in inner if row_bg_ratio[c] >= bg_ratio_hi and row_bg_run_ratio[c] >= 0.8)
+    return ok / len(inner)
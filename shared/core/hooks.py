@@ -0,0 +1,47 @@
+"""
+변환 엔진 훅
+
+PDF 빌더는 단계(decode/resize/dedupe/features/plan/compose/encode/write)마다 훅을 호출한다.
+기본 구현은 아무 일도 하지 않으며, 벤치마크/진행률 표시 등은 이를 상속해 사용한다.
+
+페이지 하나를 다 배치할 때마다 on_page(번호, 이미지)를 부르므로 PDF가 다 만들어지기 전에
+미리보기를 보여 줄 수 있다.
+
+취소는 협조적이다: 엔진은 단계 사이와 입력/페이지 사이마다 checkpoint()를 부르고,
+훅이 ConversionCancelled를 던지면 그 자리에서 변환을 멈춘다(쓰던 출력은 호출자가 정리).
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# 엔진 단계 이름(순서대로)
+STAGES = ("decode", "resize", "dedupe", "features", "plan", "compose", "encode", "write")
+
+
+class ConversionCancelled(Exception):
+    """훅이 변환 중단을 요청함 (checkpoint에서 던진다)."""
+
+
+class ConversionHooks:
+    """변환 엔진이 단계 사이사이에 호출하는 훅 모음 (기본: no-op)."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """`name` 단계 구간을 감싼다. 단계는 중첩될 수 있다(예: encode 안의 write)."""
+        yield
+
+    def on_page(self, index: int, page: "Image.Image") -> None:
+        """index(0부터)번 페이지 배치가 끝났을 때 호출된다. page는 인코딩 전 원본이므로 바꾸면 안 된다."""
+
+    def checkpoint(self) -> None:
+        """단계 사이, 입력/페이지 사이마다 호출된다. 취소하려면 ConversionCancelled를 던진다.
+
+        자주 불리므로(페이지 인코딩 중 쓰기마다) 가볍게 구현해야 한다.
+        """
+
+
+NO_HOOKS = ConversionHooks()
@@ -0,0 +1,42 @@
+"""
+페이지 레이아웃 계산 (numpy/PIL 없이 가벼운 순수 계산)
+
+CLI 시작 경로에서 무거운 모듈을 import하지 않고도 칼럼 폭을 알 수 있도록 분리.
+"""
+
+from __future__ import annotations
+from typing import Optional, Tuple
+
+
+def _a4_page_size(dpi: int) -> Tuple[int, int]:
+    # A4 portrait in inches: 8.27 x 11.69
+    w = int(round(8.27 * dpi))
+    h = int(round(11.69 * dpi))
+    return w, h
+
+
+def compute_two_column_layout(
+    *,
+    dpi: int,
+    margin: int,
+    gutter: int,
+    page_width: Optional[int] = None,
+    page_height: Optional[int] = None,
+) -> Tuple[int, int, int, int]:
+    """2단 레이아웃 메트릭 계산.
+
+    반환: (page_w, page_h, col_w, usable_h)
+    """
+    if not page_width or not page_height:
+        page_w, page_h = _a4_page_size(dpi)
+    else:
+        page_w, page_h = page_width, page_height
+
+    # 세로 보장
+    if page_w > page_h:
+        page_w, page_h = page_h, page_w
+
+    usable_w = page_w - margin * 2
+    usable_h = page_h - margin * 2
+    col_w = max(1, int((usable_w - gutter) // 2))
+    return page_w, page_h, col_w, usable_h
@@ -0,0 +1,91 @@
+"""
+칼럼 폭 리사이즈 결과 캐시
+
+디코드 + (겹침 검출용) 행 서명 + 칼럼 폭 리사이즈는 입력마다 독립적이고 변환 시간의 큰
+몫을 차지한다. 결과를 디스크에 두면 같은 입력을 다른 순서/옵션으로 다시 변환할 때, 또는
+웹 서버가 리뷰 화면에 머무는 동안 미리 만들어 둔 경우 디코드/리사이즈를 건너뛴다.
+
+    <root>/<키>.<col_w>.<q|f>.png   칼럼 폭으로 맞춘 이미지(무손실, 빠른 압축)
+    <root>/<키>.<col_w>.<q|f>.npz   원본 크기 (+ 행 서명)
+
+키는 호출자가 원본 경로마다 정한다(작업 안의 파일 이름, 내용 해시 등). 키가 없는 입력
+(스트림, 모르는 경로)은 캐시하지 않는다. PNG는 무손실이므로 캐시를 거친 결과 PDF는 직접
+디코드한 경우와 같다.
+"""
+
+from __future__ import annotations
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 캐시 PNG 압축 수준: 1이면 원본 디코드+리사이즈보다 한참 빠르게 읽히면서 크기도 작다
+PNG_COMPRESS_LEVEL = 1
+
+# (칼럼 폭 이미지, (원본 폭, 원본 높이), 행 서명 또는 None)
+CachedPart = Tuple[Image.Image, Tuple[int, int], Optional[np.ndarray]]
+
+
+class PartCache:
+    """원본 경로 → 키로 찾는 칼럼 폭 리사이즈 결과 디스크 캐시. 여러 프로세스가 함께 써도 된다."""
+
+    def __init__(self, root: str, keys: Dict[str, str]):
+        self.root = str(root)
+        self.keys = dict(keys)
+
+    def _base(self, src, col_w: int, fast: bool) -> Optional[str]:
+        key = self.keys.get(src) if isinstance(src, str) else None
+        if key is None:
+            return None
+        return os.path.join(self.root, f"{key}.{int(col_w)}.{'f' if fast else 'q'}")
+
+    def has(self, src, col_w: int, fast: bool, signature: bool) -> bool:
+        base = self._base(src, col_w, fast)
+        if base is None or not os.path.exists(f"{base}.png"):
+            return False
+        try:
+            with np.load(f"{base}.npz") as meta:
+                return not signature or "sig" in meta.files
+        except (OSError, ValueError):
+            return False
+
+    def load(self, src, col_w: int, fast: bool, signature: bool) -> Optional[CachedPart]:
+        """캐시된 결과. 없거나(행 서명이 필요한데 없는 경우 포함) 읽을 수 없으면 None."""
+        base = self._base(src, col_w, fast)
+        if base is None:
+            return None
+        try:
+            with np.load(f"{base}.npz") as meta:
+                size = tuple(int(v) for v in meta["size"])
+                sig = meta["sig"] if "sig" in meta.files else None
+            if signature and sig is None:
+                return None
+            with Image.open(f"{base}.png") as im:
+                fitted = im.convert("RGB")
+        except (OSError, ValueError, KeyError):
+            return None
+        return fitted, size, sig
+
+    def store(self, src, col_w: int, fast: bool, fitted: Image.Image,
+              src_size: Tuple[int, int], signature: Optional[np.ndarray] = None) -> None:
+        """결과를 캐시에 쓴다(임시 파일 + os.replace). 메타데이터를 나중에 써서 반쯤 쓴 항목은 없는 것으로 보인다."""
+        base = self._base(src, col_w, fast)
+        if base is None:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{base}.{os.getpid()}.{threading.get_ident()}"
+        arrays = {"size": np.asarray(src_size, dtype=np.int64)}
+        if signature is not None:
+            arrays["sig"] = signature
+        try:
+            fitted.save(f"{tmp}.png", format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+            os.replace(f"{tmp}.png", f"{base}.png")
+            with open(f"{tmp}.npz", "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(f"{tmp}.npz", f"{base}.npz")
+        finally:
+            for suffix in (".png", ".npz"):
+                if os.path.exists(tmp + suffix):
+                    os.remove(tmp + suffix)
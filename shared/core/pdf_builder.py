@@ -1,23 +1,91 @@
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Tuple, Union
 from PIL import Image
+import io
 import os
 import numpy as np
 
+from .hooks import ConversionHooks, NO_HOOKS
+from .layout import compute_two_column_layout
+from .partcache import PartCache
 
-def _load_images(paths: List[str]) -> List[Image.Image]:
+# 경로(str) 또는 이미 열린 PIL 이미지
+ImageSource = Union[str, Image.Image]
+# 저장 경로(str) 또는 바이너리 스트림(stdout 등)
+PdfTarget = Union[str, BinaryIO]
+
+
+def _load_images(paths: List[ImageSource]) -> List[Image.Image]:
     imgs: List[Image.Image] = []
     for p in paths:
-        im = Image.open(p).convert("RGB")
+        im = p.convert("RGB") if isinstance(p, Image.Image) else Image.open(p).convert("RGB")
         imgs.append(im)
     return imgs
 
 
-def _a4_page_size(dpi: int) -> Tuple[int, int]:
-    # A4 portrait in inches: 8.27 x 11.69
-    w = int(round(8.27 * dpi))
-    h = int(round(11.69 * dpi))
-    return w, h
+class _PdfWriter:
+    """Pillow PDF 작성기에 넘기는 출력 래퍼.
+
+    - 파이프(stdout)처럼 seek가 안 되는 스트림도 지원: PDF 작성기는 xref 오프셋 계산에
+      tell()과 끝으로의 seek만 쓰므로 쓴 바이트 수를 직접 센다
+    - 페이지는 인코딩되는 대로 바로 흘려보낸다
+    - 실제 쓰기 구간을 훅의 'write' 단계로 보고한다(벤치마크에서 encode와 분리)
+    - 쓰기마다 훅의 checkpoint를 불러 페이지 인코딩 사이에도 취소할 수 있게 한다
+    """
+
+    def __init__(self, raw: BinaryIO, hooks: ConversionHooks = NO_HOOKS):
+        self._raw = raw
+        self._hooks = hooks
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._hooks.checkpoint()
+        with self._hooks.stage("write"):
+            self._raw.write(data)
+        n = len(data)
+        self._pos += n
+        return n
+
+    def tell(self) -> int:
+        return self._pos
+
+    def getvalue(self) -> bytes:
+        # 기존 PDF에 덧붙이는 모드가 아니므로 읽을 내용은 항상 비어 있음
+        return b""
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if (whence == io.SEEK_END and offset == 0) or (whence == io.SEEK_CUR and offset == 0) \
+                or (whence == io.SEEK_SET and offset == self._pos):
+            return self._pos
+        raise io.UnsupportedOperation("forward-only stream")
+
+    def flush(self) -> None:
+        with self._hooks.stage("write"):
+            self._raw.flush()
+
+
+def _save_pdf(
+    pages: List[Image.Image],
+    out_pdf: PdfTarget,
+    *,
+    dpi: int,
+    hooks: ConversionHooks = NO_HOOKS,
+) -> PdfTarget:
+    """페이지 목록을 다중 페이지 PDF로 저장. 경로 또는 바이너리 스트림 모두 지원."""
+    first, rest = pages[0], pages[1:]
+    with hooks.stage("encode"):
+        if isinstance(out_pdf, (str, os.PathLike)):
+            os.makedirs(os.path.dirname(out_pdf) or ".", exist_ok=True)
+            title = os.path.splitext(os.path.basename(out_pdf))[0]
+            with open(out_pdf, "wb") as f:
+                first.save(_PdfWriter(f, hooks), format="PDF", save_all=True,
+                           append_images=rest, resolution=dpi, title=title)
+            return out_pdf
+        fp = _PdfWriter(out_pdf, hooks)
+        first.save(fp, format="PDF", save_all=True, append_images=rest, resolution=dpi)
+        fp.flush()
+    return out_pdf
 
 
 def _get_resample(fast: bool) -> int:
@@ -32,36 +100,133 @@ def _fit_to_width(img: Image.Image, target_w: int, *, fast: bool = False) -> Ima
     return img.resize((target_w, new_h), _get_resample(fast))
 
 
-def compute_two_column_layout(
-    *,
-    dpi: int,
-    margin: int,
-    gutter: int,
-    page_width: Optional[int] = None,
-    page_height: Optional[int] = None,
-) -> Tuple[int, int, int, int]:
-    """2단 레이아웃 메트릭 계산.
+def _decode(src: Union[str, BinaryIO]) -> Image.Image:
+    return Image.open(src).convert("RGB")
+
+
+@dataclass
+class _Part:
+    """칼럼 폭으로 맞춘 입력 한 장과 (겹침 검출용) 원본 해상도 행 서명."""
+
+    image: Image.Image
+    src_width: int
+    src_height: int
+    signature: Optional[np.ndarray] = None
+
+
+def _decode_and_fit(
+    src: Union[str, BinaryIO],
+    col_w: int,
+    fast: bool,
+    hooks: ConversionHooks = NO_HOOKS,
+    signature: bool = False,
+    cache: Optional[PartCache] = None,
+) -> _Part:
+    hooks.checkpoint()
+    if cache is not None:
+        # 캐시에서 읽는 것도 '칼럼 폭 이미지 만들기'로 본다(진행률이 입력 단위로 나아가도록)
+        with hooks.stage("resize"):
+            cached = cache.load(src, col_w, fast, signature)
+        if cached is not None:
+            fitted, (src_w, src_h), sig = cached
+            return _Part(fitted, src_w, src_h, sig)
+    with hooks.stage("decode"):
+        im = _decode(src)
+    sig = None
+    if signature:
+        from .stitch import row_signature
+
+        with hooks.stage("dedupe"):
+            sig = row_signature(im)
+    with hooks.stage("resize"):
+        scale = col_w / im.width
+        nh = max(1, int(round(im.height * scale)))
+        fitted = im.resize((col_w, nh), _get_resample(fast))
+    return _Part(fitted, im.width, im.height, sig)
 
-    반환: (page_w, page_h, col_w, usable_h)
-    """
-    if not page_width or not page_height:
-        page_w, page_h = _a4_page_size(dpi)
-    else:
-        page_w, page_h = page_width, page_height
 
-    # 세로 보장
-    if page_w > page_h:
-        page_w, page_h = page_h, page_w
+def _load_parts(
+    sources: List[Union[str, BinaryIO]],
+    col_w: int,
+    *,
+    fast: bool = False,
+    workers: int = 1,
+    hooks: ConversionHooks = NO_HOOKS,
+    signatures: bool = False,
+    cache: Optional[PartCache] = None,
+) -> List[_Part]:
+    """입력들을 디코드 후 칼럼 폭으로 리사이즈(cache에 있으면 그것을 읽는다). Pillow는
+    디코드/리사이즈 중 GIL을 놓으므로 스레드 풀로 병렬 처리하며, 결과는 입력 순서를 유지한다."""
+    workers = max(1, min(int(workers), len(sources)))
+    if workers == 1:
+        return [_decode_and_fit(src, col_w, fast, hooks, signatures, cache) for src in sources]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda src: _decode_and_fit(src, col_w, fast, hooks, signatures, cache), sources))
+
+
+def _load_resized(
+    sources: List[Union[str, BinaryIO]],
+    col_w: int,
+    *,
+    fast: bool = False,
+    workers: int = 1,
+    hooks: ConversionHooks = NO_HOOKS,
+) -> List[Image.Image]:
+    return [p.image for p in _load_parts(sources, col_w, fast=fast, workers=workers, hooks=hooks)]
+
 
-    usable_w = page_w - margin * 2
-    usable_h = page_h - margin * 2
-    col_w = max(1, int((usable_w - gutter) // 2))
-    return page_w, page_h, col_w, usable_h
+def _trim_repeats(
+    parts: List[_Part],
+    *,
+    strip_chrome: bool,
+    dedupe_overlap: bool,
+    hooks: ConversionHooks = NO_HOOKS,
+) -> List[Image.Image]:
+    """반복 UI 띠와 이웃 캡처 사이 겹친 띠를 잘라 낸 리사이즈 이미지 목록.
+
+    자를 위치는 원본 해상도 서명으로 찾고(리사이즈 후에는 스크롤 오프셋이 소수 픽셀이 되어
+    행이 정확히 일치하지 않음), 리사이즈 좌표로 옮겨 자른다.
+    반복 UI를 먼저 떼어 내야 겹침이 캡처 가장자리에 붙으므로 순서는 UI → 겹침.
+    """
+    from .stitch import plan_chrome_trims, plan_overlap_trims
+
+    hooks.checkpoint()
+    with hooks.stage("dedupe"):
+        sigs = [p.signature for p in parts]
+        widths = [p.src_width for p in parts]
+        keep = plan_chrome_trims(sigs, widths) if strip_chrome else None
+        if dedupe_overlap:
+            keep = plan_overlap_trims(sigs, widths, keep)
+        out: List[Image.Image] = []
+        for part, (top, bottom) in zip(parts, keep or []):
+            if top == 0 and bottom == part.src_height:
+                out.append(part.image)
+                continue
+            scale = part.image.height / part.src_height
+            t, b = int(round(top * scale)), int(round(bottom * scale))
+            if b > t:
+                out.append(part.image.crop((0, t, part.image.width, b)))
+    return out
+
+
+def _stack_vertically(parts: List[Image.Image], col_w: int) -> Image.Image:
+    """칼럼 폭으로 맞춘 조각들을 세로로 이어 붙인 합성 이미지."""
+    if len(parts) == 1:
+        return parts[0]
+    total_h = sum(im.height for im in parts)
+    src = Image.new("RGB", (col_w, total_h), (255, 255, 255))
+    y = 0
+    for im in parts:
+        src.paste(im, (0, y))
+        y += im.height
+    return src
 
 
 def build_pdf_two_columns(
-    image_paths: List[str],
-    out_pdf: str,
+    image_paths: List[ImageSource],
+    out_pdf: PdfTarget,
     *,
     margin: int = 60,
     gutter: int = 50,
@@ -69,7 +234,7 @@ def build_pdf_two_columns(
     page_width: Optional[int] = None,
     page_height: Optional[int] = None,
     fast: bool = False,
-) -> str:
+) -> PdfTarget:
     """세로(포트레이트) 페이지를 가로로 반 나눈 2단 레이아웃으로 PDF 생성.
 
     - 페이지 크기: 명시 없으면 A4 포트레이트(dpi 기준 픽셀)
@@ -157,19 +322,16 @@ def build_pdf_two_columns(
         flush_page()
 
     # PDF 저장 (Pillow 다중 페이지 PDF)
-    first, rest = pages[0], pages[1:]
-    os.makedirs(os.path.dirname(out_pdf) or ".", exist_ok=True)
-    first.save(out_pdf, save_all=True, append_images=rest, resolution=dpi)
-    return out_pdf
+    return _save_pdf(pages, out_pdf, dpi=dpi)
 
 
 def build_pdf_one_per_page(
-    image_paths: List[str],
-    out_pdf: str,
+    image_paths: List[ImageSource],
+    out_pdf: PdfTarget,
     *,
     margin: int = 60,
     dpi: int = 300,
-) -> str:
+) -> PdfTarget:
     """각 이미지를 한 페이지에 하나씩 배치하여 PDF 생성."""
     if not image_paths:
         raise ValueError("No images to build PDF.")
@@ -183,54 +345,43 @@ def build_pdf_one_per_page(
         page.paste(im, (margin, margin))
         pages.append(page)
 
-    first, rest = pages[0], pages[1:]
-    os.makedirs(os.path.dirname(out_pdf) or ".", exist_ok=True)
-    first.save(out_pdf, save_all=True, append_images=rest, resolution=dpi)
-    return out_pdf
+    return _save_pdf(pages, out_pdf, dpi=dpi)
 
 
-def build_pdf_two_columns_from_source(
-    input_path: str,
-    out_pdf: str,
+# ---------------------------------------------------------------------------
+# 버블 인지 스마트 컷 엔진 (from_source / from_sources 공용)
+#
+# 단계: decode → resize → features(행별 지표) → plan(컷 위치) → compose(페이지) → encode/write
+# ---------------------------------------------------------------------------
+
+# 이 비율보다 배경이 적으면(사진/스티커 가능성) 컷 회피
+PHOTO_GUARD_MIN = 0.35
+# 1~2순위 후보가 없을 때 확장 밴드 배율
+EXTEND_FACTOR = 3
+
+
+@dataclass
+class _RowFeatures:
+    """스마트 컷에 쓰는 행별 지표."""
+
+    row_bg_ratio: np.ndarray      # 행별 배경 비율
+    row_bg_run_ratio: np.ndarray  # 행별 '연속된 배경 구간' 최장 길이 비율
+    row_energy: np.ndarray        # 행별 에지 에너지(보조 지표)
+
+
+def _row_features(
+    src: Image.Image,
     *,
-    margin: int = 60,
-    gutter: int = 50,
-    dpi: int = 300,
-    page_width: Optional[int] = None,
-    page_height: Optional[int] = None,
-    fast: bool = False,
-    # 버블 컷 튜닝 파라미터(웹/CLI에서 노출 가능)
-    search_band: int = 60,
     bg_strip: int = 12,
     bg_thresh: int = 18,
-    bg_ratio_hi: float = 0.85,
-    bg_ratio_mid: float = 0.70,
-    min_height_ratio: float = 0.60,
     sample_stride: int = 4,
-) -> str:
-    """원본 긴 이미지를 바로 A4 세로 2단 페이지 단위로 잘라 PDF 생성.
+) -> _RowFeatures:
+    """스마트 컷 준비(버블 인지 우선, 에지 에너지 보조)
 
-    - 원본을 먼저 칼럼 폭(col_w)에 맞춰 리사이즈
-    - 이후 세로로 `usable_h`씩 연속 슬라이스 → [L1,R1], [L2,R2], ... 순으로 페이지 구성
-    - 마지막 조각은 남은 만큼만 잘리므로 마지막 페이지의 일부 공백은 자연스럽게 발생할 수 있음
+    1) 배경 추정: 좌/우 가장자리 샘플의 중앙값을 배경으로 간주
+    2) 행별 배경 비율(row_bg_ratio) 계산(가로 샘플링으로 경량화)
+    3) 행별 에지 에너지(row_energy) 계산(보조 지표)
     """
-    page_w, page_h, col_w, usable_h = compute_two_column_layout(
-        dpi=dpi, margin=margin, gutter=gutter,
-        page_width=page_width, page_height=page_height,
-    )
-
-    src = Image.open(input_path).convert("RGB")
-    # 가로 기준 칼럼 폭으로 리사이즈(업스케일/다운스케일 모두 허용)
-    scale = col_w / src.width
-    new_h = max(1, int(round(src.height * scale)))
-    src = src.resize((col_w, new_h), _get_resample(fast))
-    _, H = src.size
-
-    # 스마트 컷 준비(버블 인지 우선, 에지 에너지 보조)
-    # 1) 배경 추정: 좌/우 가장자리 샘플의 중앙값을 배경으로 간주
-    # 2) 행별 배경 비율(row_bg_ratio) 계산(가로 1/4 샘플링으로 경량화)
-    # 3) 행별 에지 에너지(row_energy) 계산(보조 지표)
-    # 컷은 우선적으로 높은 배경 비율(버블 사이 공백)을 선택, 없으면 에너지 최소 행을 사용
     src_gray_full = np.array(src.convert("L"))
     # 배경 추정: 좌/우 스트립에서 샘플
     strip = max(2, int(bg_strip))
@@ -241,7 +392,7 @@ def build_pdf_two_columns_from_source(
     # 배경 판정 임계값(명암 무관하게 완화)
     BG_THRESH = max(1, int(bg_thresh))  # ±n 정도까지 배경으로 간주
 
-    # 수평 1/4 샘플링으로 배경 비율 계산(연산량 절감)
+    # 수평 샘플링으로 배경 비율 계산(연산량 절감)
     stride = max(1, int(sample_stride))
     sub = src_gray_full[:, ::stride]
     # 중앙부의 큰 사진/스티커 영향 완화를 위해: 좌/우 25% 영역만 사용
@@ -277,10 +428,54 @@ def build_pdf_two_columns_from_source(
     rx = row_energy_x / (row_energy_x.max() + 1e-8)
     ry = row_energy_y / (row_energy_y.max() + 1e-8)
     row_energy = 0.5 * rx + 0.5 * ry
+    return _RowFeatures(row_bg_ratio, row_bg_run_ratio, row_energy)
+
+
+def _plan_cuts(
+    feats: _RowFeatures,
+    H: int,
+    usable_h: int,
+    *,
+    search_band: int = 60,
+    bg_ratio_hi: float = 0.85,
+    bg_ratio_mid: float = 0.70,
+    min_height_ratio: float = 0.60,
+) -> List[int]:
+    """칼럼 높이(usable_h)마다 컷 위치를 정해 조각 경계 목록 [y1, y2, ..., H]을 반환.
 
+    컷은 우선적으로 높은 배경 비율(버블 사이 공백)을 선택, 없으면 에너지 최소 행을 사용.
+    """
+    row_bg_ratio = feats.row_bg_ratio
+    row_bg_run_ratio = feats.row_bg_run_ratio
+    row_energy = feats.row_energy
     SEARCH_BAND = max(10, int(search_band))  # 버블 경계 탐색 폭
-    EXTEND_FACTOR = 3
-    PHOTO_GUARD_MIN = 0.35  # 이 비율보다 배경이 적으면(사진/스티커 가능성) 컷 회피
+
+    def try_band(lo: int, hi: int) -> int | None:
+        band_bg = row_bg_ratio[lo : hi + 1]
+        band_run = row_bg_run_ratio[lo : hi + 1]
+
+        # 1순위: 배경 비율 높고(>=hi), 연속 배경구간도 충분(>=0.8)
+        cand_mask = (band_bg >= float(bg_ratio_hi)) & (band_run >= 0.8)
+        if cand_mask.any():
+            idxs = np.where(cand_mask)[0]
+            end = int(idxs[-1])
+            start = end
+            while start - 1 >= 0 and cand_mask[start - 1]:
+                start -= 1
+            mid = (start + end) // 2
+            return lo + int(mid)
+
+        # 2순위: 배경 비율 중간(>=mid) + 연속 배경구간 완화(>=0.6)
+        cand_mask = (band_bg >= float(bg_ratio_mid)) & (band_run >= 0.6)
+        if cand_mask.any():
+            idxs = np.where(cand_mask)[0]
+            end = int(idxs[-1])
+            start = end
+            while start - 1 >= 0 and cand_mask[start - 1]:
+                start -= 1
+            mid = (start + end) // 2
+            return lo + int(mid)
+        return None
 
     def smart_cut(y_start: int, y_end: int) -> int:
         """y_end 바로 위쪽 밴드에서 '버블 사이 공백'을 우선 선택.
@@ -291,33 +486,6 @@ def build_pdf_two_columns_from_source(
         """
         if y_end >= H:
             return min(y_end, H)
-        def try_band(lo: int, hi: int) -> int | None:
-            band_bg = row_bg_ratio[lo : hi + 1]
-            band_run = row_bg_run_ratio[lo : hi + 1]
-
-            # 1순위: 배경 비율 높고(>=hi), 연속 배경구간도 충분(>=0.8)
-            cand_mask = (band_bg >= float(bg_ratio_hi)) & (band_run >= 0.8)
-            if cand_mask.any():
-                idxs = np.where(cand_mask)[0]
-                end = int(idxs[-1])
-                start = end
-                while start - 1 >= 0 and cand_mask[start - 1]:
-                    start -= 1
-                mid = (start + end) // 2
-                return lo + int(mid)
-
-            # 2순위: 배경 비율 중간(>=mid) + 연속 배경구간 완화(>=0.6)
-            cand_mask = (band_bg >= float(bg_ratio_mid)) & (band_run >= 0.6)
-            if cand_mask.any():
-                idxs = np.where(cand_mask)[0]
-                end = int(idxs[-1])
-                start = end
-                while start - 1 >= 0 and cand_mask[start - 1]:
-                    start -= 1
-                mid = (start + end) // 2
-                return lo + int(mid)
-            return None
-
         lo = max(0, y_end - SEARCH_BAND)
         hi = min(H - 1, y_end)
         # 최소 높이 가드(현재 조각 높이의 일정 비율 이상 확보)
@@ -359,16 +527,36 @@ def build_pdf_two_columns_from_source(
                 return max(y_start + 1, down)
         return max(y_start + 1, cut - 2)
 
-    # 스트리밍 조립: 메모리 고정 사용량, 불필요한 리스트 생성 없음
-    pages: List[Image.Image] = []
-    page = Image.new("RGB", (page_w, page_h), (255, 255, 255))
-    left_slot = True
-
+    cuts: List[int] = []
     y = 0
     while y < H:
         y2 = min(y + usable_h, H)
         # 마지막 조각이 아닌 경우만 스마트 컷 적용
         y_cut = smart_cut(y, y2) if y2 < H else y2
+        cuts.append(y_cut)
+        y = y_cut
+    return cuts
+
+
+def _compose_pages(
+    src: Image.Image,
+    cuts: List[int],
+    *,
+    page_w: int,
+    page_h: int,
+    col_w: int,
+    margin: int,
+    gutter: int,
+    hooks: ConversionHooks = NO_HOOKS,
+) -> List[Image.Image]:
+    """컷 경계대로 조각을 잘라 [L1,R1], [L2,R2], ... 순으로 페이지 구성."""
+    pages: List[Image.Image] = []
+    page = Image.new("RGB", (page_w, page_h), (255, 255, 255))
+    left_slot = True
+
+    y = 0
+    for y_cut in cuts:
+        hooks.checkpoint()
         crop = src.crop((0, y, col_w, y_cut))
         if left_slot:
             page.paste(crop, (margin, margin))
@@ -376,6 +564,7 @@ def build_pdf_two_columns_from_source(
         else:
             page.paste(crop, (margin + col_w + gutter, margin))
             pages.append(page)
+            hooks.on_page(len(pages) - 1, page)
             page = Image.new("RGB", (page_w, page_h), (255, 255, 255))
             left_slot = True
         y = y_cut
@@ -383,17 +572,118 @@ def build_pdf_two_columns_from_source(
     # 마지막 홀수 조각 처리(왼쪽만 채워진 경우)
     if not left_slot:
         pages.append(page)
+        hooks.on_page(len(pages) - 1, page)
+    return pages
 
-    # 저장
-    first, rest = pages[0], pages[1:] if len(pages) > 1 else []
-    os.makedirs(os.path.dirname(out_pdf) or ".", exist_ok=True)
-    first.save(out_pdf, save_all=True, append_images=rest, resolution=dpi)
-    return out_pdf
+
+def _build_from_resized(
+    resized: List[Image.Image],
+    out_pdf: PdfTarget,
+    *,
+    margin: int,
+    gutter: int,
+    dpi: int,
+    page_w: int,
+    page_h: int,
+    col_w: int,
+    usable_h: int,
+    search_band: int,
+    bg_strip: int,
+    bg_thresh: int,
+    bg_ratio_hi: float,
+    bg_ratio_mid: float,
+    min_height_ratio: float,
+    sample_stride: int,
+    auto_tune: bool,
+    cpu_budget_ms: Optional[float],
+    hooks: ConversionHooks,
+) -> PdfTarget:
+    """칼럼 폭으로 맞춘 이미지들 → 스마트 컷 → 페이지 → PDF."""
+    hooks.checkpoint()
+    with hooks.stage("resize"):
+        src = _stack_vertically(resized, col_w)
+    if auto_tune:
+        from .autotune import autotune_smart_cut
+
+        tuned = autotune_smart_cut(col_w, src.height, cpu_budget_ms=cpu_budget_ms)
+        search_band = tuned["search_band"]
+        bg_strip = tuned["bg_strip"]
+        sample_stride = tuned["sample_stride"]
+    hooks.checkpoint()
+    with hooks.stage("features"):
+        feats = _row_features(src, bg_strip=bg_strip, bg_thresh=bg_thresh, sample_stride=sample_stride)
+    hooks.checkpoint()
+    with hooks.stage("plan"):
+        cuts = _plan_cuts(
+            feats, src.height, usable_h,
+            search_band=search_band,
+            bg_ratio_hi=bg_ratio_hi,
+            bg_ratio_mid=bg_ratio_mid,
+            min_height_ratio=min_height_ratio,
+        )
+    with hooks.stage("compose"):
+        pages = _compose_pages(
+            src, cuts, page_w=page_w, page_h=page_h, col_w=col_w, margin=margin, gutter=gutter,
+            hooks=hooks,
+        )
+    hooks.checkpoint()
+    return _save_pdf(pages, out_pdf, dpi=dpi, hooks=hooks)
+
+
+def build_pdf_two_columns_from_source(
+    input_path: Union[str, BinaryIO],
+    out_pdf: PdfTarget,
+    *,
+    margin: int = 60,
+    gutter: int = 50,
+    dpi: int = 300,
+    page_width: Optional[int] = None,
+    page_height: Optional[int] = None,
+    fast: bool = False,
+    # 버블 컷 튜닝 파라미터(웹/CLI에서 노출 가능)
+    search_band: int = 60,
+    bg_strip: int = 12,
+    bg_thresh: int = 18,
+    bg_ratio_hi: float = 0.85,
+    bg_ratio_mid: float = 0.70,
+    min_height_ratio: float = 0.60,
+    sample_stride: int = 4,
+    auto_tune: bool = False,
+    cpu_budget_ms: Optional[float] = None,
+    hooks: Optional[ConversionHooks] = None,
+) -> PdfTarget:
+    """원본 긴 이미지를 바로 A4 세로 2단 페이지 단위로 잘라 PDF 생성.
+
+    - 원본을 먼저 칼럼 폭(col_w)에 맞춰 리사이즈
+    - 이후 세로로 `usable_h`씩 연속 슬라이스 → [L1,R1], [L2,R2], ... 순으로 페이지 구성
+    - 마지막 조각은 남은 만큼만 잘리므로 마지막 페이지의 일부 공백은 자연스럽게 발생할 수 있음
+    - auto_tune=True면 search_band/bg_strip/sample_stride를 크기와 CPU 예산(cpu_budget_ms)으로 자동 결정
+    """
+    return build_pdf_two_columns_from_sources(
+        [input_path],
+        out_pdf,
+        margin=margin,
+        gutter=gutter,
+        dpi=dpi,
+        page_width=page_width,
+        page_height=page_height,
+        fast=fast,
+        search_band=search_band,
+        bg_strip=bg_strip,
+        bg_thresh=bg_thresh,
+        bg_ratio_hi=bg_ratio_hi,
+        bg_ratio_mid=bg_ratio_mid,
+        min_height_ratio=min_height_ratio,
+        sample_stride=sample_stride,
+        auto_tune=auto_tune,
+        cpu_budget_ms=cpu_budget_ms,
+        hooks=hooks,
+    )
 
 
 def build_pdf_two_columns_from_sources(
-    image_paths: List[str],
-    out_pdf: str,
+    image_paths: List[Union[str, BinaryIO]],
+    out_pdf: PdfTarget,
     *,
     margin: int = 60,
     gutter: int = 50,
@@ -409,169 +699,96 @@ def build_pdf_two_columns_from_sources(
     bg_ratio_mid: float = 0.70,
     min_height_ratio: float = 0.60,
     sample_stride: int = 4,
-) -> str:
+    workers: int = 1,
+    auto_tune: bool = False,
+    cpu_budget_ms: Optional[float] = None,
+    dedupe_overlap: bool = False,
+    strip_chrome: bool = False,
+    hooks: Optional[ConversionHooks] = None,
+    part_cache: Optional[PartCache] = None,
+) -> PdfTarget:
     """여러 장의 긴 스크린샷을 세로로 이어 붙여 한 장처럼 처리하여
     A4 세로 2단 PDF를 생성한다.
 
     - 각 이미지는 먼저 칼럼 폭(col_w)에 맞춰 리사이즈 후 세로로 연결
+      (workers > 1이면 디코드/리사이즈를 스레드로 병렬 처리)
     - 이후 from_source와 동일한 스마트 컷 알고리즘으로 페이지 조각 생성
+    - dedupe_overlap=True면 이웃 캡처 사이 겹친 메시지 띠를 찾아 한 번만 남긴다
+    - strip_chrome=True면 모든 캡처에 반복되는 상단바/입력창 띠를 첫 장 상단, 마지막 장 하단에만 남긴다
+    - auto_tune=True면 스마트 컷 샘플링/밴드 크기를 합성 이미지 크기와 CPU 예산으로 자동 결정
+    - hooks를 넘기면 단계별(decode/resize/dedupe/features/plan/compose/encode/write) 훅 호출,
+      페이지 배치가 끝날 때마다 hooks.on_page(번호, 페이지),
+      hooks.checkpoint()가 ConversionCancelled를 던지면 다음 단계/입력/페이지로 넘어가기 전에 멈춘다
+    - part_cache에 (prepare_sources로) 미리 만든 입력은 디코드/리사이즈 없이 읽는다
     """
     if not image_paths:
         raise ValueError("No images to build PDF.")
+    hooks = hooks or NO_HOOKS
 
     page_w, page_h, col_w, usable_h = compute_two_column_layout(
         dpi=dpi, margin=margin, gutter=gutter,
         page_width=page_width, page_height=page_height,
     )
 
-    # 칼럼 폭으로 리사이즈하며 총 높이 계산
-    resized: List[Image.Image] = []
-    total_h = 0
-    for p in image_paths:
-        im = Image.open(p).convert("RGB")
-        scale = col_w / im.width
-        nh = max(1, int(round(im.height * scale)))
-        rim = im.resize((col_w, nh), _get_resample(fast))
-        resized.append(rim)
-        total_h += nh
-
-    # 세로로 이어 붙인 합성 이미지 구성
-    src = Image.new("RGB", (col_w, total_h), (255, 255, 255))
-    y = 0
-    for rim in resized:
-        src.paste(rim, (0, y))
-        y += rim.height
-
-    # from_source 내부와 동일 로직 재사용을 위해 임시 파일 없이 직접 처리
-    # 아래는 build_pdf_two_columns_from_source를 거의 그대로 복사하여 적용
-
-    src_gray_full = np.array(src.convert("L"))
-
-    strip = max(2, int(bg_strip))
-    left_strip = src_gray_full[:, :strip].reshape(-1)
-    right_strip = src_gray_full[:, -strip:].reshape(-1)
-    bg_samples = np.concatenate([left_strip, right_strip])
-    bg_value = int(np.median(bg_samples))
-    BG_THRESH = max(1, int(bg_thresh))
-
-    stride = max(1, int(sample_stride))
-    sub = src_gray_full[:, ::stride]
-    w_sub = sub.shape[1]
-    q = max(1, w_sub // 4)
-    sub_lr = np.concatenate([sub[:, :q], sub[:, -q:]], axis=1)
-    row_bg_mask = (np.abs(sub_lr - bg_value) <= BG_THRESH)
-    row_bg_ratio = row_bg_mask.mean(axis=1)
-
-    def _longest_run_len(mask_row: np.ndarray) -> int:
-        m = 0
-        c = 0
-        for v in mask_row:
-            if v:
-                c += 1
-                if c > m:
-                    m = c
-            else:
-                c = 0
-        return m
-
-    H_rows = row_bg_mask.shape[0]
-    W_sub = row_bg_mask.shape[1]
-    row_bg_run_ratio = np.empty(H_rows, dtype=np.float32)
-    for i in range(H_rows):
-        row_bg_run_ratio[i] = _longest_run_len(row_bg_mask[i]) / max(1, W_sub)
-
-    row_energy_x = np.abs(np.diff(src_gray_full, axis=1)).sum(axis=1)
-    dy = np.abs(np.diff(src_gray_full, axis=0))
-    row_energy_y = np.vstack([dy[0:1, :], dy]).sum(axis=1)
-    rx = row_energy_x / (row_energy_x.max() + 1e-8)
-    ry = row_energy_y / (row_energy_y.max() + 1e-8)
-    row_energy = 0.5 * rx + 0.5 * ry
-
-    SEARCH_BAND = max(10, int(search_band))
-    EXTEND_FACTOR = 3
-    PHOTO_GUARD_MIN = 0.35
-
-    def smart_cut(y_start: int, y_end: int) -> int:
-        H = src.height
-        if y_end >= H:
-            return min(y_end, H)
-        lo = max(0, y_end - SEARCH_BAND)
-        hi = min(H - 1, y_end)
-
-        def try_band(lo_: int, hi_: int) -> int | None:
-            band_bg = row_bg_ratio[lo_ : hi_ + 1]
-            band_run = row_bg_run_ratio[lo_ : hi_ + 1]
-            cand_mask = (band_bg >= float(bg_ratio_hi)) & (band_run >= 0.8)
-            if cand_mask.any():
-                idxs = np.where(cand_mask)[0]
-                end = int(idxs[-1])
-                start = end
-                while start - 1 >= 0 and cand_mask[start - 1]:
-                    start -= 1
-                mid = (start + end) // 2
-                return lo_ + int(mid)
-            cand_mask = (band_bg >= float(bg_ratio_mid)) & (band_run >= 0.6)
-            if cand_mask.any():
-                idxs = np.where(cand_mask)[0]
-                end = int(idxs[-1])
-                start = end
-                while start - 1 >= 0 and cand_mask[start - 1]:
-                    start -= 1
-                mid = (start + end) // 2
-                return lo_ + int(mid)
-            return None
-
-        cut = try_band(lo, hi)
-        if cut is not None:
-            return cut
-        ext = SEARCH_BAND * EXTEND_FACTOR
-        lo2 = max(0, y_end - ext)
-        hi2 = min(src.height - 1, y_end + ext // 3)
-        cut = try_band(lo2, hi2)
-        if cut is not None:
-            return cut
-
-        band_energy = row_energy[lo : hi + 1]
-        idx = int(np.argmin(band_energy))
-        cut = lo + idx
-        if row_bg_ratio[cut] < PHOTO_GUARD_MIN:
-            up = cut
-            while up > y_start and row_bg_ratio[up] < PHOTO_GUARD_MIN:
-                up -= 1
-            if row_bg_ratio[up] >= PHOTO_GUARD_MIN:
-                return max(y_start + 1, up)
-            down = cut
-            lim = min(src.height - 1, cut + SEARCH_BAND)
-            while down < lim and row_bg_ratio[down] < PHOTO_GUARD_MIN:
-                down += 1
-            if row_bg_ratio[down] >= PHOTO_GUARD_MIN:
-                return max(y_start + 1, down)
-        return max(y_start + 1, cut - 2)
+    # 칼럼 폭으로 리사이즈(디코드/리사이즈는 병렬, 순서는 유지)
+    trim = (dedupe_overlap or strip_chrome) and len(image_paths) > 1
+    parts = _load_parts(image_paths, col_w, fast=fast, workers=workers, hooks=hooks, signatures=trim,
+                        cache=part_cache)
+    if trim:
+        resized = _trim_repeats(parts, strip_chrome=strip_chrome, dedupe_overlap=dedupe_overlap, hooks=hooks)
+    else:
+        resized = [p.image for p in parts]
+    return _build_from_resized(
+        resized,
+        out_pdf,
+        margin=margin,
+        gutter=gutter,
+        dpi=dpi,
+        page_w=page_w,
+        page_h=page_h,
+        col_w=col_w,
+        usable_h=usable_h,
+        search_band=search_band,
+        bg_strip=bg_strip,
+        bg_thresh=bg_thresh,
+        bg_ratio_hi=bg_ratio_hi,
+        bg_ratio_mid=bg_ratio_mid,
+        min_height_ratio=min_height_ratio,
+        sample_stride=sample_stride,
+        auto_tune=auto_tune,
+        cpu_budget_ms=cpu_budget_ms,
+        hooks=hooks,
+    )
 
-    pages: List[Image.Image] = []
-    page = Image.new("RGB", (page_w, page_h), (255, 255, 255))
-    left_slot = True
 
-    y = 0
-    H = src.height
-    while y < H:
-        y2 = min(y + usable_h, H)
-        y_cut = smart_cut(y, y2) if y2 < H else y2
-        crop = src.crop((0, y, col_w, y_cut))
-        if left_slot:
-            page.paste(crop, (margin, margin))
-            left_slot = False
-        else:
-            page.paste(crop, (margin + col_w + gutter, margin))
-            pages.append(page)
-            page = Image.new("RGB", (page_w, page_h), (255, 255, 255))
-            left_slot = True
-        y = y_cut
-
-    if not left_slot:
-        pages.append(page)
+def prepare_sources(
+    image_paths: List[str],
+    part_cache: PartCache,
+    *,
+    margin: int = 60,
+    gutter: int = 50,
+    dpi: int = 300,
+    page_width: Optional[int] = None,
+    page_height: Optional[int] = None,
+    fast: bool = False,
+    signatures: bool = True,
+    hooks: Optional[ConversionHooks] = None,
+) -> int:
+    """변환에 앞서 입력들의 디코드/칼럼 폭 리사이즈(+행 서명)를 part_cache에 채워 둔다.
 
-    first, rest = pages[0], pages[1:] if len(pages) > 1 else []
-    os.makedirs(os.path.dirname(out_pdf) or ".", exist_ok=True)
-    first.save(out_pdf, save_all=True, append_images=rest, resolution=dpi)
-    return out_pdf
+    레이아웃 인자는 build_pdf_two_columns_from_sources와 같아야 캐시가 맞는다(칼럼 폭이 키에 들어감).
+    이미 캐시에 있는 입력은 건너뛰고, 새로 만든 수를 반환한다.
+    """
+    hooks = hooks or NO_HOOKS
+    _, _, col_w, _ = compute_two_column_layout(
+        dpi=dpi, margin=margin, gutter=gutter,
+        page_width=page_width, page_height=page_height,
+    )
+    made = 0
+    for src in image_paths:
+        if part_cache.has(src, col_w, fast, signatures):
+            continue
+        part = _decode_and_fit(src, col_w, fast, hooks, signatures)
+        part_cache.store(src, col_w, fast, part.image, (part.src_width, part.src_height), part.signature)
+        made += 1
+    return made
@@ -31,26 +31,18 @@ def _smart_cut_yband(img_gray: np.ndarray, y_start: int, y_end: int, search_band
     return y_cut
 
 
-def split_image(
-    input_path: str,
-    outdir: str = "out",
+def split_image_parts(
+    img: Image.Image,
     column_width: int = 1000,
     column_height: int = 1400,
     overlap: int = 40,
     smart_cut: bool = True,
     smart_band: int = 60,
-) -> list[str]:
+) -> List[Image.Image]:
     """
-    긴 세로 이미지를 '한 칼럼 폭/높이' 기준으로 자동 분할하여 PNG로 저장, 경로 리스트 반환.
-    - column_width: 칼럼 폭(px) 기준으로 리사이즈 후 분할
-    - column_height: 한 조각의 목표 세로(px)
-    - overlap: 조각 간 겹침(px) (문맥 이어짐용)
-    - smart_cut: 경계 근처에서 줄 중간이 덜 잘리는 지점 탐색
+    split_image의 메모리 버전: 파일로 저장하지 않고 조각 이미지 리스트를 반환.
+    (stdin/stdout 파이프라인처럼 파일시스템을 쓰지 않는 경우용)
     """
-    ensure_dir(outdir)
-    base = os.path.splitext(os.path.basename(input_path))[0]
-
-    img = open_rgb(input_path)
     w, h = img.size
 
     # 가로 기준 스케일 → column_width에 맞춤
@@ -77,6 +69,35 @@ def split_image(
         y = nxt if nxt > y else y_cut
         if y >= h:
             break
+    return parts
+
+
+def split_image(
+    input_path: str,
+    outdir: str = "out",
+    column_width: int = 1000,
+    column_height: int = 1400,
+    overlap: int = 40,
+    smart_cut: bool = True,
+    smart_band: int = 60,
+) -> list[str]:
+    """
+    긴 세로 이미지를 '한 칼럼 폭/높이' 기준으로 자동 분할하여 PNG로 저장, 경로 리스트 반환.
+    - column_width: 칼럼 폭(px) 기준으로 리사이즈 후 분할
+    - column_height: 한 조각의 목표 세로(px)
+    - overlap: 조각 간 겹침(px) (문맥 이어짐용)
+    - smart_cut: 경계 근처에서 줄 중간이 덜 잘리는 지점 탐색
+    """
+    ensure_dir(outdir)
+    base = os.path.splitext(os.path.basename(input_path))[0]
 
+    parts = split_image_parts(
+        open_rgb(input_path),
+        column_width=column_width,
+        column_height=column_height,
+        overlap=overlap,
+        smart_cut=smart_cut,
+        smart_band=smart_band,
+    )
     saved = save_images(parts, outdir, base, ext=".png")
-    return saved
\ No newline at end of file
+    return saved
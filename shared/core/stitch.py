@@ -0,0 +1,221 @@
+"""
+다중 스크린샷 이어 붙이기 전처리: 반복 UI(상단바/입력창) 제거, 연속 캡처 사이 겹침 제거
+
+폰 캡처를 여러 장 이어 붙이면 모든 캡처에 같은 상태바/대화방 헤더/입력창이 들어 있고,
+이웃한 캡처끼리 메시지 몇 개가 겹친다. 각 입력의 행 서명(row signature: 가로 블록 평균)을
+원본 해상도에서 구해
+- 모든 입력에서 (거의) 같은 위/아래 띠를 찾아 첫 장의 상단, 마지막 장의 하단에만 남기고
+- 이웃 캡처 사이의 겹침 구간을 찾아 겹친 띠를 잘라 낸 뒤 이어 붙인다.
+"""
+
+from __future__ import annotations
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 행 서명: 가로를 이 개수의 블록으로 나눠 블록별 평균 밝기
+SIGNATURE_BLOCKS = 32
+# 같은 행으로 볼 블록 평균 차 허용치(JPEG 재압축 잡음 흡수)
+ROW_MATCH_TOL = 6.0
+# '배경만 있는 행'이 아닌, 위치를 특정할 수 있는 행의 블록 간 밝기 범위 기준
+DISTINCT_RANGE = 12.0
+# 겹침으로 인정할 최소 연속 행 수(원본 높이 대비 비율과 절대값 중 큰 값)
+MIN_OVERLAP_RATIO = 0.03
+MIN_OVERLAP_ROWS = 48
+# 겹침 구간 안에 있어야 하는 최소 '특정 가능한 행' 수
+MIN_DISTINCT_ROWS = 12
+# 겹침 구간 안에서 허용하는 연속 불일치 행 수(잡음, 작은 오버레이)
+MAX_GAP_ROWS = 3
+# 다음 캡처의 위쪽 이 비율 안에서만 겹침 기준 행(anchor)을 고른다
+ANCHOR_SPAN = 0.6
+MAX_ANCHORS = 64
+# 겹침은 B의 위쪽/A의 아래쪽 가장자리에서 이 비율 안에 붙어 있어야 한다
+# (가장자리와의 틈은 상단바/입력창 정도만 허용, 본문 중간의 반복 패턴 오검출 방지)
+EDGE_SPAN = 0.25
+
+# 반복 UI 띠: 블록 중 이 비율 이상이 일치하면 같은 행(시계/배터리처럼 일부만 바뀌는 부분 허용)
+CHROME_BLOCK_AGREEMENT = 0.9
+# 반복 UI 띠 안에서 허용하는 연속 불일치 행 수(알림 아이콘 등)
+CHROME_MAX_GAP_ROWS = 8
+# 반복 UI 띠는 입력 높이의 이 비율을 넘지 않는다
+CHROME_MAX_RATIO = 0.2
+# 띠 안에 있어야 하는 최소 '특정 가능한 행' 수(배경만 같은 경우는 UI가 아님)
+CHROME_MIN_DISTINCT_ROWS = 4
+
+
+def row_signature(img: Image.Image, blocks: int = SIGNATURE_BLOCKS) -> np.ndarray:
+    """행마다 가로 블록 평균 밝기 (H, blocks) float32."""
+    gray = np.asarray(img.convert("L"), dtype=np.float32)
+    h, w = gray.shape
+    blocks = max(1, min(blocks, w))
+    usable = (w // blocks) * blocks
+    return gray[:, :usable].reshape(h, blocks, usable // blocks).mean(axis=2)
+
+
+def _distinct_rows(sig: np.ndarray) -> np.ndarray:
+    return (sig.max(axis=1) - sig.min(axis=1)) >= DISTINCT_RANGE
+
+
+def _longest_match_run(match: np.ndarray) -> Tuple[int, int]:
+    """불일치가 MAX_GAP_ROWS 이하로 끊기는 것은 이어진 것으로 보고 가장 긴 일치 구간 [s, e)."""
+    best = (0, 0)
+    start = -1
+    last_ok = -1
+    for j, ok in enumerate(match):
+        if ok:
+            if start < 0 or j - last_ok - 1 > MAX_GAP_ROWS:
+                start = j
+            last_ok = j
+            if last_ok + 1 - start > best[1] - best[0]:
+                best = (start, last_ok + 1)
+    return best
+
+
+@dataclass
+class Overlap:
+    """이웃 캡처 A, B 사이 겹침. A의 [a_start, a_end)와 B의 [b_start, b_end)가 같은 내용."""
+
+    a_start: int
+    a_end: int
+    b_start: int
+    b_end: int
+
+    @property
+    def rows(self) -> int:
+        return self.b_end - self.b_start
+
+
+def find_overlap(sig_a: np.ndarray, sig_b: np.ndarray) -> Optional[Overlap]:
+    """A의 아래쪽과 B의 위쪽에서 같은 내용이 반복되는 구간을 찾는다. 없으면 None."""
+    ha, hb = sig_a.shape[0], sig_b.shape[0]
+    if sig_a.shape[1] != sig_b.shape[1] or ha == 0 or hb == 0:
+        return None
+    distinct_b = _distinct_rows(sig_b)
+    span = max(1, int(hb * ANCHOR_SPAN))
+    anchors = np.nonzero(distinct_b[:span])[0]
+    if anchors.size == 0:
+        return None
+    if anchors.size > MAX_ANCHORS:
+        anchors = anchors[np.linspace(0, anchors.size - 1, MAX_ANCHORS).astype(int)]
+
+    # 1) 투표: 기준 행마다 A에서 같은 행을 찾아 오프셋(d = i - j) 후보에 표를 준다
+    offsets = []
+    for j in anchors:
+        diff = np.abs(sig_a - sig_b[j]).max(axis=1)
+        offsets.append(np.nonzero(diff <= ROW_MATCH_TOL)[0] - int(j))
+    all_offsets = np.concatenate(offsets)
+    if all_offsets.size == 0:
+        return None
+    cand_d, counts = np.unique(all_offsets, return_counts=True)
+    top = cand_d[np.argsort(counts, kind="stable")[::-1][:8]]
+
+    # 2) 상위 후보 오프셋을 대각선 방향 연속 일치 구간으로 검증
+    min_rows = max(MIN_OVERLAP_ROWS, int(min(ha, hb) * MIN_OVERLAP_RATIO))
+    best: Optional[Overlap] = None
+    for d in top.tolist():
+        j_lo, j_hi = max(0, -d), min(hb, ha - d)
+        if j_hi - j_lo < min_rows:
+            continue
+        rows_b = sig_b[j_lo:j_hi]
+        rows_a = sig_a[j_lo + d:j_hi + d]
+        match = np.abs(rows_a - rows_b).max(axis=1) <= ROW_MATCH_TOL
+        s, e = _longest_match_run(match)
+        if e - s < min_rows or int(distinct_b[j_lo + s:j_lo + e].sum()) < MIN_DISTINCT_ROWS:
+            continue
+        cand = Overlap(j_lo + s + d, j_lo + e + d, j_lo + s, j_lo + e)
+        if cand.b_start > hb * EDGE_SPAN or ha - cand.a_end > ha * EDGE_SPAN:
+            continue
+        if best is None or cand.rows > best.rows:
+            best = cand
+    return best
+
+
+def _chrome_band(stack: np.ndarray) -> int:
+    """(N, rows, blocks) 서명 더미에서 모든 입력이 일치하는 앞쪽 띠의 행 수."""
+    ref = stack[0]
+    agree = (np.abs(stack - ref) <= ROW_MATCH_TOL).all(axis=0).mean(axis=1) >= CHROME_BLOCK_AGREEMENT
+    band = 0
+    for r, ok in enumerate(agree):
+        if ok:
+            band = r + 1
+        elif r - band >= CHROME_MAX_GAP_ROWS:
+            break
+    if int(_distinct_rows(ref[:band]).sum()) < CHROME_MIN_DISTINCT_ROWS:
+        return 0
+    return band
+
+
+def detect_chrome(
+    signatures: List[Optional[np.ndarray]],
+    widths: Optional[List[int]] = None,
+) -> Tuple[int, int]:
+    """모든 입력에 공통인 상단/하단 UI 띠 높이(원본 행 수) (header, footer).
+
+    입력이 두 장 미만이거나 원본 폭이 서로 다르면(다른 기기/배율) (0, 0).
+    """
+    if len(signatures) < 2 or any(sig is None for sig in signatures):
+        return 0, 0
+    if widths is not None and len(set(widths)) > 1:
+        return 0, 0
+    span = int(min(sig.shape[0] for sig in signatures) * CHROME_MAX_RATIO)
+    if span <= 0:
+        return 0, 0
+    header = _chrome_band(np.stack([sig[:span] for sig in signatures]))
+    footer = _chrome_band(np.stack([sig[::-1][:span] for sig in signatures]))
+    return header, footer
+
+
+def plan_chrome_trims(
+    signatures: List[Optional[np.ndarray]],
+    widths: Optional[List[int]] = None,
+) -> List[Tuple[int, int]]:
+    """반복 UI 띠를 첫 장의 상단, 마지막 장의 하단에만 남기는 행 범위 [top, bottom)."""
+    keep = [(0, 0 if sig is None else sig.shape[0]) for sig in signatures]
+    header, footer = detect_chrome(signatures, widths)
+    if header or footer:
+        last = len(keep) - 1
+        keep = [
+            (header if k > 0 else top, bottom - footer if k < last else bottom)
+            for k, (top, bottom) in enumerate(keep)
+        ]
+        logger.info("chrome: header %d rows, footer %d rows", header, footer)
+    return keep
+
+
+def plan_overlap_trims(
+    signatures: List[Optional[np.ndarray]],
+    widths: Optional[List[int]] = None,
+    keep: Optional[List[Tuple[int, int]]] = None,
+) -> List[Tuple[int, int]]:
+    """입력별로 남길 행 범위 [top, bottom)을 원본 좌표로 반환.
+
+    이웃 쌍(A, B)에서 겹침이 발견되면 A는 겹침 끝까지만, B는 겹침 끝 다음부터 남긴다.
+    (겹침 아래 A의 나머지와 겹침 위 B의 나머지는 각각 입력창/상단바 등 중복 영역)
+    원본 폭이 다른 쌍은 배율이 달라 행이 일치하지 않으므로 건너뛴다.
+    keep을 넘기면(예: 반복 UI 제거 결과) 그 범위 안에서만 겹침을 찾는다.
+    """
+    if keep is None:
+        keep = [(0, 0 if sig is None else sig.shape[0]) for sig in signatures]
+    keep = list(keep)
+    for k in range(len(signatures) - 1):
+        sig_a, sig_b = signatures[k], signatures[k + 1]
+        if sig_a is None or sig_b is None:
+            continue
+        if widths is not None and widths[k] != widths[k + 1]:
+            continue
+        (top_a, bottom_a), (top_b, bottom_b) = keep[k], keep[k + 1]
+        if bottom_a <= top_a or bottom_b <= top_b:
+            continue
+        ov = find_overlap(sig_a[top_a:bottom_a], sig_b[top_b:bottom_b])
+        if ov is None:
+            continue
+        keep[k] = (top_a, top_a + ov.a_end)
+        keep[k + 1] = (top_b + ov.b_end, bottom_b)
+        logger.info("overlap %d↔%d: %d rows (A %d-%d, B %d-%d)", k, k + 1, ov.rows,
+                    top_a + ov.a_start, top_a + ov.a_end, top_b + ov.b_start, top_b + ov.b_end)
+    return keep
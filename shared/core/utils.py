@@ -1,21 +1,38 @@
 from __future__ import annotations
-from PIL import Image
-import numpy as np
 import os
-from typing import List
+import re
+from typing import TYPE_CHECKING, BinaryIO, List, Tuple, Union
+
+# PIL/numpy는 함수 안에서 import한다(IMAGE_EXTENSIONS만 쓰는 CLI 시작 경로가 끌어오지 않게)
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+# 입력으로 받는 이미지 확장자 (CLI 폴더 입력, watch 폴더, 웹 업로드 공통)
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'})
 
 
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def open_rgb(path: str) -> Image.Image:
-    """이미지를 RGB로 열기 (일부 PNG의 팔레트/투명 채널 이슈 방지)."""
+def numeric_sort_key(name: str) -> Tuple:
+    """파일명 속 숫자 기준 정렬 키. 숫자가 있는 이름을 우선, 그 다음 원문자열."""
+    nums = [int(x) for x in re.findall(r"\d+", name or "")]
+    return (0, tuple(nums), (name or "").lower()) if nums else (1, (name or "").lower())
+
+
+def open_rgb(path: Union[str, BinaryIO]) -> Image.Image:
+    """이미지를 RGB로 열기 (일부 PNG의 팔레트/투명 채널 이슈 방지). 경로 또는 파일 객체."""
+    from PIL import Image
+
     return Image.open(path).convert("RGB")
 
 
 def to_gray(img: Image.Image) -> np.ndarray:
     """Pillow 이미지를 그레이스케일 numpy(uint8)로 변환."""
+    import numpy as np
+
     return np.array(img.convert("L"))
 
 
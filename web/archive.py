@@ -0,0 +1,466 @@
+"""
+ZIP 일괄 업로드 / 결과 묶음
+
+캡처가 100장을 넘으면 파일 선택 창에서 고르기도, multipart 본문 하나로 받기도 번거롭다.
+/api/v1/batch는 ZIP 하나를 받아
+- 받는 대로 로컬 헤더를 따라 항목을 하나씩 풀어(ZIP 전체를 받아 두었다가 한꺼번에 풀지 않는다)
+  UploadIngest와 같은 방식(sha256, 매직 바이트 형식/원본 크기, 크기 한도, cas)으로 작업 폴더에 쓰고
+- 최상위 폴더마다 작업 하나로 나눈다(최상위에 바로 있는 이미지는 ZIP 이름으로 따로 한 작업).
+  폴더 안의 순서는 경로의 숫자 순이다.
+결과 PDF들은 ResultArchive로 다시 ZIP 하나에 담아 흘려보낸다.
+
+지원: 저장(stored)/deflate, 데이터 서술자(스트리밍으로 만든 ZIP), ZIP64 크기 필드.
+암호화된 항목과 크기를 알 수 없는 저장 항목은 거절한다. 압축 폭탄을 막으려고 풀어낸 크기
+합을 제한한다(max_total).
+"""
+
+from __future__ import annotations
+import io
+import os
+import shutil
+import struct
+import uuid
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from shared.core import numeric_sort_key
+from .cas import ContentStore
+from .ingest import (DEFAULT_MAX_FILE, FilePart, UploadIngest, UploadRejected, parse_options_header, safe_name,
+                     store_parts)
+from .jobstore import FileRecord
+
+ARCHIVE_FIELD = "archive"
+# 풀어낸 크기 합 기본 한도
+DEFAULT_MAX_TOTAL = 2 * 1024 ** 3
+# deflate를 한 번에 풀어내는 최대 크기(압축률이 큰 항목도 메모리를 이만큼만 쓴다)
+INFLATE_CHUNK = 1024 * 1024
+# 결과 ZIP에 PDF를 옮겨 담는 단위
+COPY_CHUNK = 256 * 1024
+
+_LOCAL = b"PK\x03\x04"
+_DESCRIPTOR = b"PK\x07\x08"
+# 중앙 디렉터리/끝 레코드: 여기서부터는 항목 데이터가 없다
+_TRAILERS = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06", b"PK\x06\x07")
+_ZIP64_EXTRA = 0x0001
+_FLAG_ENCRYPTED = 0x0001
+_FLAG_DESCRIPTOR = 0x0008
+_FLAG_UTF8 = 0x0800
+
+
+def _decode_name(raw: bytes, flags: int) -> str:
+    if flags & _FLAG_UTF8:
+        return raw.decode("utf-8", "replace")
+    # 표시 없이 UTF-8로 쓰는 도구(macOS)와 CP949로 쓰는 도구(한국어 Windows)가 흔하다
+    for encoding in ("utf-8", "cp949"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("cp437")
+
+
+@dataclass
+class _Entry:
+    name: str
+    method: int
+    flags: int
+    crc: int
+    # 압축된/풀린 크기. 데이터 서술자를 쓰는 항목은 None(deflate 끝으로 찾는다)
+    compressed: Optional[int]
+    size: Optional[int]
+    zip64: bool
+    keep: bool
+    inflater: Optional["zlib._Decompress"] = None
+    got_crc: int = 0
+    got_size: int = 0
+
+
+class ZipStreamReader:
+    """ZIP 바이트를 앞에서부터 받으며 항목마다 on_begin(이름) → on_data(조각)* → on_end()를 부른다.
+
+    on_begin이 False를 돌려준 항목은 데이터를 넘기지 않는다. 중앙 디렉터리가 나오면 끝난 것으로
+    보고 나머지 바이트는 버린다. 잘못된 ZIP이면 UploadRejected.
+    """
+
+    def __init__(self, on_begin: Callable[[str], bool], on_data: Callable[[bytes], None],
+                 on_end: Callable[[], None]):
+        self._on_begin = on_begin
+        self._on_data = on_data
+        self._on_end = on_end
+        self._buf = bytearray()
+        self._entry: Optional[_Entry] = None
+        self._state = "header"
+        self.finished = False
+
+    def feed(self, data: bytes) -> None:
+        if self.finished:
+            return
+        self._buf += data
+        while self._step():
+            pass
+
+    def close(self) -> None:
+        if not self.finished:
+            raise UploadRejected("ZIP 파일이 중간에 끊겼습니다.")
+
+    def _step(self) -> bool:
+        """처리할 수 있는 만큼 한 단계 진행. 데이터가 더 필요하면 False."""
+        if self._state == "header":
+            return self._read_header()
+        if self._state == "data":
+            return self._read_data()
+        if self._state == "descriptor":
+            return self._read_descriptor()
+        return False
+
+    def _read_header(self) -> bool:
+        buf = self._buf
+        if len(buf) < 4:
+            return False
+        if bytes(buf[:4]) in _TRAILERS:
+            self.finished = True
+            self._state = "done"
+            buf.clear()
+            return False
+        if bytes(buf[:4]) != _LOCAL:
+            raise UploadRejected("ZIP 파일이 아니거나 손상되었습니다.")
+        if len(buf) < 30:
+            return False
+        _, flags, method, _, _, crc, compressed, size, name_len, extra_len = struct.unpack("<HHHHHIIIHH", buf[4:30])
+        end = 30 + name_len + extra_len
+        if len(buf) < end:
+            return False
+        name = _decode_name(bytes(buf[30:30 + name_len]), flags)
+        extra = bytes(buf[30 + name_len:end])
+        del buf[:end]
+        if flags & _FLAG_ENCRYPTED:
+            raise UploadRejected(f"암호가 걸린 ZIP은 받을 수 없습니다: {name}")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise UploadRejected(f"지원하지 않는 압축 방식입니다: {name} (저장/deflate만)")
+        zip64 = False
+        if compressed == 0xFFFFFFFF or size == 0xFFFFFFFF:
+            zip64 = True
+            size, compressed = self._zip64_sizes(extra, name)
+        if flags & _FLAG_DESCRIPTOR:
+            if method == zipfile.ZIP_DEFLATED:
+                # 끝은 deflate 스트림의 끝으로 찾고, CRC/크기는 뒤따르는 서술자에서 읽는다
+                compressed = size = None
+            elif not compressed and not name.endswith("/"):
+                raise UploadRejected(f"크기를 알 수 없는 저장 항목은 받을 수 없습니다: {name}")
+        keep = not name.endswith("/") and self._on_begin(name)
+        self._entry = _Entry(name, method, flags, crc, compressed, size, zip64, keep,
+                             zlib.decompressobj(-15) if method == zipfile.ZIP_DEFLATED else None)
+        self._state = "data"
+        return True
+
+    @staticmethod
+    def _zip64_sizes(extra: bytes, name: str):
+        pos = 0
+        while pos + 4 <= len(extra):
+            tag, length = struct.unpack("<HH", extra[pos:pos + 4])
+            if tag == _ZIP64_EXTRA and length >= 16:
+                return struct.unpack("<QQ", extra[pos + 4:pos + 20])
+            pos += 4 + length
+        raise UploadRejected(f"ZIP64 크기 정보가 없습니다: {name}")
+
+    def _read_data(self) -> bool:
+        entry, buf = self._entry, self._buf
+        if entry.inflater is None:
+            n = min(entry.compressed or 0, len(buf))
+            if n:
+                self._emit(bytes(buf[:n]))
+                del buf[:n]
+                entry.compressed -= n
+            if entry.compressed:
+                return n > 0
+            return self._end_data()
+        n = len(buf) if entry.compressed is None else min(entry.compressed, len(buf))
+        if n == 0 and entry.compressed == 0:
+            raise UploadRejected(f"ZIP 파일이 손상되었습니다: {entry.name}")
+        out = entry.inflater.decompress(bytes(buf[:n]), INFLATE_CHUNK)
+        left = len(entry.inflater.unconsumed_tail) + (len(entry.inflater.unused_data) if entry.inflater.eof else 0)
+        consumed = n - left
+        del buf[:consumed]
+        if entry.compressed is not None:
+            entry.compressed -= consumed
+        if out:
+            self._emit(out)
+        if entry.inflater.eof:
+            return self._end_data()
+        return consumed > 0 or bool(out)
+
+    def _emit(self, data: bytes) -> None:
+        entry = self._entry
+        entry.got_crc = zlib.crc32(data, entry.got_crc)
+        entry.got_size += len(data)
+        if entry.keep:
+            self._on_data(data)
+
+    def _end_data(self) -> bool:
+        if self._entry.flags & _FLAG_DESCRIPTOR:
+            self._state = "descriptor"
+        else:
+            self._finish_entry(self._entry.crc, self._entry.size)
+        return True
+
+    def _read_descriptor(self) -> bool:
+        buf = self._buf
+        if len(buf) < 4:
+            return False
+        start = 4 if bytes(buf[:4]) == _DESCRIPTOR else 0
+        size_fmt = "<QQ" if self._entry.zip64 else "<II"
+        end = start + 4 + struct.calcsize(size_fmt)
+        if len(buf) < end:
+            return False
+        crc = struct.unpack("<I", buf[start:start + 4])[0]
+        _, size = struct.unpack(size_fmt, buf[start + 4:end])
+        del buf[:end]
+        self._finish_entry(crc, size)
+        return True
+
+    def _finish_entry(self, crc: int, size: Optional[int]) -> None:
+        entry = self._entry
+        if entry.got_crc != crc or (size is not None and entry.got_size != size):
+            raise UploadRejected(f"ZIP 파일이 손상되었습니다: {entry.name}")
+        self._entry = None
+        self._state = "header"
+        if entry.keep:
+            self._on_end()
+
+
+@dataclass
+class ArchiveGroup:
+    """ZIP 안의 최상위 폴더 하나(= 작업 하나)."""
+
+    label: str
+    job_id: str
+    job_dir: Path
+    files: List[FileRecord] = field(default_factory=list)
+    parts: List[FilePart] = field(default_factory=list)
+    # 폴더 안 경로(정렬 기준), parts와 같은 순서
+    paths: List[str] = field(default_factory=list)
+
+
+class ArchiveIngest(UploadIngest):
+    """multipart 'archive' 파트(ZIP)를 받는 대로 풀어 최상위 폴더마다 작업 폴더에 나눠 쓰는 수신기.
+
+    다른 파일 파트는 무시하고, 폼 필드(dpi 등)는 UploadIngest와 같이 fields에 모은다.
+    consume()은 이미지가 있는 폴더들을 ZIP에 처음 나온 순서대로(ArchiveGroup 목록) 반환한다.
+    """
+
+    def __init__(self, jobs_dir: Path, content_type: str, *, max_file_size: int = DEFAULT_MAX_FILE,
+                 max_pixels: int = 0, cas: Optional[ContentStore] = None, max_jobs: int = 20,
+                 max_total: int = DEFAULT_MAX_TOTAL):
+        super().__init__(jobs_dir, content_type, max_file_size=max_file_size, max_pixels=max_pixels, cas=cas)
+        self.jobs_dir = Path(jobs_dir)
+        self.max_jobs = int(max_jobs)
+        self.max_total = int(max_total)
+        self.groups: Dict[str, ArchiveGroup] = {}
+        self._zip: Optional[ZipStreamReader] = None
+        self._in_archive = False
+        self._root_label = "capfit"
+        self._entry: Optional[FilePart] = None
+        self._entry_group: Optional[ArchiveGroup] = None
+        self._entry_path = ""
+        self._total = 0
+
+    @property
+    def job_dirs(self) -> List[Path]:
+        return [group.job_dir for group in self.groups.values()]
+
+    def finish(self) -> List[ArchiveGroup]:  # type: ignore[override]
+        self._parser.finalize()
+        if self._zip is None:
+            raise UploadRejected("ZIP 파일(archive)이 없습니다.")
+        if self._in_archive:
+            raise UploadRejected("업로드가 중간에 끊겼습니다.")
+        groups = []
+        for group in self.groups.values():
+            if not group.parts:
+                # 이미지가 하나도 없던 폴더
+                shutil.rmtree(group.job_dir, ignore_errors=True)
+                continue
+            order = sorted(range(len(group.parts)), key=lambda i: numeric_sort_key(group.paths[i]))
+            group.files = store_parts([group.parts[i] for i in order], group.job_dir, self.cas)
+            group.parts, group.paths = [], []
+            groups.append(group)
+        return groups
+
+    def abort(self) -> None:
+        parts = [self._entry] + [p for group in self.groups.values() for p in group.parts]
+        for part in parts:
+            if part is None:
+                continue
+            part.fh.close()
+            try:
+                os.remove(part.tmp_path)
+            except OSError:
+                pass
+        self._entry = None
+        super().abort()
+
+    # ---- multipart 콜백 ----
+    def _on_headers_finished(self) -> None:
+        _, opts = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = opts.get(b"name", b"").decode("utf-8", "replace")
+        filename = opts.get(b"filename")
+        if filename is None:
+            super()._on_headers_finished()
+            return
+        self._field = None
+        if name != ARCHIVE_FIELD or self._zip is not None:
+            return
+        base = os.path.basename(filename.decode("utf-8", "replace").replace("\\", "/"))
+        self._root_label = os.path.splitext(base)[0] or self._root_label
+        self._zip = ZipStreamReader(self._entry_begin, self._entry_data, self._entry_end)
+        self._in_archive = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_archive:
+            super()._on_part_data(data, start, end)
+            return
+        if self._error is not None:
+            return
+        try:
+            self._zip.feed(data[start:end])
+        except UploadRejected as e:
+            self._error = e
+
+    def _on_part_end(self) -> None:
+        if not self._in_archive:
+            super()._on_part_end()
+            return
+        self._in_archive = False
+        if self._error is not None:
+            return
+        try:
+            self._zip.close()
+        except UploadRejected as e:
+            self._error = e
+
+    # ---- ZIP 항목 콜백 ----
+    def _entry_begin(self, name: str) -> bool:
+        if self._error is not None:
+            return False
+        path = name.replace("\\", "/").lstrip("/")
+        pieces = [p for p in path.split("/") if p]
+        # macOS 리소스 포크, 숨김 파일은 건너뛴다
+        if not pieces or pieces[0] == "__MACOSX" or any(p.startswith(".") for p in pieces):
+            return False
+        label, rel = (pieces[0], "/".join(pieces[1:])) if len(pieces) > 1 else (self._root_label, pieces[0])
+        group = self._group(label, is_root=len(pieces) == 1)
+        if group is None:
+            return False
+        self._count += 1
+        tmp = group.job_dir / f".upload-{self._count}"
+        self._entry = FilePart(pieces[-1], tmp, open(tmp, "wb"))
+        self._entry_group = group
+        self._entry_path = rel
+        return True
+
+    def _group(self, label: str, *, is_root: bool) -> Optional[ArchiveGroup]:
+        key = ("/" if is_root else "") + label
+        group = self.groups.get(key)
+        if group is None:
+            if len(self.groups) >= self.max_jobs:
+                self._error = UploadRejected(f"ZIP 안의 폴더가 너무 많습니다 (최대 {self.max_jobs}개).",
+                                             status_code=413)
+                return None
+            label = safe_name(label)
+            taken = {g.label for g in self.groups.values()}
+            unique, n = label, 1
+            while unique in taken:
+                n += 1
+                unique = f"{label}-{n}"
+            job_id = uuid.uuid4().hex[:12]
+            group = ArchiveGroup(unique, job_id, self.jobs_dir / job_id)
+            group.job_dir.mkdir(parents=True, exist_ok=True)
+            self.groups[key] = group
+        return group
+
+    def _entry_data(self, data: bytes) -> None:
+        self._total += len(data)
+        if self._total > self.max_total:
+            self._error = UploadRejected(
+                f"ZIP을 푼 크기가 너무 큽니다 (최대 {self.max_total // (1024 * 1024)}MB).", status_code=413)
+        part = self._entry
+        if part is None or self._error is not None:
+            return
+        if not part.sniffing and part.format is None:
+            return  # 이미지가 아니면 나머지는 쓰지 않는다(항목 끝에서 버린다)
+        self._error = self._feed_part(part, data)
+
+    def _entry_end(self) -> None:
+        part, self._entry = self._entry, None
+        if part is None:
+            return
+        part.fh.close()
+        if part.format is None or self._error is not None:
+            os.remove(part.tmp_path)
+            if part.format is None:
+                self.skipped.append(self._entry_path)
+            return
+        self._entry_group.parts.append(part)
+        self._entry_group.paths.append(self._entry_path)
+
+
+class _Sink(io.RawIOBase):
+    """ZipFile이 쓰는 바이트를 모아 두는 탐색 불가 출력."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ResultArchive:
+    """결과 PDF들을 ZIP 하나로 묶어 조각으로 내보낸다.
+
+    PDF는 이미 압축되어 있으므로 저장(stored) 방식으로 담는다. 출력은 탐색할 수 없는
+    스트림이므로 항목마다 데이터 서술자를 쓴다(zipfile이 알아서 처리).
+    """
+
+    def __init__(self):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_STORED)
+        self._names: set = set()
+
+    def _unique(self, name: str) -> str:
+        stem, ext = os.path.splitext(safe_name(name))
+        unique, n = f"{stem}{ext}", 1
+        while unique in self._names:
+            n += 1
+            unique = f"{stem}-{n}{ext}"
+        self._names.add(unique)
+        return unique
+
+    def add_file(self, name: str, path: str) -> Iterator[bytes]:
+        """파일 하나를 담으며 나오는 ZIP 조각들."""
+        with open(path, "rb") as src, self._zip.open(self._unique(name), "w") as dst:
+            while chunk := src.read(COPY_CHUNK):
+                dst.write(chunk)
+                yield self._sink.drain()
+        yield self._sink.drain()
+
+    def add_text(self, name: str, text: str) -> bytes:
+        self._zip.writestr(self._unique(name), text.encode("utf-8"))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """중앙 디렉터리를 쓰고 마지막 조각을 반환."""
+        self._zip.close()
+        return self._sink.drain()
@@ -0,0 +1,143 @@
+"""
+내용 주소 저장소 (content-addressed storage)
+
+같은 캡처가 여러 번 올라오는 경우(재시도, 같은 대화 내보내기를 여러 사람이 올림)를 위해
+업로드 원본을 sha256 이름으로 한 벌만 두고 작업 폴더에는 하드 링크로 건다. 변환 결과 PDF는
+(순서대로의 입력 해시 + 변환 파라미터 + 엔진 버전) 해시로 색인해, 같은 요청이 다시 오면
+변환하지 않고 기존 PDF를 바로 링크해 돌려준다.
+
+    <CAS>/objects/ab/abcdef…   업로드 원본
+    <CAS>/results/<key>.pdf    변환 결과 색인
+
+색인/원본은 작업 폴더의 링크가 모두 사라지면(링크 수 1) 정리 주기에 지운다. 하드 링크가
+안 되는 경우(다른 파일 시스템 등)에는 조용히 일반 파일로 둔다.
+
+환경 변수
+- CAPFIT_CAS_DIR: 저장소 위치 (기본: 작업 폴더/cas, 작업 폴더와 같은 파일 시스템이어야 함,
+  off면 사용 안 함)
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from shared import __version__ as CAPFIT_VERSION
+from .jobstore import FileRecord, JobStore
+
+logger = logging.getLogger(__name__)
+
+
+def result_key(files: List[FileRecord], params: Dict[str, Any]) -> Optional[str]:
+    """변환 결과 색인 키. 해시가 없는 입력(이전 업로드)이 있으면 None."""
+    hashes = [f.sha256 for f in files]
+    if not hashes or any(h is None for h in hashes):
+        return None
+    payload = json.dumps({"inputs": hashes, "params": params, "engine": CAPFIT_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _link(src: Path, dst: Path) -> bool:
+    """dst를 src의 하드 링크로 (원자적으로) 바꾼다. 실패하면 False."""
+    tmp = dst.with_name(f".{dst.name}.{threading.get_ident()}.link")
+    try:
+        os.link(src, tmp)
+        os.replace(tmp, dst)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+class ContentStore:
+    """sha256 이름의 업로드 원본 + 결과 PDF 색인. 작업 폴더와는 하드 링크로 공유한다."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.results = self.root / "results"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.results.mkdir(parents=True, exist_ok=True)
+        self.stats: Counter = Counter()  # upload_hit/upload_miss/result_hit/result_miss/swept
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, jobs_dir: Path) -> Optional["ContentStore"]:
+        value = os.environ.get("CAPFIT_CAS_DIR", "").strip()
+        if value.lower() == "off":
+            return None
+        return cls(Path(value or Path(jobs_dir) / "cas").resolve())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    # ---- 업로드 원본 ----
+    def object_path(self, sha256: str) -> Path:
+        return self.objects / sha256[:2] / sha256
+
+    def adopt(self, src: Path, sha256: str, dst: Path) -> None:
+        """받은 파일 src를 저장소에 넣고 dst(작업 폴더)에 링크한다. src는 사라진다.
+
+        같은 내용이 이미 있으면 새로 받은 파일은 버리고 기존 것을 링크한다.
+        """
+        obj = self.object_path(sha256)
+        if obj.exists() and _link(obj, dst):
+            os.remove(src)
+            self._count("upload_hit")
+            return
+        obj.parent.mkdir(exist_ok=True)
+        _link(src, obj)
+        os.replace(src, dst)
+        self._count("upload_miss")
+
+    # ---- 결과 색인 ----
+    def lookup_result(self, key: Optional[str], dst: Path) -> bool:
+        """같은 변환 결과가 있으면 dst에 링크하고 True."""
+        if key is None:
+            return False
+        hit = (self.results / f"{key}.pdf").exists() and _link(self.results / f"{key}.pdf", dst)
+        self._count("result_hit" if hit else "result_miss")
+        return hit
+
+    def store_result(self, key: Optional[str], pdf: Path) -> None:
+        if key is not None and os.path.exists(pdf):
+            _link(Path(pdf), self.results / f"{key}.pdf")
+
+    def remember(self, store: JobStore, job_id: str) -> None:
+        """끝난 작업의 결과 PDF를 색인에 올린다."""
+        job = store.get_job(job_id)
+        if job is None or job.state != "done" or not job.output:
+            return
+        self.store_result(result_key(store.list_files(job_id), job.params), Path(job.output))
+
+    # ---- 정리 ----
+    def sweep(self) -> int:
+        """어느 작업 폴더에서도 링크하지 않는(링크 수 1) 원본/결과를 지우고 확보한 바이트 수."""
+        freed = 0
+        for path in [*self.objects.glob("*/*"), *self.results.glob("*.pdf")]:
+            try:
+                st = path.stat()
+                if st.st_nlink <= 1:
+                    os.remove(path)
+                    freed += st.st_size
+                    self._count("swept")
+            except OSError:
+                continue
+        return freed
+
+    def metrics_lines(self) -> List[str]:
+        with self._lock:
+            stats = dict(self.stats)
+        return [
+            "# TYPE capfit_cas_total counter",
+            *(f'capfit_cas_total{{event="{k}"}} {n}' for k, n in sorted(stats.items())),
+        ]
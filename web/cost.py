@@ -0,0 +1,197 @@
+"""
+변환 비용 예측과 입장 제어 (admission control)
+
+업로드 때 헤더에서 읽은 원본 크기(JobStore files.width/height)만으로 변환에 드는 CPU 시간과
+최대 메모리를 예측해, 작업 하나가 한도를 넘으면 거절하고(413) 전체 한도(동시 실행 메모리,
+대기열에 쌓인 예상 시간)를 넘으면 대기시키거나 거절(503)한다. 예측값은 실행기의 배차
+(메모리 여유에 맞춰 실행)와 대기 시간 안내(eta)에도 쓴다.
+
+비용 모델 (build_pdf_two_columns_from_sources, dedupe_overlap 켬, 워커 스레드 1개 기준)
+- 시간 ≈ 원본 화소(MP) × 0.025초 + 출력 화소(MP) × 0.047초 + 0.1초
+- 최대 메모리 ≈ 가장 큰 원본 화소 × 10B(RGB 디코드 + 회색조/행 서명 사본)
+                + 출력 화소 × 14B(단 폭 조각 + 이어 붙인 캔버스 + 페이지 인코드) + 128MB
+합성 대화 캡처(1080~4000px 폭, 2400~40000px 높이)로 잰 값을 넉넉하게 잡은 것이다.
+느린 서버에서는 CAPFIT_COST_SCALE로 시간 예측을 늘린다.
+
+환경 변수 (0이면 제한 없음)
+- CAPFIT_MAX_PIXELS: 이미지 한 장의 최대 화소 수 (기본 150e6, 헤더를 받는 즉시 거절)
+- CAPFIT_JOB_MAX_SECONDS: 작업 하나의 예상 변환 시간 한도 (기본 300)
+- CAPFIT_JOB_MAX_MEMORY: 작업 하나의 예상 최대 메모리 한도 (기본 2G)
+- CAPFIT_MEMORY_BUDGET: 동시에 실행하는 작업들의 예상 메모리 합 한도 (기본: 물리 메모리의 절반)
+- CAPFIT_MAX_BACKLOG_SECONDS: 대기/실행 중 작업의 예상 시간 합(워커당) 한도 (기본 0)
+- CAPFIT_COST_SCALE: 시간 예측 배율 (기본 1.0)
+"""
+
+from __future__ import annotations
+import os
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from shared.core import compute_two_column_layout
+from .jobstore import FileRecord
+from .retention import parse_size
+
+SECONDS_PER_SOURCE_MPX = 0.025
+SECONDS_PER_OUTPUT_MPX = 0.047
+SECONDS_BASE = 0.1
+BYTES_PER_SOURCE_PX = 10
+BYTES_PER_OUTPUT_PX = 14
+BYTES_BASE = 128 * 1024 ** 2
+
+
+class JobTooLarge(Exception):
+    """작업 하나의 예상 비용이 한도를 넘음 (413)."""
+
+
+@dataclass
+class CostEstimate:
+    images: int
+    source_pixels: int
+    max_pixels: int
+    output_pixels: int
+    seconds: float
+    peak_bytes: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["seconds"] = round(self.seconds, 2)
+        return data
+
+
+def estimate_cost(
+    dims: Sequence[Tuple[int, int]],
+    *,
+    dpi: int,
+    margin: int,
+    gutter: int,
+    page_width: Optional[int] = None,
+    page_height: Optional[int] = None,
+    scale: float = 1.0,
+) -> CostEstimate:
+    """원본 (폭, 높이) 목록과 레이아웃으로 변환 비용 예측."""
+    _, _, col_w, _ = compute_two_column_layout(
+        dpi=dpi, margin=margin, gutter=gutter, page_width=page_width, page_height=page_height
+    )
+    dims = [(w, h) for w, h in dims if w > 0 and h > 0]
+    source = sum(w * h for w, h in dims)
+    largest = max((w * h for w, h in dims), default=0)
+    output = col_w * sum(max(1, round(h * col_w / w)) for w, h in dims)
+    seconds = (SECONDS_PER_SOURCE_MPX * source / 1e6 + SECONDS_PER_OUTPUT_MPX * output / 1e6 + SECONDS_BASE) * scale
+    peak = BYTES_PER_SOURCE_PX * largest + BYTES_PER_OUTPUT_PX * output + BYTES_BASE
+    return CostEstimate(len(dims), source, largest, output, seconds, peak)
+
+
+def file_dims(files: List[FileRecord]) -> List[Tuple[int, int]]:
+    """업로드 때 기록한 원본 크기. 없으면(이전 업로드) 헤더만 읽어 구한다."""
+    dims = []
+    for f in files:
+        if f.width and f.height:
+            dims.append((f.width, f.height))
+            continue
+        try:
+            from PIL import Image
+
+            with Image.open(f.path) as im:  # 헤더만 읽는다(디코드는 load() 때)
+                dims.append(im.size)
+        except Exception:
+            continue
+    return dims
+
+
+def _physical_memory() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+class AdmissionControl:
+    """예측 비용으로 작업 입장 여부를 정하는 한도 모음. 거절 사유는 지표로 센다."""
+
+    def __init__(
+        self,
+        *,
+        max_pixels: int = 150_000_000,
+        job_seconds: float = 300.0,
+        job_bytes: int = 2 * 1024 ** 3,
+        memory_budget: int = 0,
+        backlog_seconds: float = 0.0,
+        scale: float = 1.0,
+    ):
+        self.max_pixels = int(max_pixels)
+        self.job_seconds = float(job_seconds)
+        self.job_bytes = int(job_bytes)
+        self.memory_budget = int(memory_budget)
+        self.backlog_seconds = float(backlog_seconds)
+        self.scale = float(scale)
+        self.rejected: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AdmissionControl":
+        budget = os.environ.get("CAPFIT_MEMORY_BUDGET")
+        return cls(
+            max_pixels=int(float(os.environ.get("CAPFIT_MAX_PIXELS", "150e6"))),
+            job_seconds=float(os.environ.get("CAPFIT_JOB_MAX_SECONDS", "300")),
+            job_bytes=parse_size(os.environ.get("CAPFIT_JOB_MAX_MEMORY", "2G")),
+            memory_budget=parse_size(budget) if budget else _physical_memory() // 2,
+            backlog_seconds=float(os.environ.get("CAPFIT_MAX_BACKLOG_SECONDS", "0")),
+            scale=float(os.environ.get("CAPFIT_COST_SCALE", "1.0")),
+        )
+
+    def estimate(self, files: List[FileRecord], options: Dict[str, Any]) -> CostEstimate:
+        return estimate_cost(
+            file_dims(files),
+            dpi=int(options.get("dpi") or 220),
+            margin=int(options.get("margin") or 0),
+            gutter=int(options.get("gutter") or 0),
+            page_width=options.get("page_width"),
+            page_height=options.get("page_height"),
+            scale=self.scale,
+        )
+
+    def check_job(self, est: CostEstimate) -> None:
+        """작업 하나의 한도 확인. 넘으면 JobTooLarge(사용자에게 보일 메시지)."""
+        if self.max_pixels > 0 and est.max_pixels > self.max_pixels:
+            self._reject("pixels")
+            raise JobTooLarge(
+                f"이미지가 너무 큽니다 ({est.max_pixels / 1e6:.0f}백만 화소, 한 장 최대 {self.max_pixels / 1e6:.0f}백만 화소)."
+            )
+        if self.job_seconds > 0 and est.seconds > self.job_seconds:
+            self._reject("seconds")
+            raise JobTooLarge(
+                f"예상 변환 시간 {est.seconds:.0f}초가 한도 {self.job_seconds:.0f}초를 넘습니다. "
+                "이미지 수를 줄이거나 DPI를 낮춰 주세요."
+            )
+        # 전체 메모리 한도보다 큰 작업은 혼자서도 실행할 수 없다
+        limits = [b for b in (self.job_bytes, self.memory_budget) if b > 0]
+        if limits and est.peak_bytes > min(limits):
+            limit = min(limits)
+            self._reject("memory")
+            raise JobTooLarge(
+                f"예상 메모리 {est.peak_bytes / 1024 ** 2:.0f}MB가 한도 {limit / 1024 ** 2:.0f}MB를 넘습니다. "
+                "긴 캡처를 나누거나 DPI를 낮춰 주세요."
+            )
+
+    def backlog_full(self, backlog_seconds: float, workers: int) -> bool:
+        """대기/실행 중 예상 시간 합(워커당)이 한도를 넘으면 True."""
+        full = self.backlog_seconds > 0 and backlog_seconds / max(1, workers) > self.backlog_seconds
+        if full:
+            self._reject("backlog")
+        return full
+
+    def _reject(self, reason: str) -> None:
+        with self._lock:
+            self.rejected[reason] += 1
+
+    def metrics_lines(self) -> List[str]:
+        with self._lock:
+            rejected = dict(self.rejected)
+        return [
+            "# TYPE capfit_admission_rejected_total counter",
+            *(f'capfit_admission_rejected_total{{reason="{r}"}} {n}' for r, n in sorted(rejected.items())),
+            "# TYPE capfit_memory_budget_bytes gauge",
+            f"capfit_memory_budget_bytes {self.memory_budget}",
+        ]
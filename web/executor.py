@@ -0,0 +1,682 @@
+"""
+웹 변환 실행기
+
+변환(디코드/스마트 컷/인코드)은 CPU를 오래 쓰므로 요청을 처리하는 서버 프로세스가 아닌
+별도 워커 프로세스 풀에서 실행한다. 동시에 실행되는 작업 수는 워커 수로, 기다리는 작업 수는
+대기열 크기로 제한하며, 대기열이 가득 차면 제출을 거절(QueueFull → 503)해 요청 처리가
+밀리지 않게 한다. 작업 상태/시각은 JobStore에 기록한다.
+
+작업마다 헤더로 예측한 비용(web.cost)을 받아, 실행 중 작업들의 예상 메모리 합이
+CAPFIT_MEMORY_BUDGET을 넘지 않게 배차하고(맨 앞 작업이 크면 뒤의 작은 작업이 먼저 실행될 수
+있다), 예상 대기 시간(eta)을 알려 준다.
+
+취소(cancel)는 대기 중이면 대기열에서 바로 빼고, 실행 중이면 작업 폴더에 취소 표시 파일을
+남긴다. 워커의 엔진 훅이 단계/입력/페이지 사이마다 이 파일을 확인해 ConversionCancelled로
+멈추므로(서버와 capfit-worker가 다른 프로세스여도 같은 방식) 워커가 곧바로 다음 작업을 받는다.
+
+추측 실행(speculate, local 모드): 업로드 후 사용자가 리뷰 화면에서 순서를 고르는 동안 노는 워커가
+입력마다 기본 레이아웃의 디코드/칼럼 폭 리사이즈/행 서명을 작업 폴더의 parts/에 미리 만들어
+두고(변환이 이를 읽는다), 원하면 기본 순서 PDF까지 만들어 결과 색인(cas)에 올린다(순서/옵션이
+같으면 변환 요청이 바로 끝난다). 추측 작업은 실제 작업보다 뒤에만 배차되고, 실제 작업이 워커를
+기다리거나 그 작업을 실제로 변환하기 시작하면 취소 표시로 멈춘다.
+
+환경 변수
+- CAPFIT_EXECUTOR: local(기본, 서버 안의 워커 풀) | external(대기열에만 넣고 capfit-worker가 실행)
+- CAPFIT_WORKERS: local 모드 워커 프로세스 수 (기본: CPU 수의 절반, 최소 1)
+- CAPFIT_QUEUE_SIZE: 실행을 기다릴 수 있는 최대 작업 수 (기본 32)
+"""
+
+from __future__ import annotations
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from shared.core.hooks import ConversionCancelled, ConversionHooks
+from .cas import ContentStore
+from .cost import AdmissionControl, CostEstimate
+from .jobstore import JobStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 32
+# 메모리가 모자라 못 나가는 맨 앞 작업을 뒤 작업이 앞지를 수 있는 최대 횟수(기아 방지)
+MAX_BYPASS = 4
+PROGRESS_NAME = "progress.json"
+# 페이지 미리보기(작업 폴더 아래, page-000.jpg ...)와 폭
+PREVIEW_DIR = "previews"
+PREVIEW_WIDTH = 320
+PREVIEW_QUALITY = 70
+# 실행 중 작업 취소 표시(내용: 취소 사유)
+CANCEL_NAME = "cancel"
+# 취소 표시 파일 확인 간격(초) — checkpoint는 페이지 쓰기마다 불릴 만큼 잦다
+CANCEL_CHECK_INTERVAL = 0.1
+# 입력별 칼럼 폭 리사이즈 캐시(작업 폴더 아래)
+PARTS_DIR = "parts"
+# 추측 실행의 취소 표시/기본 순서 PDF(작업 폴더 아래)
+SPECULATIVE_DIR = "speculative"
+
+# 단계별 진행률 구간(%) — `capfit bench` 기준 대략적인 시간 비중
+_STAGE_SPANS = {
+    "load": (0, 40),  # decode + resize (입력 장수로 나눠 진행)
+    "dedupe": (40, 45),
+    "features": (45, 60),
+    "plan": (60, 62),
+    "compose": (62, 70),
+    "encode": (70, 100),
+}
+
+
+class QueueFull(Exception):
+    """대기열이 가득 차 작업을 받을 수 없음."""
+
+
+def _warmup() -> int:
+    """워커 프로세스에서 무거운 모듈(numpy/PIL/빌더)을 미리 import."""
+    from shared.core import pdf_builder  # noqa: F401
+    return os.getpid()
+
+
+class CancelCheck(ConversionHooks):
+    """cancel_path를 주면 checkpoint마다(최대 CANCEL_CHECK_INTERVAL에 한 번) 취소 표시를 확인하는 훅."""
+
+    def __init__(self, cancel_path: Optional[str] = None):
+        self._cancel_path = cancel_path
+        self._next_check = 0.0
+
+    def checkpoint(self) -> None:
+        if self._cancel_path is None:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + CANCEL_CHECK_INTERVAL
+        reason = read_cancel(os.path.dirname(self._cancel_path))
+        if reason is not None:
+            raise ConversionCancelled(reason)
+
+
+class ProgressWriter(CancelCheck):
+    """엔진 단계를 진행률(단계, %)로 바꿔 작업 폴더의 progress.json에 기록하는 훅.
+
+    워커 프로세스와 서버가 파일로만 주고받으므로 별도 IPC가 필요 없다.
+    쓰기는 임시 파일 + os.replace로 원자적으로 하고, 같은 값은 다시 쓰지 않는다.
+    페이지 배치가 끝날 때마다 작은 JPEG 미리보기를 previews/에 쓰고 progress.json의 pages를 늘린다
+    (서버가 SSE로 결과 페이지에 밀어 준다).
+    """
+
+    def __init__(self, path: str, n_inputs: int, cancel_path: Optional[str] = None):
+        super().__init__(cancel_path)
+        self._path = path
+        self._n_inputs = max(1, n_inputs)
+        self._loaded = 0
+        self._lock = threading.Lock()
+        self._last: Optional[tuple] = None
+        self._pages = 0
+        self._stage: tuple = ("decode", 0)
+
+    def on_page(self, index: int, page) -> None:
+        from PIL import Image
+
+        out = preview_path(os.path.dirname(self._path), index)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        height = max(1, round(page.height * PREVIEW_WIDTH / page.width))
+        # 정수 배 축소로 먼저 줄이고 마지막만 보간(페이지당 수 ms)
+        small = page.reduce(max(1, page.width // (PREVIEW_WIDTH * 2))).resize((PREVIEW_WIDTH, height), Image.BILINEAR)
+        small.save(f"{out}.tmp", format="JPEG", quality=PREVIEW_QUALITY)
+        os.replace(f"{out}.tmp", out)
+        with self._lock:
+            self._pages = index + 1
+            self._write(*self._stage)
+
+    def finish(self) -> None:
+        with self._lock:
+            self._write("done", 100)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if name in ("decode", "resize"):
+            with self._lock:
+                lo, hi = _STAGE_SPANS["load"]
+                self._write("decode", lo + (hi - lo) * self._loaded // self._n_inputs)
+            yield
+            if name == "resize":
+                with self._lock:
+                    self._loaded += 1
+            return
+        span = _STAGE_SPANS.get(name)
+        if span is not None:
+            with self._lock:
+                self._write(name, span[0])
+        yield
+
+    def _write(self, stage: str, percent: int) -> None:
+        self._stage = (stage, percent)
+        if self._last == (stage, percent, self._pages):
+            return
+        self._last = (stage, percent, self._pages)
+        write_progress(self._path, stage, percent, self._pages)
+
+
+def write_progress(path: str, stage: str, percent: int, pages: int = 0) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"stage": stage, "percent": int(percent), "pages": int(pages)}, f)
+    os.replace(tmp, path)
+
+
+def preview_path(job_dir: str, index: int) -> str:
+    return os.path.join(job_dir, PREVIEW_DIR, f"page-{index:03d}.jpg")
+
+
+def read_progress(job_dir: str) -> Dict[str, Any]:
+    """작업 폴더의 진행률({stage, percent, pages}). 아직 없으면 빈 dict."""
+    try:
+        with open(os.path.join(job_dir, PROGRESS_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def clear_progress(job_dir: str) -> None:
+    """이전 변환의 진행률/페이지 미리보기를 지운다. 다시 변환하거나 결과를 재사용할 때 예전 페이지가
+    새 실행 버전(started_at)으로 보이지 않게 한다."""
+    shutil.rmtree(os.path.join(job_dir, PREVIEW_DIR), ignore_errors=True)
+    try:
+        os.remove(os.path.join(job_dir, PROGRESS_NAME))
+    except FileNotFoundError:
+        pass
+
+
+def request_cancel(job_dir: str, reason: str) -> None:
+    """실행 중 작업에 취소 표시를 남긴다(워커가 다음 checkpoint에서 멈춘다)."""
+    tmp = os.path.join(job_dir, f".{CANCEL_NAME}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(reason)
+    os.replace(tmp, os.path.join(job_dir, CANCEL_NAME))
+
+
+def read_cancel(job_dir: str) -> Optional[str]:
+    """취소 표시가 있으면 사유, 없으면 None."""
+    try:
+        with open(os.path.join(job_dir, CANCEL_NAME), encoding="utf-8") as f:
+            return f.read() or "cancelled"
+    except FileNotFoundError:
+        return None
+
+
+def clear_cancel(job_dir: str) -> None:
+    try:
+        os.remove(os.path.join(job_dir, CANCEL_NAME))
+    except FileNotFoundError:
+        pass
+
+
+def part_path(out_pdf: str) -> str:
+    """쓰는 중인 PDF 경로. 다 쓴 뒤에만 최종 이름으로 바꿔, 쓰는 중인 PDF가 완성본으로 보이지 않게 한다.
+
+    페이지는 인코딩되는 대로 이 파일에 덧붙으므로 /api/v1/convert는 이를 따라 읽으며 흘려보낸다.
+    """
+    return f"{out_pdf}.part"
+
+
+def job_part_cache(job_dir: str, paths: List[str]):
+    """작업의 입력별 리사이즈 캐시. 키는 작업 안의 파일 이름(작업 안에서 바뀌지 않는다)."""
+    from shared.core import PartCache
+
+    return PartCache(os.path.join(job_dir, PARTS_DIR), {p: os.path.basename(p) for p in paths})
+
+
+def speculative_pdf(job_dir: str) -> str:
+    return os.path.join(job_dir, SPECULATIVE_DIR, "output.pdf")
+
+
+def run_job(paths: List[str], out_pdf: str, options: Dict[str, Any]) -> str:
+    """워커 프로세스에서 실행되는 변환 작업 (피클 가능하도록 모듈 수준 함수).
+
+    취소 표시가 생기면 ConversionCancelled(사유)로 멈추고 쓰던 PDF는 지운다.
+    추측 실행으로 미리 만든 리사이즈 결과(parts/)가 있으면 디코드/리사이즈 대신 읽는다.
+    """
+    from shared.core import build_pdf_two_columns_from_sources
+
+    job_dir = os.path.dirname(out_pdf)
+    progress = os.path.join(job_dir, PROGRESS_NAME)
+    # 이전 변환(다른 여백/간격)의 진행률/미리보기가 섞이지 않게 비우고 시작
+    clear_progress(job_dir)
+    write_progress(progress, "decode", 0)
+    hooks = ProgressWriter(progress, len(paths), os.path.join(job_dir, CANCEL_NAME))
+    part = part_path(out_pdf)
+    try:
+        build_pdf_two_columns_from_sources(paths, part, hooks=hooks, part_cache=job_part_cache(job_dir, paths),
+                                           **options)
+        os.replace(part, out_pdf)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    hooks.finish()
+    return out_pdf
+
+
+def speculate_job(paths: List[str], job_dir: str, options: Dict[str, Any], build: bool = False) -> int:
+    """리뷰 중인 작업을 노는 워커가 미리 처리한다 (피클 가능하도록 모듈 수준 함수).
+
+    build=False면 paths의 디코드/리사이즈(+행 서명)를 작업의 리사이즈 캐시에 채우고 새로 만든 수,
+    True면 그 순서/옵션대로 PDF를 speculative/output.pdf에 만들고 입력 수를 반환한다.
+    speculative/cancel 표시가 생기면 ConversionCancelled로 멈춘다.
+    """
+    from shared.core import build_pdf_two_columns_from_sources, prepare_sources
+
+    hooks = CancelCheck(os.path.join(job_dir, SPECULATIVE_DIR, CANCEL_NAME))
+    cache = job_part_cache(job_dir, paths)
+    if not build:
+        layout = {k: options[k] for k in ("margin", "gutter", "dpi", "page_width", "page_height", "fast") if k in options}
+        return prepare_sources(paths, cache, hooks=hooks, **layout)
+    out_pdf = speculative_pdf(job_dir)
+    part = part_path(out_pdf)
+    try:
+        build_pdf_two_columns_from_sources(paths, part, hooks=hooks, part_cache=cache, **options)
+        os.replace(part, out_pdf)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    return len(paths)
+
+
+# submit_many 항목: (작업 id, 입력 경로들, 결과 PDF, 변환 옵션, 예측 비용)
+Submission = Tuple[str, List[str], str, Dict[str, Any], Optional[CostEstimate]]
+
+
+def _cost_fields(cost: Optional[CostEstimate]) -> Tuple[float, int]:
+    return (cost.seconds, cost.peak_bytes) if cost is not None else (0.0, 0)
+
+
+@dataclass
+class _Pending:
+    job_id: str
+    paths: List[str]
+    out_pdf: str
+    options: Dict[str, Any]
+    cost_seconds: float = 0.0
+    cost_bytes: int = 0
+    bypassed: int = 0
+
+
+@dataclass(eq=False)
+class _Speculation:
+    job_id: str
+    job_dir: str
+    paths: List[str]
+    options: Dict[str, Any]
+    # 기본 순서 PDF를 만드는 일이면 결과 색인 키(아니면 입력 하나의 리사이즈)
+    build_key: Optional[str] = None
+    cost_bytes: int = 0
+
+
+class ConversionExecutor:
+    """워커 프로세스 풀 + 크기 제한 대기열.
+
+    풀에는 워커 수만큼만 넘기고 나머지는 자체 대기열에 두므로, 작업마다 대기 순번을
+    알 수 있고 대기열 길이로 제출을 제한할 수 있다. 상태 전이는 store에 기록한다.
+    """
+
+    def __init__(self, store: JobStore, workers: Optional[int] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 cas: Optional[ContentStore] = None, admission: Optional[AdmissionControl] = None):
+        self.store = store
+        self.cas = cas
+        self.admission = admission
+        self.workers = max(1, int(workers or max(1, (os.cpu_count() or 2) // 2)))
+        self.queue_size = max(0, int(queue_size))
+        # 이미 끝난 future에 콜백을 걸면 잠금을 쥔 채로 바로 호출되므로 재진입 가능해야 한다
+        self._lock = threading.RLock()
+        self._pending: "OrderedDict[str, _Pending]" = OrderedDict()
+        self._active: Dict[str, _Pending] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # 추측 실행: 대기/실행 중, 작업별 남은 리사이즈 수, 리사이즈가 끝나면 시작할 PDF 만들기
+        self._speculative: Deque[_Speculation] = deque()
+        self._spec_active: List[_Speculation] = []
+        self._spec_left: Counter = Counter()
+        self._spec_builds: Dict[str, _Speculation] = {}
+        self.spec_stats: Counter = Counter()  # prepared/built/preempted/failed
+
+    @classmethod
+    def from_env(cls, store: JobStore, cas: Optional[ContentStore] = None,
+                 admission: Optional[AdmissionControl] = None) -> "ConversionExecutor":
+        workers = int(os.environ.get("CAPFIT_WORKERS", "0") or 0)
+        queue_size = int(os.environ.get("CAPFIT_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE)))
+        return cls(store, workers or None, queue_size, cas, admission)
+
+    # ---- 수명 ----
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # 서버 프로세스는 스레드가 여럿이므로 fork 대신 spawn으로 워커를 만든다
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        for _ in range(self.workers):
+            pool.submit(_warmup)
+        return pool
+
+    def start(self) -> None:
+        self._pool = self._new_pool()
+        logger.info("conversion executor: workers=%d queue_size=%d", self.workers, self.queue_size)
+        # 재시작 전에 대기/실행 중이던 작업은 다시 대기열에 넣는다(대기열 크기 제한 없이)
+        for job in self.store.jobs_in_state("queued", "running"):
+            paths = [f.path for f in self.store.list_files(job.id)]
+            self._enqueue(job.id, paths, job.output or "", job.params,
+                          job.cost_seconds or 0.0, job.cost_bytes or 0, force=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._speculative.clear()
+            self._spec_builds.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    # ---- 제출/조회 ----
+    def submit(self, job_id: str, paths: List[str], out_pdf: str, options: Dict[str, Any],
+               cost: Optional[CostEstimate] = None) -> int:
+        """작업 제출. 대기 순번(0 = 바로 실행)을 반환하고, 대기열이 가득 차면 QueueFull."""
+        return self._enqueue(job_id, paths, out_pdf, options, *_cost_fields(cost))
+
+    def submit_many(self, jobs: List[Submission]) -> List[int]:
+        """여러 작업(ZIP 묶음)을 한꺼번에 제출해 대기열에 이어 붙인다. 모두 받을 수 없으면
+        하나도 넣지 않고 QueueFull. 작업별 대기 순번을 반환한다."""
+        with self._lock:
+            free = max(0, self.workers - len(self._active))
+            if len(self._pending) + len(jobs) - free > self.queue_size:
+                raise QueueFull(f"queue is full ({self.queue_size} waiting)")
+            backlog = sum(j.cost_seconds for j in (*self._pending.values(), *self._active.values()))
+            added = sum(_cost_fields(job[4])[0] for job in jobs)
+            if self.admission is not None and self.admission.backlog_full(backlog + added, self.workers):
+                raise QueueFull(f"backlog is full ({backlog:.0f}s of predicted work)")
+            return [self._enqueue(job_id, paths, out_pdf, options, *_cost_fields(cost), force=True)
+                    for job_id, paths, out_pdf, options, cost in jobs]
+
+    def speculate(self, job_id: str, job_dir: str, paths: List[str], options: Dict[str, Any],
+                  build_key: Optional[str] = None, cost: Optional[CostEstimate] = None) -> None:
+        """리뷰 중인 작업을 워커가 놀 때 미리 처리하게 한다(입력마다 리사이즈, build_key를 주면
+        이어서 그 순서/옵션의 PDF를 만들어 결과 색인에 올린다). 대기열 크기 제한을 받지 않는다."""
+        spec_dir = os.path.join(job_dir, SPECULATIVE_DIR)
+        os.makedirs(spec_dir, exist_ok=True)
+        clear_cancel(spec_dir)
+        with self._lock:
+            for path in paths:
+                self._speculative.append(_Speculation(job_id, job_dir, [path], dict(options)))
+            self._spec_left[job_id] += len(paths)
+            if build_key is not None and self.cas is not None:
+                self._spec_builds[job_id] = _Speculation(job_id, job_dir, list(paths), dict(options), build_key,
+                                                         _cost_fields(cost)[1])
+            self._dispatch_locked()
+
+    def position(self, job_id: str) -> int:
+        """대기 순번(1 = 다음 차례). 대기열에 없으면 0."""
+        with self._lock:
+            return self._position_locked(job_id)
+
+    def queue_length(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def cancel(self, job_id: str, reason: str) -> bool:
+        """대기 중이면 대기열에서 빼고, 실행 중이면 워커에 취소를 알린다. 둘 다 아니면 False."""
+        with self._lock:
+            if self._pending.pop(job_id, None) is not None:
+                self.store.cancel_queued(job_id, reason)
+                return True
+            job = self._active.get(job_id)
+            if job is None:
+                return False
+            # 워커 프로세스는 다음 checkpoint에서 멈추고, _on_done이 cancelled로 기록한다
+            request_cancel(os.path.dirname(job.out_pdf), reason)
+            return True
+
+    def eta(self, job_id: str) -> Optional[float]:
+        """대기 중인 작업이 끝날 때까지의 대략적인 예상 시간(초). 대기 중이 아니면 None."""
+        with self._lock:
+            if job_id not in self._pending:
+                return None
+            ahead = 0.0
+            for pending_id, job in self._pending.items():
+                ahead += job.cost_seconds
+                if pending_id == job_id:
+                    break
+            # 실행 중 작업은 평균적으로 절반쯤 남았다고 본다
+            running = sum(job.cost_seconds for job in self._active.values()) / 2
+            return (ahead + running) / self.workers
+
+    # ---- 내부 ----
+    def _enqueue(self, job_id: str, paths: List[str], out_pdf: str, options: Dict[str, Any],
+                 cost_seconds: float = 0.0, cost_bytes: int = 0, *, force: bool = False) -> int:
+        with self._lock:
+            if not force:
+                if len(self._active) >= self.workers and len(self._pending) >= self.queue_size:
+                    raise QueueFull(f"queue is full ({self.queue_size} waiting)")
+                backlog = sum(j.cost_seconds for j in (*self._pending.values(), *self._active.values()))
+                if self.admission is not None and self.admission.backlog_full(backlog + cost_seconds, self.workers):
+                    raise QueueFull(f"backlog is full ({backlog:.0f}s of predicted work)")
+            clear_cancel(os.path.dirname(out_pdf))
+            clear_progress(os.path.dirname(out_pdf))
+            # 실제로 변환하므로 추측 실행은 그만둔다(이미 만든 리사이즈 결과는 변환이 읽는다)
+            self._drop_speculation_locked(job_id)
+            self._pending[job_id] = _Pending(job_id, list(paths), out_pdf, dict(options), cost_seconds, cost_bytes)
+            self.store.mark_queued(job_id, options, out_pdf, cost_seconds or None, cost_bytes or None)
+            self._dispatch_locked()
+            return self._position_locked(job_id)
+
+    def _position_locked(self, job_id: str) -> int:
+        for i, pending_id in enumerate(self._pending, start=1):
+            if pending_id == job_id:
+                return i
+        return 0
+
+    def _next_fitting_locked(self) -> Optional[_Pending]:
+        """실행 중 작업들과 합쳐 메모리 예산 안에 드는 가장 앞의 대기 작업."""
+        budget = self.admission.memory_budget if self.admission is not None else 0
+        in_use = sum(job.cost_bytes for job in self._active.values())
+        head = next(iter(self._pending.values()))
+        for job in self._pending.values():
+            if budget <= 0 or not self._active or in_use + job.cost_bytes <= budget:
+                if job is not head:
+                    head.bypassed += 1
+                return job
+            if job is head and head.bypassed >= MAX_BYPASS:
+                # 맨 앞 작업이 너무 자주 밀렸으면 메모리가 빌 때까지 아무것도 새로 시작하지 않는다
+                return None
+        return None
+
+    def _busy_locked(self) -> int:
+        return len(self._active) + len(self._spec_active)
+
+    def _submit_locked(self, fn, *args) -> Future:
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # 워커가 비정상 종료(OOM 등)하면 풀 전체를 못 쓰게 되므로 새로 만든다
+            logger.warning("worker pool broken; restarting")
+            self._pool = self._new_pool()
+            return self._pool.submit(fn, *args)
+
+    def _dispatch_locked(self) -> None:
+        while self._pool is not None and self._pending and self._busy_locked() < self.workers:
+            job = self._next_fitting_locked()
+            if job is None:
+                break
+            del self._pending[job.job_id]
+            self.store.mark_running(job.job_id)
+            self._active[job.job_id] = job
+            fut = self._submit_locked(run_job, job.paths, job.out_pdf, job.options)
+            fut.add_done_callback(lambda f, job_id=job.job_id: self._on_done(job_id, f))
+        if self._pending:
+            # 실제 작업이 워커를 기다리면 추측 작업은 멈춘다(다음 checkpoint에서 끝나 워커가 빈다)
+            for job_id in {spec.job_id for spec in self._spec_active}:
+                self._drop_speculation_locked(job_id)
+            return
+        budget = self.admission.memory_budget if self.admission is not None else 0
+        while self._pool is not None and self._speculative and self._busy_locked() < self.workers:
+            spec = self._speculative.popleft()
+            if spec.build_key is not None and budget > 0 and \
+                    sum(job.cost_bytes for job in self._spec_active) + spec.cost_bytes > budget:
+                continue  # 추측 실행은 메모리를 기다리지 않는다
+            self._spec_active.append(spec)
+            fut = self._submit_locked(speculate_job, spec.paths, spec.job_dir, spec.options, spec.build_key is not None)
+            fut.add_done_callback(lambda f, spec=spec: self._on_speculated(spec, f))
+
+    def _drop_speculation_locked(self, job_id: str) -> None:
+        """작업의 추측 실행을 대기열에서 빼고, 실행 중인 것에는 취소를 알린다."""
+        self._speculative = deque(spec for spec in self._speculative if spec.job_id != job_id)
+        self._spec_builds.pop(job_id, None)
+        self._spec_left.pop(job_id, None)
+        running = [spec for spec in self._spec_active if spec.job_id == job_id]
+        if running:
+            request_cancel(os.path.join(running[0].job_dir, SPECULATIVE_DIR), "preempted")
+
+    def _on_speculated(self, spec: _Speculation, fut: Future) -> None:
+        with self._lock:
+            self._spec_active.remove(spec)
+            exc = None if fut.cancelled() else fut.exception()
+            if fut.cancelled() or isinstance(exc, ConversionCancelled):
+                self.spec_stats["preempted"] += 1
+            elif exc is not None:
+                # 입력이 깨졌으면 실제 변환도 실패하므로 나머지 추측 실행은 그만둔다
+                self.spec_stats["failed"] += 1
+                logger.warning("speculative work for job %s failed: %s", spec.job_id, exc)
+                self._drop_speculation_locked(spec.job_id)
+            elif spec.build_key is not None:
+                self.cas.store_result(spec.build_key, Path(speculative_pdf(spec.job_dir)))
+                self.spec_stats["built"] += 1
+            else:
+                self.spec_stats["prepared"] += fut.result()
+            if spec.build_key is None and spec.job_id in self._spec_left:
+                self._spec_left[spec.job_id] -= 1
+                if self._spec_left[spec.job_id] <= 0:
+                    del self._spec_left[spec.job_id]
+                    build = self._spec_builds.pop(spec.job_id, None)
+                    if build is not None:
+                        self._speculative.append(build)
+            self._dispatch_locked()
+
+    def metrics_lines(self) -> List[str]:
+        with self._lock:
+            stats = dict(self.spec_stats)
+        return [
+            "# TYPE capfit_speculative_total counter",
+            *(f'capfit_speculative_total{{event="{k}"}} {n}' for k, n in sorted(stats.items())),
+        ]
+
+    def _on_done(self, job_id: str, fut: Future) -> None:
+        with self._lock:
+            self._active.pop(job_id, None)
+            exc = None if fut.cancelled() else fut.exception()
+            if isinstance(exc, ConversionCancelled):
+                self.store.mark_cancelled(job_id, str(exc))
+                logger.info("job %s cancelled: %s", job_id, exc)
+            elif fut.cancelled() or exc is not None:
+                error = str(exc or "cancelled")
+                self.store.mark_failed(job_id, error)
+                logger.error("job %s failed: %s", job_id, error)
+            else:
+                self.store.mark_done(job_id)
+                if self.cas is not None:
+                    self.cas.remember(self.store, job_id)
+            self._dispatch_locked()
+
+
+class ExternalExecutor:
+    """작업을 공유 대기열(JobStore)에 넣기만 하는 실행기. 실행은 capfit-worker 프로세스가 맡는다.
+
+    uvicorn 워커 여러 개와 capfit-worker 프로세스들이 한 호스트에서 같은 JOBS_DIR을 공유할 때 사용한다.
+    """
+
+    def __init__(self, store: JobStore, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 admission: Optional[AdmissionControl] = None):
+        self.store = store
+        self.queue_size = max(0, int(queue_size))
+        self.admission = admission
+
+    def start(self) -> None:
+        logger.info("external executor: queue_size=%d (run capfit-worker)", self.queue_size)
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+    def submit(self, job_id: str, paths: List[str], out_pdf: str, options: Dict[str, Any],
+               cost: Optional[CostEstimate] = None) -> int:
+        if self.store.count_state("queued") >= self.queue_size:
+            raise QueueFull(f"queue is full ({self.queue_size} waiting)")
+        cost_seconds, cost_bytes = _cost_fields(cost)
+        if self.admission is not None:
+            backlog = self.store.backlog_seconds()
+            if self.admission.backlog_full(backlog + cost_seconds, self._workers()):
+                raise QueueFull(f"backlog is full ({backlog:.0f}s of predicted work)")
+        clear_cancel(os.path.dirname(out_pdf))
+        clear_progress(os.path.dirname(out_pdf))
+        self.store.mark_queued(job_id, options, out_pdf, cost_seconds or None, cost_bytes or None)
+        return self.store.queue_position(job_id)
+
+    def submit_many(self, jobs: List[Submission]) -> List[int]:
+        if self.store.count_state("queued") + len(jobs) > self.queue_size:
+            raise QueueFull(f"queue is full ({self.queue_size} waiting)")
+        if self.admission is not None:
+            backlog = self.store.backlog_seconds()
+            added = sum(_cost_fields(job[4])[0] for job in jobs)
+            if self.admission.backlog_full(backlog + added, self._workers()):
+                raise QueueFull(f"backlog is full ({backlog:.0f}s of predicted work)")
+        positions = []
+        for job_id, paths, out_pdf, options, cost in jobs:
+            clear_cancel(os.path.dirname(out_pdf))
+            clear_progress(os.path.dirname(out_pdf))
+            self.store.mark_queued(job_id, options, out_pdf, *(v or None for v in _cost_fields(cost)))
+            positions.append(self.store.queue_position(job_id))
+        return positions
+
+    def speculate(self, job_id: str, job_dir: str, paths: List[str], options: Dict[str, Any],
+                  build_key: Optional[str] = None, cost: Optional[CostEstimate] = None) -> None:
+        """추측 실행은 local 모드에서만 한다(capfit-worker는 대기열만 본다)."""
+
+    def metrics_lines(self) -> List[str]:
+        return []
+
+    def cancel(self, job_id: str, reason: str) -> bool:
+        if self.store.cancel_queued(job_id, reason):
+            return True
+        job = self.store.get_job(job_id)
+        if job is None or job.state != "running" or not job.output:
+            return False
+        # capfit-worker가 다음 checkpoint에서 멈추고 cancelled로 기록한다
+        request_cancel(os.path.dirname(job.output), reason)
+        return True
+
+    def position(self, job_id: str) -> int:
+        return self.store.queue_position(job_id)
+
+    def eta(self, job_id: str) -> Optional[float]:
+        if self.store.queue_position(job_id) == 0:
+            return None
+        return self.store.seconds_ahead(job_id) / self._workers()
+
+    def _workers(self) -> int:
+        # 워커 수는 알 수 없으므로 지금 실행 중인 작업 수로 어림한다
+        return max(1, self.store.count_state("running"))
+
+    def queue_length(self) -> int:
+        return self.store.count_state("queued")
+
+
+def executor_from_env(store: JobStore, cas: Optional[ContentStore] = None,
+                      admission: Optional[AdmissionControl] = None):
+    """CAPFIT_EXECUTOR에 따라 local(ConversionExecutor) 또는 external(ExternalExecutor)."""
+    kind = os.environ.get("CAPFIT_EXECUTOR", "local").strip().lower()
+    if kind == "external":
+        return ExternalExecutor(store, int(os.environ.get("CAPFIT_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE))), admission)
+    if kind != "local":
+        raise ValueError(f"CAPFIT_EXECUTOR must be 'local' or 'external', got {kind!r}")
+    return ConversionExecutor.from_env(store, cas, admission)
@@ -0,0 +1,137 @@
+"""
+HTTP 캐시/압축
+
+반복 요청이 파이썬 핸들러까지 오지 않게 한다.
+- /static: 템플릿은 static_url()로 내용 해시(?v=)가 붙은 URL을 쓰고, 버전이 맞는 요청은
+  1년 immutable로 캐시한다(내용이 바뀌면 URL이 바뀐다). 버전 없는 요청은 ETag로 재검증.
+- 작업 산출물(업로드 원본, 결과 PDF): 강한 ETag + If-None-Match 304, 바뀌지 않는 URL은 immutable.
+- TextCompression: HTML/JS/CSS/JSON 응답을 gzip으로 압축한다. PDF/이미지(이미 압축됨),
+  SSE/스트리밍, Range(206) 응답은 그대로 보낸다.
+"""
+
+from __future__ import annotations
+import gzip
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 바뀌지 않는 URL(버전/내용 해시가 들어간 URL)
+IMMUTABLE = "max-age=31536000, immutable"
+# 압축할 응답 형식
+COMPRESSIBLE = frozenset({
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+})
+
+
+def file_etag(path: str) -> str:
+    """파일 (inode, 크기, 수정 시각) 기반 강한 ETag. 다시 변환해 바뀐 PDF는 값이 달라진다."""
+    st = os.stat(path)
+    key = f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def not_modified(request_headers: Headers, etag: str) -> bool:
+    """If-None-Match가 etag와 맞으면 True(304로 응답)."""
+    value = request_headers.get("if-none-match")
+    if not value:
+        return False
+    if value.strip() == "*":
+        return True
+    # 압축 응답은 약한 ETag(W/)로 나가므로 비교할 때는 떼고 본다
+    return etag in [tag.strip().removeprefix("W/") for tag in value.split(",")]
+
+
+class VersionedStaticFiles(StaticFiles):
+    """내용 해시 버전(?v=)을 붙인 URL을 만들고, 버전이 맞는 요청은 immutable로 캐시하는 /static."""
+
+    def __init__(self, *, directory: Path, prefix: str = "/static"):
+        super().__init__(directory=str(directory))
+        self.root = Path(directory)
+        self.prefix = prefix.rstrip("/")
+        self._versions: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+    def version(self, name: str) -> str:
+        """파일 내용 해시(앞 10자리). 파일이 바뀌면(크기/시각) 다시 계산한다."""
+        path = self.root / name
+        st = path.stat()
+        key = (st.st_size, st.st_mtime_ns)
+        cached = self._versions.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, hashlib.sha1(path.read_bytes()).hexdigest()[:10])
+            self._versions[name] = cached
+        return cached[1]
+
+    def url(self, name: str) -> str:
+        """템플릿용: /static/<name>?v=<해시>"""
+        return f"{self.prefix}/{name}?v={self.version(name)}"
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        requested = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v", [""])[0]
+        try:
+            current = self.version(os.path.relpath(full_path, self.root))
+        except (OSError, ValueError):
+            current = None
+        # 예전 버전 URL로 새 내용을 1년 캐시하면 안 되므로 버전이 맞을 때만 immutable
+        response.headers["Cache-Control"] = f"public, {IMMUTABLE}" if requested and requested == current else "no-cache"
+        return response
+
+
+class TextCompression:
+    """텍스트 응답 gzip 미들웨어.
+
+    본문을 한 번에 보내는 응답만 압축한다(스트리밍은 첫 조각에 more_body가 있으면 그대로).
+    압축하면 표현이 달라지므로 ETag는 약한 ETag로 바꾼다.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, level: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+        held: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal held
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                if media_type in COMPRESSIBLE:
+                    headers.add_vary_header("Accept-Encoding")
+                if message["status"] == 200 and media_type in COMPRESSIBLE and "content-encoding" not in headers:
+                    held = message  # 본문 첫 조각을 보고 압축 여부를 정한다
+                    return
+                await send(message)
+                return
+            if held is None:
+                await send(message)
+                return
+            start, held = held, None
+            body = message.get("body", b"")
+            if message["type"] != "http.response.body" or message.get("more_body") or len(body) < self.minimum_size:
+                await send(start)
+                await send(message)
+                return
+            compressed = gzip.compress(body, self.level)
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,341 @@
+"""
+업로드 수신 (multipart 스트리밍)
+
+요청 본문을 multipart 파서에 바로 흘려 파일 파트를 작업 폴더에 한 번만 쓴다
+(임시 파일에 받아 두었다가 다시 복사하지 않는다). 파서/디스크 쓰기는 이벤트 루프 밖
+(스레드 풀)에서 묶음 단위로 처리하고, 같은 패스에서
+- sha256 내용 해시
+- 매직 바이트로 본 실제 형식과 헤더의 원본 크기(폭/높이)
+를 구해 JobStore files 테이블에 남긴다. 이후 단계는 이 정보를 보려고 파일을 다시 읽지 않는다.
+
+환경 변수
+- CAPFIT_MAX_UPLOAD_FILE: 파일 하나의 최대 크기 (바이트 또는 K/M/G, 기본 64M)
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import re
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from shared.core import IMAGE_EXTENSIONS, numeric_sort_key
+from .cas import ContentStore
+from .jobstore import FileRecord
+
+DEFAULT_MAX_FILE = 64 * 1024 ** 2
+# 파서로 넘기기 전에 모을 본문 크기(스레드 풀 왕복 횟수를 줄인다)
+FEED_CHUNK = 1024 * 1024
+# 형식/크기를 찾으려고 앞부분을 들고 있는 최대 크기(JPEG는 EXIF 뒤에 SOF가 온다)
+SNIFF_LIMIT = 512 * 1024
+# 파일이 아닌 폼 필드(dpi 등)의 최대 크기
+MAX_FIELD_SIZE = 1024
+FILE_FIELD = "files"
+
+# 형식 → 확장자가 이미지가 아닐 때 붙일 확장자
+FORMAT_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "gif": ".gif", "bmp": ".bmp", "webp": ".webp"}
+_JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class UploadRejected(Exception):
+    """업로드 전체를 거절(잘못된 요청, 파일 크기 초과 등)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ---- 헤더 판별 ----
+def sniff_format(head: bytes) -> Optional[str]:
+    """매직 바이트로 본 이미지 형식. 지원하지 않으면 None (12바이트면 충분)."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head.startswith(b"BM"):
+        return "bmp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def sniff_size(fmt: str, head: bytes) -> Optional[Tuple[int, int]]:
+    """헤더에서 (폭, 높이). 아직 데이터가 모자라거나 찾지 못하면 None."""
+    try:
+        if fmt == "png" and len(head) >= 24:
+            return struct.unpack(">II", head[16:24])
+        if fmt == "gif" and len(head) >= 10:
+            return struct.unpack("<HH", head[6:10])
+        if fmt == "bmp" and len(head) >= 26:
+            if struct.unpack("<I", head[14:18])[0] == 12:  # OS/2 BITMAPCOREHEADER
+                return struct.unpack("<HH", head[18:22])
+            w, h = struct.unpack("<ii", head[18:26])
+            return abs(w), abs(h)
+        if fmt == "webp" and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                w, h = struct.unpack("<HH", head[26:30])
+                return w & 0x3FFF, h & 0x3FFF
+            if chunk == b"VP8L":
+                bits = struct.unpack("<I", head[21:25])[0]
+                return 1 + (bits & 0x3FFF), 1 + ((bits >> 14) & 0x3FFF)
+            if chunk == b"VP8X":
+                return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+        if fmt == "jpeg":
+            return _jpeg_size(head)
+    except struct.error:
+        return None
+    return None
+
+
+def _jpeg_size(head: bytes) -> Optional[Tuple[int, int]]:
+    pos = 2
+    while pos + 4 <= len(head):
+        if head[pos] != 0xFF:
+            return None
+        marker = head[pos + 1]
+        if marker == 0xFF:  # 채움 바이트
+            pos += 1
+            continue
+        if marker in _JPEG_SOF:
+            if pos + 9 > len(head):
+                return None
+            h, w = struct.unpack(">HH", head[pos + 5:pos + 9])
+            return w, h
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # 길이 없는 마커
+            pos += 2
+            continue
+        pos += 2 + struct.unpack(">H", head[pos + 2:pos + 4])[0]
+    return None
+
+
+# ---- 수신 ----
+@dataclass
+class FilePart:
+    """받는 중인 파일 하나(임시 파일). 쓰면서 sha256과 실제 형식/크기(헤더)를 함께 구한다."""
+
+    filename: str
+    tmp_path: Path
+    fh: object
+    hasher: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+    size: int = 0
+    head: bytearray = field(default_factory=bytearray)
+    format: Optional[str] = None
+    dims: Optional[Tuple[int, int]] = None
+    sniffing: bool = True
+
+    def feed(self, data: bytes) -> None:
+        self.fh.write(data)
+        self.hasher.update(data)
+        self.size += len(data)
+        if not self.sniffing:
+            return
+        self.head += data[: SNIFF_LIMIT - len(self.head)]
+        if self.format is None and len(self.head) >= 12:
+            self.format = sniff_format(bytes(self.head[:12]))
+            if self.format is None:
+                self.sniffing = False
+                return
+        if self.format is not None:
+            self.dims = sniff_size(self.format, bytes(self.head))
+            if self.dims is not None or len(self.head) >= SNIFF_LIMIT:
+                self.sniffing = False
+                self.head = bytearray()
+
+
+def store_parts(parts: List[FilePart], job_dir: Path, cas: Optional[ContentStore]) -> List[FileRecord]:
+    """받은 파일들에 주어진 순서대로 최종 이름을 붙여 job_dir에 두고 기록을 만든다."""
+    records: List[FileRecord] = []
+    for idx, part in enumerate(parts, start=1):
+        # 파일명에서 안전하지 않은 문자 제거, 중복 방지를 위해 인덱스 추가
+        stem, ext = os.path.splitext(safe_name(part.filename))
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            ext = FORMAT_EXTENSIONS[part.format or "png"]
+        name = f"{stem}_{idx:03d}{ext}"
+        path = job_dir / name
+        sha256 = part.hasher.hexdigest()
+        if cas is not None:
+            # 같은 내용이 이미 올라온 적 있으면 그 원본을 링크(디스크에는 한 벌만)
+            cas.adopt(part.tmp_path, sha256, path)
+        else:
+            os.replace(part.tmp_path, path)
+        width, height = part.dims or (None, None)
+        records.append(FileRecord(name, str(path), idx - 1, part.size,
+                                  sha256, part.format, width, height))
+    return records
+
+
+def safe_name(name: str) -> str:
+    """파일 이름에 쓸 수 없는 문자를 _로."""
+    return re.sub(r'[<>:"/\\|?*]', '_', name)
+
+
+class UploadIngest:
+    """multipart 본문을 받아 작업 폴더에 파일로 쓰는 수신기.
+
+    feed()/finish()는 블로킹(디스크 쓰기)이므로 consume()이 스레드 풀에서 부른다.
+    이미지가 아닌 파일 파트는 버리고 skipped에 이름을 남긴다.
+    sort_by_name=False면 파일명 숫자 순으로 정렬하지 않고 보낸 순서를 그대로 쓴다(API).
+    """
+
+    def __init__(self, job_dir: Path, content_type: str, *, max_file_size: int = DEFAULT_MAX_FILE,
+                 max_pixels: int = 0, cas: Optional[ContentStore] = None, sort_by_name: bool = True):
+        ctype, opts = parse_options_header(content_type or "")
+        boundary = opts.get(b"boundary")
+        if ctype != b"multipart/form-data" or not boundary:
+            raise UploadRejected("multipart/form-data 요청이 아닙니다.")
+        self.job_dir = Path(job_dir)
+        self.max_file_size = int(max_file_size)
+        self.max_pixels = int(max_pixels)
+        self.cas = cas
+        self.sort_by_name = sort_by_name
+        self.fields: Dict[str, str] = {}
+        self.skipped: List[str] = []
+        self._done: List[FilePart] = []
+        self._count = 0
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._field: Optional[Tuple[str, bytearray]] = None
+        self._part: Optional[FilePart] = None
+        self._error: Optional[UploadRejected] = None
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    async def consume(self, stream: AsyncIterator[bytes]) -> List[FileRecord]:
+        """요청 본문 스트림을 끝까지 받아 저장한 파일 목록(기본: 파일명 숫자 순)을 반환."""
+        buf = bytearray()
+        try:
+            async for chunk in stream:
+                buf += chunk
+                if len(buf) >= FEED_CHUNK:
+                    await run_in_threadpool(self.feed, bytes(buf))
+                    buf.clear()
+            if buf:
+                await run_in_threadpool(self.feed, bytes(buf))
+            return await run_in_threadpool(self.finish)
+        except BaseException:
+            await run_in_threadpool(self.abort)
+            raise
+
+    def feed(self, data: bytes) -> None:
+        self._parser.write(data)
+        if self._error is not None:
+            raise self._error
+
+    def finish(self) -> List[FileRecord]:
+        """받은 파일을 업로드 파일명 숫자 순(또는 보낸 순서)으로 최종 이름을 붙인다."""
+        self._parser.finalize()
+        if self._part is not None:
+            raise UploadRejected("업로드가 중간에 끊겼습니다.")
+        parts = list(self._done)
+        if self.sort_by_name:
+            parts.sort(key=lambda p: numeric_sort_key(p.filename))
+        return store_parts(parts, self.job_dir, self.cas)
+
+    def abort(self) -> None:
+        """받던 파일을 닫고 지운다(작업 폴더 삭제는 호출한 쪽에서)."""
+        for part in [self._part, *self._done]:
+            if part is None:
+                continue
+            part.fh.close()
+            try:
+                os.remove(part.tmp_path)
+            except OSError:
+                pass
+        self._part = None
+        self._done = []
+
+    def _feed_part(self, part: FilePart, data: bytes) -> Optional[UploadRejected]:
+        """파일 파트에 데이터를 쓰고, 크기/화소 한도를 넘으면 거절 사유를 반환."""
+        if part.size + len(data) > self.max_file_size:
+            return UploadRejected(
+                f"파일이 너무 큽니다: {part.filename} (최대 {self.max_file_size // (1024 * 1024)}MB)",
+                status_code=413,
+            )
+        part.feed(data)
+        dims = part.dims
+        if self.max_pixels > 0 and dims is not None and dims[0] * dims[1] > self.max_pixels:
+            # 헤더만 보고 나머지를 받기 전에 거절
+            return UploadRejected(
+                f"이미지가 너무 큽니다: {part.filename} ({dims[0]}×{dims[1]}, "
+                f"한 장 최대 {self.max_pixels / 1e6:.0f}백만 화소)",
+                status_code=413,
+            )
+        return None
+
+    # ---- 파서 콜백 ----
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, opts = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = opts.get(b"name", b"").decode("utf-8", "replace")
+        filename = opts.get(b"filename")
+        if filename is None:
+            self._field = (name, bytearray())
+            return
+        if name != FILE_FIELD:
+            self._field = None
+            return
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self._count += 1
+        tmp = self.job_dir / f".upload-{self._count}"
+        # 브라우저마다 경로를 붙여 보내기도 하므로 마지막 조각만 쓴다
+        base = os.path.basename(filename.decode("utf-8", "replace").replace("\\", "/")) or "upload.png"
+        self._part = FilePart(base, tmp, open(tmp, "wb"))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._error is not None:
+            return
+        if self._part is not None:
+            self._error = self._feed_part(self._part, data[start:end])
+        elif self._field is not None:
+            if len(self._field[1]) + (end - start) > MAX_FIELD_SIZE:
+                self._error = UploadRejected(f"폼 필드가 너무 깁니다: {self._field[0]}")
+                return
+            self._field[1].extend(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._part is not None:
+            part, self._part = self._part, None
+            part.fh.close()
+            if part.format is None:
+                # 매직 바이트가 이미지가 아니면(확장자만 이미지인 경우 포함) 버린다
+                os.remove(part.tmp_path)
+                self.skipped.append(part.filename)
+            else:
+                self._done.append(part)
+        elif self._field is not None:
+            name, value = self._field
+            self.fields[name] = value.decode("utf-8", "replace")
+        self._field = None
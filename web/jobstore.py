@@ -0,0 +1,424 @@
+"""
+웹 작업 메타데이터 저장소 (SQLite)
+
+작업 폴더를 매 요청마다 훑는 대신 업로드 파일 목록/순서, 변환 파라미터, 상태, 시각을
+JOBS_DIR 아래 SQLite 파일 하나에 기록한다. 상태는 결과 파일 유무가 아니라 이 기록으로
+판단하므로, 쓰는 중인 PDF가 완료로 보이는 일이 없다.
+
+같은 파일을 여러 프로세스(uvicorn 워커, capfit-worker)가 공유하는 작업 대기열로도 쓴다.
+워커는 claim_next로 대기 작업을 원자적으로 가져가고, 실행 중에는 heartbeat를 갱신한다.
+WAL 모드의 잠금은 같은 호스트의 공유 메모리(-shm)에 기대므로 모든 프로세스가 한 호스트에 있어야
+한다. NFS/SMB 같은 네트워크 파일 시스템에서는 두 워커가 같은 작업을 가져가거나 DB가 깨질 수 있어
+그런 위치의 DB는 열지 않는다.
+
+상태: uploaded → queued → running → done | failed | cancelled
+(대기 중에 취소하면 queued → cancelled)
+"""
+
+from __future__ import annotations
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DB_NAME = "jobs.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    state       TEXT NOT NULL,
+    params      TEXT NOT NULL DEFAULT '{}',
+    output      TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    queued_at   REAL,
+    started_at  REAL,
+    finished_at REAL,
+    worker      TEXT,
+    heartbeat_at REAL,
+    accessed_at REAL,
+    cost_seconds REAL,
+    cost_bytes  INTEGER,
+    watched_at  REAL,
+    batch_id    TEXT,
+    label       TEXT,
+    origin      TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, queued_at);
+CREATE TABLE IF NOT EXISTS files (
+    job_id   TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    name     TEXT NOT NULL,
+    path     TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    size     INTEGER NOT NULL DEFAULT 0,
+    sha256   TEXT,
+    format   TEXT,
+    width    INTEGER,
+    height   INTEGER,
+    PRIMARY KEY (job_id, name)
+);
+"""
+
+
+# 이전 스키마에서 추가된 열 (기존 DB는 열을 덧붙여 올린다)
+_ADDED_COLUMNS = {
+    "jobs": {"worker": "TEXT", "heartbeat_at": "REAL", "accessed_at": "REAL",
+             "cost_seconds": "REAL", "cost_bytes": "INTEGER", "watched_at": "REAL",
+             "batch_id": "TEXT", "label": "TEXT", "origin": "TEXT"},
+    "files": {"sha256": "TEXT", "format": "TEXT", "width": "INTEGER", "height": "INTEGER"},
+}
+# 덧붙인 열에 거는 색인(열을 올린 뒤에 만든다)
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs(batch_id);
+"""
+# WAL 잠금을 믿을 수 없는 네트워크/클러스터 파일 시스템
+NETWORK_FILESYSTEMS = frozenset({
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p", "ceph", "glusterfs", "lustre",
+    "gpfs", "fuse.sshfs", "fuse.glusterfs", "fuse.cephfs", "fuse.s3fs", "fuse.rclone",
+})
+_FILE_COLUMNS = "name, path, position, size, sha256, format, width, height"
+# 실행 중이거나 곧 실행될 작업 (정리 대상에서 항상 제외)
+IN_FLIGHT = ("queued", "running")
+
+
+@dataclass
+class JobRecord:
+    id: str
+    state: str
+    params: Dict[str, Any]
+    output: Optional[str]
+    error: Optional[str]
+    created_at: float
+    queued_at: Optional[float]
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    worker: Optional[str] = None
+    heartbeat_at: Optional[float] = None
+    accessed_at: Optional[float] = None
+    # 헤더 기반 예측 비용 (web.cost)
+    cost_seconds: Optional[float] = None
+    cost_bytes: Optional[int] = None
+    # 마지막으로 진행 상황을 조회한 시각 (아무도 보지 않는 작업 자동 취소 기준)
+    watched_at: Optional[float] = None
+    # ZIP 일괄 업로드로 함께 만든 작업 묶음과 그 안의 이름(폴더 이름)
+    batch_id: Optional[str] = None
+    label: Optional[str] = None
+    # 작업을 만든 곳: ui(브라우저 업로드/결과 페이지) | api(/api/v1, 나중에 받아 가는 작업)
+    origin: Optional[str] = None
+
+    @property
+    def last_used(self) -> float:
+        """LRU 기준 시각: 마지막 열람, 없으면 완료/생성 시각."""
+        return self.accessed_at or self.finished_at or self.created_at
+
+
+@dataclass
+class FileRecord:
+    name: str
+    path: str
+    position: int
+    size: int
+    # 업로드 중 한 번에 구한 내용 해시와 헤더 정보(형식, 원본 크기)
+    sha256: Optional[str] = None
+    format: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def filesystem_type(path: Path) -> Optional[str]:
+    """path가 있는 파일 시스템 종류(/proc/self/mounts 기준). 알 수 없으면(리눅스가 아니면) None."""
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+    target = os.path.realpath(path)
+    best, fstype = "", None
+    for point, kind in mounts:
+        # 마운트 지점의 공백 등은 8진수로 이스케이프되어 있다(\040)
+        point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), point)
+        inside = target == point or target.startswith(point.rstrip("/") + "/")
+        if inside and len(point) >= len(best):
+            best, fstype = point, kind
+    return fstype
+
+
+class JobStore:
+    """스레드마다 연결을 따로 여는 얇은 SQLite 래퍼 (WAL, 한 호스트의 여러 프로세스 공유 가능)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fstype = filesystem_type(self.path.parent)
+        if fstype in NETWORK_FILESYSTEMS:
+            raise RuntimeError(
+                f"job database {self.path} is on a network filesystem ({fstype}); SQLite WAL needs a local "
+                "disk shared by processes on one host. Set CAPFIT_JOBS_DIR to a local path."
+            )
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            for table, columns in _ADDED_COLUMNS.items():
+                have = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+                for name, decl in columns.items():
+                    if name not in have:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+            conn.executescript(_INDEXES)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # ---- 작업 ----
+    def create_job(self, job_id: str, files: Iterable[FileRecord], *, origin: str = "ui",
+                   batch_id: Optional[str] = None, label: Optional[str] = None) -> None:
+        """업로드된 파일 목록을 주어진 순서대로 기록(각 항목의 position은 무시)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT INTO jobs (id, state, created_at, batch_id, label, origin) VALUES (?, 'uploaded', ?, ?, ?, ?)",
+                (job_id, time.time(), batch_id, label, origin),
+            )
+            conn.executemany(
+                f"INSERT INTO files (job_id, {_FILE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(job_id, f.name, f.path, i, f.size, f.sha256, f.format, f.width, f.height)
+                 for i, f in enumerate(files)],
+            )
+
+    def get_job(self, job_id: str) -> Optional[JobRecord]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        data = dict(row)
+        data["params"] = json.loads(data["params"] or "{}")
+        return JobRecord(**data)
+
+    def jobs_in_state(self, *states: str) -> List[JobRecord]:
+        marks = ",".join("?" * len(states))
+        rows = self._conn().execute(
+            f"SELECT id FROM jobs WHERE state IN ({marks}) ORDER BY queued_at, created_at", states
+        ).fetchall()
+        return [job for job in (self.get_job(r["id"]) for r in rows) if job is not None]
+
+    def batch_jobs(self, batch_id: str) -> List[JobRecord]:
+        """묶음의 작업들(만든 순서)."""
+        rows = self._conn().execute(
+            "SELECT id FROM jobs WHERE batch_id = ? ORDER BY created_at, rowid", (batch_id,)
+        ).fetchall()
+        return [job for job in (self.get_job(r["id"]) for r in rows) if job is not None]
+
+    def touch(self, job_id: str) -> None:
+        """결과/원본을 열람한 시각 기록(디스크 할당량 초과 시 LRU 정리 기준)."""
+        self._conn().execute("UPDATE jobs SET accessed_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def watch(self, job_id: str) -> None:
+        """진행 상황을 조회한 시각 기록."""
+        self._conn().execute("UPDATE jobs SET watched_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def unwatched_jobs(self, older_than: float) -> List[JobRecord]:
+        """older_than초 넘게 아무도 조회하지 않은 대기/실행 중 브라우저(ui) 작업.
+
+        API 작업은 제출해 두고 나중에 받아 가므로 조회가 없어도 버려진 것이 아니다.
+        """
+        marks = ",".join("?" * len(IN_FLIGHT))
+        rows = self._conn().execute(
+            f"SELECT id FROM jobs WHERE state IN ({marks}) AND COALESCE(origin, 'ui') = 'ui' "
+            "AND COALESCE(watched_at, queued_at) < ?",
+            (*IN_FLIGHT, time.time() - older_than),
+        ).fetchall()
+        return [job for job in (self.get_job(r["id"]) for r in rows) if job is not None]
+
+    def state_counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        return {r["state"]: r["n"] for r in rows}
+
+    def idle_jobs(self) -> List[JobRecord]:
+        """실행 중/대기 중이 아닌 작업 전체 (정리 후보)."""
+        marks = ",".join("?" * len(IN_FLIGHT))
+        rows = self._conn().execute(f"SELECT * FROM jobs WHERE state NOT IN ({marks})", IN_FLIGHT).fetchall()
+        jobs = []
+        for row in rows:
+            data = dict(row)
+            data["params"] = json.loads(data["params"] or "{}")
+            jobs.append(JobRecord(**data))
+        return jobs
+
+    def delete_job(self, job_id: str) -> bool:
+        """작업 기록 삭제. 그 사이 대기열에 들어간 작업이면 지우지 않고 False."""
+        marks = ",".join("?" * len(IN_FLIGHT))
+        cur = self._conn().execute(
+            f"DELETE FROM jobs WHERE id = ? AND state NOT IN ({marks})", (job_id, *IN_FLIGHT)
+        )
+        return cur.rowcount == 1
+
+    def drop_inputs(self, job_id: str) -> List[FileRecord]:
+        """업로드 원본 기록을 지우고 지운 목록 반환(실행 중/대기 중이면 빈 목록)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["state"] in IN_FLIGHT:
+                return []
+            files = self.list_files(job_id)
+            conn.execute("DELETE FROM files WHERE job_id = ?", (job_id,))
+        return files
+
+    # ---- 파일 ----
+    def list_files(self, job_id: str) -> List[FileRecord]:
+        rows = self._conn().execute(
+            f"SELECT {_FILE_COLUMNS} FROM files WHERE job_id = ? ORDER BY position", (job_id,)
+        ).fetchall()
+        return [FileRecord(**dict(r)) for r in rows]
+
+    def get_file(self, job_id: str, name: str) -> Optional[FileRecord]:
+        row = self._conn().execute(
+            f"SELECT {_FILE_COLUMNS} FROM files WHERE job_id = ? AND name = ?", (job_id, name)
+        ).fetchone()
+        return FileRecord(**dict(row)) if row is not None else None
+
+    def set_order(self, job_id: str, names: List[str]) -> List[FileRecord]:
+        """names 순서대로 재배열(목록에 없는 파일은 기존 순서대로 뒤에)하고 결과 목록 반환."""
+        files = self.list_files(job_id)
+        rank = {name: i for i, name in enumerate(dict.fromkeys(names))}
+        files.sort(key=lambda f: (rank.get(f.name, len(rank)), f.position))
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE files SET position = ? WHERE job_id = ? AND name = ?",
+                [(i, job_id, f.name) for i, f in enumerate(files)],
+            )
+        for i, f in enumerate(files):
+            f.position = i
+        return files
+
+    # ---- 대기열 ----
+    def count_state(self, state: str) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (state,)).fetchone()[0]
+
+    def queue_position(self, job_id: str) -> int:
+        """대기 순번(1 = 다음 차례). 대기 중이 아니면 0."""
+        row = self._conn().execute(
+            "SELECT queued_at FROM jobs WHERE id = ? AND state = 'queued'", (job_id,)
+        ).fetchone()
+        if row is None:
+            return 0
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND queued_at <= ?", (row["queued_at"],)
+        ).fetchone()[0]
+
+    def backlog_seconds(self) -> float:
+        """대기/실행 중인 작업의 예상 변환 시간 합."""
+        marks = ",".join("?" * len(IN_FLIGHT))
+        return self._conn().execute(
+            f"SELECT COALESCE(SUM(cost_seconds), 0) FROM jobs WHERE state IN ({marks})", IN_FLIGHT
+        ).fetchone()[0]
+
+    def seconds_ahead(self, job_id: str) -> float:
+        """이 작업 앞(자신 포함)에 대기 중인 작업들의 예상 변환 시간 합. 대기 중이 아니면 0."""
+        row = self._conn().execute(
+            "SELECT queued_at FROM jobs WHERE id = ? AND state = 'queued'", (job_id,)
+        ).fetchone()
+        if row is None:
+            return 0.0
+        return self._conn().execute(
+            "SELECT COALESCE(SUM(cost_seconds), 0) FROM jobs WHERE state = 'queued' AND queued_at <= ?",
+            (row["queued_at"],),
+        ).fetchone()[0]
+
+    def claim_next(self, worker: str) -> Optional[JobRecord]:
+        """가장 오래 기다린 대기 작업 하나를 running으로 바꾸며 가져간다(여러 워커 동시 안전)."""
+        conn = self._conn()
+        with conn:
+            # 쓰기 잠금을 먼저 잡아 두 워커가 같은 작업을 고르지 않게 한다
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE state = 'queued' ORDER BY queued_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                (worker, now, now, row["id"]),
+            )
+        return self.get_job(row["id"])
+
+    def heartbeat(self, job_id: str, worker: str) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND state = 'running'",
+            (time.time(), job_id, worker),
+        )
+
+    def requeue_stale(self, older_than: float) -> int:
+        """heartbeat가 older_than초 넘게 끊긴 실행 중 작업(죽은 워커)을 다시 대기열로."""
+        cur = self._conn().execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, started_at = NULL "
+            "WHERE state = 'running' AND worker IS NOT NULL AND heartbeat_at < ?",
+            (time.time() - older_than,),
+        )
+        return cur.rowcount
+
+    # ---- 상태 전이 ----
+    def mark_queued(self, job_id: str, params: Dict[str, Any], output: str,
+                    cost_seconds: Optional[float] = None, cost_bytes: Optional[int] = None) -> None:
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET state = 'queued', params = ?, output = ?, error = NULL, queued_at = ?, watched_at = ?, "
+            "started_at = NULL, finished_at = NULL, worker = NULL, cost_seconds = ?, cost_bytes = ? WHERE id = ?",
+            (json.dumps(params), output, now, now, cost_seconds, cost_bytes, job_id),
+        )
+
+    def mark_reused(self, job_id: str, params: Dict[str, Any], output: str) -> None:
+        """같은 변환 결과를 재사용: 대기열을 거치지 않고 바로 done."""
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET state = 'done', params = ?, output = ?, error = NULL, queued_at = ?, "
+            "started_at = ?, finished_at = ?, worker = NULL WHERE id = ?",
+            (json.dumps(params), output, now, now, now, job_id),
+        )
+
+    def mark_running(self, job_id: str) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET state = 'running', started_at = ? WHERE id = ?", (time.time(), job_id)
+        )
+
+    def mark_done(self, job_id: str, worker: Optional[str] = None) -> None:
+        self._finish(job_id, "done", None, worker)
+
+    def mark_failed(self, job_id: str, error: str, worker: Optional[str] = None) -> None:
+        self._finish(job_id, "failed", error, worker)
+
+    def mark_cancelled(self, job_id: str, reason: str, worker: Optional[str] = None) -> None:
+        """실행 중에 취소되어 멈춘 작업."""
+        self._finish(job_id, "cancelled", reason, worker)
+
+    def cancel_queued(self, job_id: str, reason: str) -> bool:
+        """아직 대기 중인 작업을 바로 취소. 그 사이 워커가 가져갔으면 False."""
+        cur = self._conn().execute(
+            "UPDATE jobs SET state = 'cancelled', error = ?, finished_at = ? WHERE id = ? AND state = 'queued'",
+            (reason, time.time(), job_id),
+        )
+        return cur.rowcount == 1
+
+    def _finish(self, job_id: str, state: str, error: Optional[str], worker: Optional[str]) -> None:
+        # worker를 주면 그 워커가 아직 맡고 있을 때만 기록(다시 대기열로 간 작업 보호)
+        sql = "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE id = ? AND state = 'running'"
+        args: Tuple[Any, ...] = (state, error, time.time(), job_id)
+        if worker is not None:
+            sql += " AND worker = ?"
+            args += (worker,)
+        self._conn().execute(sql, args)
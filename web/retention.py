@@ -0,0 +1,268 @@
+"""
+작업 폴더 정리 (보존 기간 + 디스크 할당량)
+
+백그라운드 스레드가 주기적으로
+- 입력 보존 기간(CAPFIT_INPUT_TTL)이 지난 업로드 원본을 지우고
+  (변환하지 않고 버려진 작업은 작업 전체를 지운다)
+- 결과 보존 기간(CAPFIT_OUTPUT_TTL)이 지난 작업을 통째로 지우고
+- 작업 폴더 전체가 할당량(CAPFIT_DISK_QUOTA)을 넘으면 가장 오래 열람되지 않은 작업부터 지운다.
+- 내용 주소 저장소(cas)에서 어느 작업도 링크하지 않는 원본/결과를 지운다.
+대기 중/실행 중인 작업은 어떤 경우에도 지우지 않는다(JobStore가 조건부로 삭제).
+
+환경 변수 (시간은 초, 0이면 끔)
+- CAPFIT_INPUT_TTL: 기본 86400 (1일)
+- CAPFIT_OUTPUT_TTL: 기본 604800 (7일)
+- CAPFIT_DISK_QUOTA: 바이트 또는 K/M/G 접미사 (기본 0 = 제한 없음)
+- CAPFIT_GC_INTERVAL: 정리 주기, 기본 300
+"""
+
+from __future__ import annotations
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .cas import ContentStore
+from .jobstore import JobRecord, JobStore
+from .thumbs import THUMB_DIR
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """'500M', '10G', '1048576' → 바이트."""
+    text = text.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in _UNITS else ""
+    return int(float(text[: len(text) - len(unit)] or 0) * _UNITS[unit])
+
+
+def _dir_size(path: Path, seen: Optional[Set[Tuple[int, int]]] = None) -> int:
+    """폴더 아래 파일 크기 합. 하드 링크(cas 공유 파일)는 한 번만 센다."""
+    seen = set() if seen is None else seen
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_nlink > 1:
+                            if (st.st_dev, st.st_ino) in seen:
+                                continue
+                            seen.add((st.st_dev, st.st_ino))
+                        total += st.st_size
+                    elif entry.is_dir(follow_symlinks=False):
+                        total += _dir_size(Path(entry.path), seen)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
+
+def _freeable_size(path: Path, shared_links: int = 0) -> int:
+    """폴더를 지우면 (cas 정리 후) 실제로 비는 크기.
+
+    하드 링크된 파일은 폴더 밖의 링크가 shared_links(cas의 링크 수) 이하일 때, 즉 이 폴더가 마지막
+    사용자일 때만 센다. 다른 작업이 같은 원본/결과를 링크하고 있으면 지워도 공간이 비지 않는다.
+    """
+    links: Counter = Counter()
+    sizes: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            links[key] += 1
+            sizes[key] = (st.st_size, st.st_nlink)
+    return sum(size for key, (size, nlink) in sizes.items() if nlink - links[key] <= shared_links)
+
+
+class JobCollector:
+    """보존 기간/할당량 기반 작업 정리기. 정리 결과는 metrics 카운터에 누적한다."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        jobs_dir: Path,
+        *,
+        input_ttl: float = 86400.0,
+        output_ttl: float = 604800.0,
+        quota_bytes: int = 0,
+        interval: float = 300.0,
+        cas: Optional[ContentStore] = None,
+    ):
+        self.store = store
+        self.cas = cas
+        self.jobs_dir = Path(jobs_dir)
+        self.input_ttl = float(input_ttl)
+        self.output_ttl = float(output_ttl)
+        self.quota_bytes = int(quota_bytes)
+        self.interval = max(1.0, float(interval))
+        self.evicted: Counter = Counter()  # 사유별 정리 횟수
+        self.freed_bytes: Counter = Counter()  # 사유별 확보 용량
+        self.runs = 0
+        self.last_run_seconds = 0.0
+        self.disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, store: JobStore, jobs_dir: Path, cas: Optional[ContentStore] = None) -> "JobCollector":
+        return cls(
+            store,
+            jobs_dir,
+            input_ttl=float(os.environ.get("CAPFIT_INPUT_TTL", "86400")),
+            output_ttl=float(os.environ.get("CAPFIT_OUTPUT_TTL", "604800")),
+            quota_bytes=parse_size(os.environ.get("CAPFIT_DISK_QUOTA", "0")),
+            interval=float(os.environ.get("CAPFIT_GC_INTERVAL", "300")),
+            cas=cas,
+        )
+
+    # ---- 수명 ----
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="capfit-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.collect_once()
+            except Exception:  # 정리 실패로 서버가 멈추면 안 된다
+                logger.exception("job collection failed")
+
+    # ---- 정리 ----
+    def collect_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        """한 번 정리하고 이번 회차의 사유별 정리 건수를 반환."""
+        now = time.time() if now is None else now
+        t0 = time.perf_counter()
+        counts: Counter = Counter()
+        for job in self.store.idle_jobs():
+            reason = self._expired(job, now)
+            if reason == "abandoned" or reason == "output_ttl":
+                if self._evict_job(job.id, reason):
+                    counts[reason] += 1
+            elif reason == "input_ttl":
+                if self._evict_inputs(job.id):
+                    counts[reason] += 1
+
+        # 보존 기간으로 링크가 끊긴 cas 파일을 먼저 지워야 할당량 사용량이 실제와 맞는다
+        self._sweep_cas()
+        if self.quota_bytes > 0:
+            usage = _dir_size(self.jobs_dir)
+            # 가장 오래 열람되지 않은 작업부터. 다른 작업과 공유하는 원본/결과는 마지막 작업을 지울 때만
+            # 빈다(링크 수는 앞 작업을 지울 때마다 줄어드므로 지우기 직전에 잰다)
+            for job in sorted(self.store.idle_jobs(), key=lambda j: j.last_used):
+                if usage <= self.quota_bytes:
+                    break
+                size = self._freeable_size(job.id)
+                if self._evict_job(job.id, "quota", size):
+                    usage -= size
+                    counts["quota"] += 1
+
+        self._sweep_cas()
+
+        with self._lock:
+            self.runs += 1
+            self.last_run_seconds = time.perf_counter() - t0
+            self.disk_bytes = _dir_size(self.jobs_dir)
+        if counts:
+            logger.info("job collection: %s", dict(counts))
+        return dict(counts)
+
+    def _sweep_cas(self) -> None:
+        if self.cas is None:
+            return
+        freed = self.cas.sweep()
+        if freed:
+            with self._lock:
+                self.freed_bytes["cas"] += freed
+
+    def _expired(self, job: JobRecord, now: float) -> Optional[str]:
+        if job.state == "uploaded":
+            # 변환하지 않고 버려진 업로드
+            if self.input_ttl > 0 and now - job.created_at > self.input_ttl:
+                return "abandoned"
+            return None
+        finished = job.finished_at or job.created_at
+        if self.output_ttl > 0 and now - finished > self.output_ttl:
+            return "output_ttl"
+        if self.input_ttl > 0 and now - finished > self.input_ttl:
+            return "input_ttl"
+        return None
+
+    def _freeable_size(self, job_id: str) -> int:
+        return _freeable_size(self.jobs_dir / job_id, 1 if self.cas is not None else 0)
+
+    def _evict_job(self, job_id: str, reason: str, size: Optional[int] = None) -> bool:
+        job_dir = self.jobs_dir / job_id
+        size = self._freeable_size(job_id) if size is None else size
+        if not self.store.delete_job(job_id):
+            return False
+        shutil.rmtree(job_dir, ignore_errors=True)
+        with self._lock:
+            self.evicted[reason] += 1
+            self.freed_bytes[reason] += size
+        return True
+
+    def _evict_inputs(self, job_id: str) -> bool:
+        files = self.store.drop_inputs(job_id)
+        if not files:
+            return False
+        freed = 0
+        shared_links = 1 if self.cas is not None else 0
+        for f in files:
+            try:
+                st = os.lstat(f.path)
+                os.remove(f.path)
+                # 다른 작업도 링크한 원본은 공간이 비지 않는다
+                if st.st_nlink - 1 <= shared_links:
+                    freed += st.st_size
+            except OSError:
+                continue
+        from .executor import PARTS_DIR  # executor → cost → retention 순환 import를 피한다
+
+        # 원본에서 만든 썸네일/리사이즈 캐시도 함께 정리
+        for derived in (THUMB_DIR, PARTS_DIR):
+            path = self.jobs_dir / job_id / derived
+            freed += _dir_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self.evicted["input_ttl"] += 1
+            self.freed_bytes["input_ttl"] += freed
+        return True
+
+    # ---- 지표 ----
+    def metrics_lines(self) -> List[str]:
+        """Prometheus 텍스트 형식 지표 줄."""
+        with self._lock:
+            lines = [
+                "# TYPE capfit_gc_evictions_total counter",
+                *(f'capfit_gc_evictions_total{{reason="{r}"}} {n}' for r, n in sorted(self.evicted.items())),
+                "# TYPE capfit_gc_freed_bytes_total counter",
+                *(f'capfit_gc_freed_bytes_total{{reason="{r}"}} {n}' for r, n in sorted(self.freed_bytes.items())),
+                "# TYPE capfit_gc_runs_total counter",
+                f"capfit_gc_runs_total {self.runs}",
+                "# TYPE capfit_gc_last_run_seconds gauge",
+                f"capfit_gc_last_run_seconds {self.last_run_seconds:.6f}",
+                "# TYPE capfit_jobs_dir_bytes gauge",
+                f"capfit_jobs_dir_bytes {self.disk_bytes}",
+                "# TYPE capfit_disk_quota_bytes gauge",
+                f"capfit_disk_quota_bytes {self.quota_bytes}",
+            ]
+        return lines
@@ -1,51 +1,167 @@
 from __future__ import annotations
+import asyncio
+import hashlib
+import json
 import os
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, Request, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, Request, Form
 import re
 import shutil
-from typing import List
-from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse, Response
-from fastapi.staticfiles import StaticFiles
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
-from shared.core import (
-    build_pdf_two_columns_from_source,
-    build_pdf_two_columns_from_sources,
-)
 from shared import __version__ as CAPFIT_VERSION
+from shared.core import compute_two_column_layout, numeric_sort_key
+from .archive import ArchiveGroup, ArchiveIngest, ResultArchive
+from .cas import ContentStore, result_key
+from .cost import AdmissionControl, JobTooLarge
+from .httpcache import IMMUTABLE, TextCompression, VersionedStaticFiles, file_etag, not_modified
+from .executor import QueueFull, clear_progress, executor_from_env, part_path, preview_path, read_cancel, read_progress
+from .jobstore import DB_NAME, IN_FLIGHT, FileRecord, JobStore
+from .ingest import UploadIngest, UploadRejected
+from .retention import JobCollector, parse_size
+from .watchdog import AbandonWatch
+from . import thumbs
 
 
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
-JOBS_DIR = BASE_DIR / "jobs"
-
-app = FastAPI(title="Capfit Web", description="긴 캡처를 A4 세로 2단 PDF로 변환")
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-os.makedirs(JOBS_DIR, exist_ok=True)
-app.mount("/jobs", StaticFiles(directory=str(JOBS_DIR)), name="jobs")
+# 업로드/결과/작업 DB 위치. capfit-worker와 공유하려면 같은 호스트의 같은 로컬 경로를 가리키게 한다
+JOBS_DIR = Path(os.environ.get("CAPFIT_JOBS_DIR") or BASE_DIR / "jobs").resolve()
+# 업로드 파일 하나의 최대 크기
+MAX_UPLOAD_FILE = parse_size(os.environ.get("CAPFIT_MAX_UPLOAD_FILE", "64M"))
+# ZIP 일괄 업로드: 작업(폴더) 수 / 풀어낸 크기 합 한도
+BATCH_MAX_JOBS = int(os.environ.get("CAPFIT_BATCH_MAX_JOBS", "20"))
+MAX_ARCHIVE = parse_size(os.environ.get("CAPFIT_MAX_ARCHIVE", "2G"))
+# 리뷰 중 추측 실행: prep(기본, 입력 리사이즈) | build(+기본 순서 PDF) | off
+SPECULATE = os.environ.get("CAPFIT_SPECULATE", "prep").strip().lower()
+
+store = JobStore(JOBS_DIR / DB_NAME)
+cas = ContentStore.from_env(JOBS_DIR)
+admission = AdmissionControl.from_env()
+executor = executor_from_env(store, cas, admission)
+collector = JobCollector.from_env(store, JOBS_DIR, cas)
+watch = AbandonWatch.from_env(store, executor)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor.start()
+    collector.start()
+    watch.start()
+    try:
+        yield
+    finally:
+        watch.stop()
+        collector.stop()
+        thumbs.shutdown()
+        executor.shutdown(wait=True)
+
+
+app = FastAPI(title="Capfit Web", description="긴 캡처를 A4 세로 2단 PDF로 변환", lifespan=lifespan)
+app.add_middleware(TextCompression, minimum_size=1024)
+static = VersionedStaticFiles(directory=STATIC_DIR)
+app.mount("/static", static, name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+templates.env.globals["static_url"] = static.url
 
 
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+# SSE 상태 확인 주기(초) / 변화가 없을 때 연결 유지용 주석 간격(초)
+SSE_INTERVAL = 0.5
+SSE_KEEPALIVE = 15.0
+FINAL_STATES = ("done", "failed", "cancelled", "unknown")
+# 조회 시각(watched_at)은 이 간격(초)보다 자주 기록하지 않는다(SSE는 0.5초마다 조회)
+WATCH_RESOLUTION = 5.0
+USER_CANCEL_REASON = "변환을 취소했습니다."
+DISCONNECT_REASON = "요청한 쪽의 연결이 끊겨 변환을 취소했습니다."
+
+
+def _job_snapshot(job_id: str) -> Optional[Dict[str, Any]]:
+    """작업 상태 요약(대기 순번, 단계, 진행률). 없는 작업이면 None."""
+    if not _JOB_ID_RE.match(job_id):
+        return None
+    job = store.get_job(job_id)
+    if job is None:
+        return None
+    state, error = job.state, job.error
+    if state in IN_FLIGHT and time.time() - (job.watched_at or 0) > WATCH_RESOLUTION:
+        store.watch(job_id)
+    position = executor.position(job_id) if state == "queued" else 0
+    progress = read_progress(str(JOBS_DIR / job_id)) if state in ("running", "done") else {}
+    eta = None
+    if state == "queued":
+        eta = executor.eta(job_id)
+    elif state == "running" and job.cost_seconds:
+        eta = job.cost_seconds * (100 - int(progress.get("percent", 0))) / 100
+    return {
+        "job_id": job_id,
+        "state": state,
+        "position": position,
+        "stage": "done" if state == "done" else progress.get("stage", state),
+        "percent": 100 if state == "done" else int(progress.get("percent", 0)),
+        "error": error,
+        "cancelling": state == "running" and read_cancel(str(JOBS_DIR / job_id)) is not None,
+        "eta_seconds": None if eta is None else round(eta, 1),
+        "download_url": _download_url(job_id, job.output) if state == "done" else None,
+        # 배치가 끝난 페이지 미리보기(변환 중에도 늘어난다). 다시 변환하면 started_at이 바뀐다
+        "previews": [f"/previews/{job_id}/{i}?v={int((job.started_at or 0) * 1000)}"
+                     for i in range(int(progress.get("pages", 0)))],
+        "created_at": job.created_at,
+        "queued_at": job.queued_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _download_url(job_id: str, output: Optional[str]) -> str:
+    """결과 PDF 주소. 내용이 바뀌면(다시 변환) 주소도 바뀌도록 ETag로 버전을 붙인다."""
+    try:
+        version = file_etag(output).strip('"')
+    except (OSError, TypeError):
+        return f"/download/{job_id}"
+    return f"/download/{job_id}?v={version}"
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus 텍스트 형식: 작업 상태별 수, 대기열 길이, 정리(GC) 지표."""
+    lines = ["# TYPE capfit_jobs gauge"]
+    lines += [f'capfit_jobs{{state="{state}"}} {n}' for state, n in sorted(store.state_counts().items())]
+    lines += ["# TYPE capfit_queue_length gauge", f"capfit_queue_length {executor.queue_length()}"]
+    lines += collector.metrics_lines()
+    if cas is not None:
+        lines += cas.metrics_lines()
+    lines += admission.metrics_lines()
+    lines += watch.metrics_lines()
+    lines += executor.metrics_lines()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     base_url = str(request.base_url).rstrip('/')
     page_url = str(request.url)
     return templates.TemplateResponse(
+        request,
         "index.html",
         {
-            "request": request,
             "version": CAPFIT_VERSION,
             "base_url": base_url,
             "page_url": page_url,
@@ -54,65 +170,76 @@ async def index(request: Request):
 
 
 @app.post("/upload")
-async def upload(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(...),
-    dpi: int = Form(220),
-    margin: int = Form(60),
-    gutter: int = Form(50),
-):
+async def upload(request: Request):
+    """multipart 본문을 작업 폴더로 바로 흘려 저장(파일: files, 폼: dpi/margin/gutter)."""
     job_id = uuid.uuid4().hex[:12]
     job_dir = JOBS_DIR / job_id
-    ensure_dir(job_dir)
-
-    # 저장 경로
-    output_path = job_dir / "output.pdf"
-
-    # 업로드 파일 저장 (기본: 파일명 내 숫자 기준 오름차순 정렬)
-    saved_paths: List[str] = []
-    def _numeric_key(name: str):
-        nums = [int(x) for x in re.findall(r"\d+", name or "")]
-        # 숫자가 있는 파일을 우선 정렬, 그 다음 원문자열
-        return (0, tuple(nums), (name or "").lower()) if nums else (1, (name or "").lower())
-
-    files_sorted = sorted(list(files), key=lambda u: _numeric_key(getattr(u, "filename", "")))
-
-    for idx, up in enumerate(files_sorted, start=1):
-        # 원본 파일명 사용 (안전한 파일명으로 변환)
-        original_name = up.filename or "upload.png"
-        # 파일명에서 안전하지 않은 문자 제거
-        safe_name = re.sub(r'[<>:"/\\|?*]', '_', original_name)
-        # 중복 방지를 위해 인덱스 추가
-        name_parts = os.path.splitext(safe_name)
-        safe_filename = f"{name_parts[0]}_{idx:03d}{name_parts[1]}"
-        input_i = job_dir / safe_filename
-        # Stream to disk to avoid loading whole file in memory
-        with open(input_i, "wb") as f:
-            up.file.seek(0)
-            shutil.copyfileobj(up.file, f, length=1024 * 1024)
-        saved_paths.append(str(input_i))
+    try:
+        # 업로드 파일 저장 (기본: 파일명 내 숫자 기준 오름차순 정렬)
+        saved, fields = await _receive_upload(request, job_dir)
+    except UploadRejected as e:
+        return HTMLResponse(str(e), status_code=e.status_code)
+    dpi, margin, gutter = (_int_field(fields, k, d) for k, d in (("dpi", 220), ("margin", 60), ("gutter", 50)))
+    safe_dpi = max(1, min(dpi, 220))
+    # 헤더의 원본 크기만으로 비용을 예측해 감당할 수 없는 작업은 리뷰 전에 돌려보낸다
+    options = _convert_options(safe_dpi, margin, gutter, False)
+    error = _layout_error(options)
+    if error is not None:
+        await run_in_threadpool(shutil.rmtree, job_dir, True)
+        return HTMLResponse(error, status_code=400)
+    cost = admission.estimate(saved, options)
+    try:
+        admission.check_job(cost)
+    except JobTooLarge as e:
+        await run_in_threadpool(shutil.rmtree, job_dir, True)
+        return HTMLResponse(str(e), status_code=413)
+    await run_in_threadpool(store.create_job, job_id, saved)
+    # 리뷰 화면이 열리기 전에 썸네일을 미리 만들어 둔다
+    thumbs.prefetch(job_dir, [(f.name, f.path) for f in saved])
+    # 사용자가 순서를 고르는 동안 노는 워커로 리뷰 화면의 기본값(업로드 순서, 같은 여백/간격)대로
+    # 미리 리사이즈(+PDF)해 둔다. 기본값 그대로 변환하면 결과 색인에서 바로 끝난다
+    if SPECULATE in ("prep", "build"):
+        build_key = result_key(saved, options) if SPECULATE == "build" and cas is not None else None
+        await run_in_threadpool(executor.speculate, job_id, str(job_dir), [f.path for f in saved],
+                                options, build_key, cost)
 
     # 리뷰 페이지로 이동하여 사용자가 순서 확인/조정 후 변환하도록
-    safe_dpi = max(1, min(int(dpi), 220))
-    return RedirectResponse(url=f"/review/{job_id}?dpi={safe_dpi}&margin={int(margin)}&gutter={int(gutter)}", status_code=303)
+    return RedirectResponse(url=f"/review/{job_id}?dpi={safe_dpi}&margin={margin}&gutter={gutter}", status_code=303)
+
+
+async def _receive_upload(request: Request, job_dir: Path, *, sort_by_name: bool = True) -> Tuple[List[FileRecord], Dict[str, str]]:
+    """multipart 본문을 job_dir에 저장하고 (파일 목록, 폼 필드). 거절/실패하면 폴더를 지운다."""
+    try:
+        ingest = UploadIngest(job_dir, request.headers.get("content-type", ""), max_file_size=MAX_UPLOAD_FILE,
+                              max_pixels=admission.max_pixels, cas=cas, sort_by_name=sort_by_name)
+        saved = await ingest.consume(request.stream())
+        if not saved:
+            raise UploadRejected("이미지 파일이 없습니다.")
+    except BaseException:
+        await run_in_threadpool(shutil.rmtree, job_dir, True)
+        raise
+    return saved, ingest.fields
+
+
+def _int_field(fields: Dict[str, str], name: str, default: int) -> int:
+    try:
+        return int(fields.get(name, default))
+    except ValueError:
+        return default
 
 
 @app.get("/review/{job_id}", response_class=HTMLResponse)
-async def review(request: Request, job_id: str, dpi: int = 220, margin: int = 60, gutter: int = 50):
-    job_dir = JOBS_DIR / job_id
-    if not job_dir.exists():
+def review(request: Request, job_id: str, dpi: int = 220, margin: int = 60, gutter: int = 50):
+    if store.get_job(job_id) is None:
         return HTMLResponse("잘못된 작업입니다.", status_code=404)
-    # 모든 이미지 파일 찾기 (output.pdf 제외)
-    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
-    files = sorted([p.name for p in job_dir.iterdir() 
-                   if p.is_file() and p.suffix.lower() in image_extensions])
+    store.touch(job_id)
+    files = [f.name for f in store.list_files(job_id)]
     base_url = str(request.base_url).rstrip('/')
     page_url = str(request.url)
     return templates.TemplateResponse(
+        request,
         "review.html",
         {
-            "request": request,
             "job_id": job_id,
             "files": files,
             "dpi": max(1, min(int(dpi), 220)),
@@ -125,68 +252,185 @@ async def review(request: Request, job_id: str, dpi: int = 220, margin: int = 60
     )
 
 
+@app.get("/jobs/{job_id}/{name}")
+def job_file(request: Request, job_id: str, name: str):
+    """업로드 원본(리뷰 미리보기용). 작업에 기록된 파일만 내보낸다.
+
+    원본은 업로드 후 바뀌지 않으므로(같은 이름 = 같은 내용) 내용 해시를 ETag로 두고 오래 캐시한다.
+    """
+    rec = store.get_file(job_id, name)
+    if rec is None or not os.path.exists(rec.path):
+        return HTMLResponse("파일이 없습니다.", status_code=404)
+    headers = {
+        "ETag": f'"{rec.sha256}"' if rec.sha256 else file_etag(rec.path),
+        "Cache-Control": f"private, {IMMUTABLE}",
+    }
+    if not_modified(request.headers, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(rec.path, headers=headers)
+
+
+@app.get("/thumbs/{job_id}/{name}")
+def job_thumb(request: Request, job_id: str, name: str, w: int = thumbs.THUMB_WIDTHS[1]):
+    """업로드 원본의 축소본(WebP/JPEG). 고정 폭으로 맞춰 작업 폴더에 캐시하고 ETag로 재검증."""
+    rec = store.get_file(job_id, name)
+    if rec is None or not os.path.exists(rec.path):
+        return HTMLResponse("파일이 없습니다.", status_code=404)
+    width = thumbs.snap_width(w)
+    # 미리 만들기 전에 요청이 오면 여기서 만든다(이미 만든 것은 건너뜀)
+    try:
+        found = thumbs.resolve_thumb(rec.path, JOBS_DIR / job_id, name, width,
+                                     thumbs.thumb_format(request.headers.get("accept", "")))
+    except Exception:
+        found = None
+    if found is None:
+        # 썸네일을 만들 수 없는 입력(형식 한도를 넘는 긴 캡처 등)은 원본
+        return FileResponse(rec.path, headers={"Cache-Control": "no-cache"})
+    path, fmt = found
+    headers = {
+        "ETag": thumbs.thumb_etag(rec.path, width, fmt),
+        "Cache-Control": "private, max-age=86400",
+        "Vary": "Accept",
+    }
+    if not_modified(request.headers, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type=f"image/{fmt}", headers=headers)
+
+
 @app.post("/convert/{job_id}")
-async def convert(background_tasks: BackgroundTasks, job_id: str, order: str = Form(""), dpi: int = Form(220), margin: int = Form(60), gutter: int = Form(50)):
-    job_dir = JOBS_DIR / job_id
-    if not job_dir.exists():
+def convert(job_id: str, order: str = Form(""), dpi: int = Form(220), margin: int = Form(60), gutter: int = Form(50), strip_chrome: bool = Form(False)):
+    job = store.get_job(job_id)
+    if job is None:
         return HTMLResponse("유효하지 않은 작업 ID입니다.", status_code=404)
-    # 모든 이미지 파일 찾기 (output.pdf 제외)
-    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
-    all_files = sorted([p for p in job_dir.iterdir() 
-                       if p.is_file() and p.suffix.lower() in image_extensions])
-    name_to_path = {p.name: str(p) for p in all_files}
-    ordered: List[str] = []
-    if order:
-        for name in [s for s in order.split(',') if s]:
-            if name in name_to_path:
-                ordered.append(name_to_path[name])
-    # 누락분은 뒤에 추가
-    remain = [str(p) for p in all_files if str(p) not in ordered and p.name not in set(order.split(','))]
-    saved_paths = ordered + remain
-
-    output_path = job_dir / "output.pdf"
-    safe_dpi = max(1, min(int(dpi), 220))
+    if job.state in ("queued", "running"):
+        # 중복 제출(새로고침/더블클릭)은 진행 중인 작업으로 보낸다
+        return RedirectResponse(url=f"/result/{job_id}", status_code=303)
+    options = _convert_options(dpi, margin, gutter, strip_chrome)
+    error = _layout_error(options)
+    if error is not None:
+        return HTMLResponse(error, status_code=400)
+    # 지정한 순서대로, 누락분은 업로드 순서대로 뒤에 추가
+    files = store.set_order(job_id, [name for name in order.split(',') if name])
+    if not files:
+        return HTMLResponse("업로드 원본 보존 기간이 지났습니다. 다시 업로드해 주세요.", status_code=410)
+    rejected = _start_conversion(job_id, files, options)
+    if rejected is not None:
+        status, message, headers = rejected
+        return HTMLResponse(message, status_code=status, headers=headers)
+    return RedirectResponse(url=f"/result/{job_id}", status_code=303)
+
+
+def _convert_options(dpi: int, margin: int, gutter: int, strip_chrome: bool) -> Dict[str, Any]:
+    return {
+        "margin": margin,
+        "gutter": gutter,
+        "dpi": max(1, min(int(dpi), 220)),
+        "page_width": None,
+        "page_height": None,
+        "fast": False,
+        "dedupe_overlap": True,
+        "strip_chrome": strip_chrome,
+    }
+
+
+def _layout_error(options: Dict[str, Any]) -> Optional[str]:
+    """여백/단 간격 때문에 단에 이미지를 놓을 자리가 없으면 사용자에게 보일 메시지, 괜찮으면 None.
+
+    compute_two_column_layout은 단 폭을 1px 이상으로 맞춰 주므로 그 전에 여기서 거른다.
+    """
+    margin, gutter = options["margin"], options["gutter"]
+    if margin < 0 or gutter < 0:
+        return "여백과 단 간격은 0 이상이어야 합니다."
+    page_w, page_h, _, usable_h = compute_two_column_layout(
+        dpi=options["dpi"], margin=margin, gutter=gutter,
+        page_width=options["page_width"], page_height=options["page_height"],
+    )
+    if page_w - margin * 2 - gutter < 2 or usable_h <= 0:
+        return f"여백/단 간격이 너무 커서 단에 이미지를 놓을 자리가 없습니다 (페이지 {page_w}×{page_h}px)."
+    return None
+
+
+def _start_conversion(job_id: str, files: List[FileRecord], options: Dict[str, Any]) -> Optional[Tuple[int, str, Dict[str, str]]]:
+    """결과 재사용 → 입장 제어 → 대기열 순으로 변환을 시작. 거절되면 (상태 코드, 메시지, 헤더)."""
+    output_path = JOBS_DIR / job_id / "output.pdf"
+    if _reuse_result(job_id, files, options):
+        return None
+    cost = admission.estimate(files, options)
+    try:
+        admission.check_job(cost)
+    except JobTooLarge as e:
+        return 413, str(e), {}
+    try:
+        executor.submit(job_id, [f.path for f in files], str(output_path), options, cost)
+    except QueueFull:
+        return 503, "변환 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요.", {"Retry-After": "10"}
+    return None
+
+
+def _reuse_result(job_id: str, files: List[FileRecord], options: Dict[str, Any]) -> bool:
+    """같은 입력/파라미터로 이미 만든 PDF가 있으면 변환 없이 바로 완료하고 True."""
+    output_path = JOBS_DIR / job_id / "output.pdf"
+    if cas is not None and cas.lookup_result(result_key(files, options), output_path):
+        # 이전 실행의 미리보기가 재사용한 PDF의 페이지처럼 보이지 않게 지운다
+        clear_progress(str(output_path.parent))
+        store.mark_reused(job_id, options, str(output_path))
+        return True
+    return False
+
+
+def _start_batch(groups: List[ArchiveGroup], options: Dict[str, Any]) -> Optional[Tuple[int, str, Dict[str, str]]]:
+    """묶음의 작업들을 _start_conversion과 같은 순서로 시작하되 대기열에는 한꺼번에 넣는다.
+
+    하나라도 입장 제어/대기열에서 거절되면 아무것도 넣지 않고 (상태 코드, 메시지, 헤더).
+    """
+    todo = []
+    for group in groups:
+        if _reuse_result(group.job_id, group.files, options):
+            continue
+        cost = admission.estimate(group.files, options)
+        try:
+            admission.check_job(cost)
+        except JobTooLarge as e:
+            return 413, f"{group.label}: {e}", {}
+        todo.append((group.job_id, [f.path for f in group.files], str(JOBS_DIR / group.job_id / "output.pdf"),
+                     options, cost))
+    try:
+        executor.submit_many(todo)
+    except QueueFull:
+        return 503, "변환 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요.", {"Retry-After": "10"}
+    return None
 
-    def _convert(paths: List[str]) -> None:
-        if len(paths) == 1:
-            build_pdf_two_columns_from_source(
-                paths[0],
-                str(output_path),
-                margin=margin,
-                gutter=gutter,
-                dpi=safe_dpi,
-                page_width=None,
-                page_height=None,
-                fast=False,
-            )
-        else:
-            build_pdf_two_columns_from_sources(
-                paths,
-                str(output_path),
-                margin=margin,
-                gutter=gutter,
-                dpi=safe_dpi,
-                page_width=None,
-                page_height=None,
-                fast=False,
-            )
-
-    background_tasks.add_task(_convert, saved_paths)
+
+def _cancel(job_id: str) -> bool:
+    job = store.get_job(job_id) if _JOB_ID_RE.match(job_id) else None
+    return job is not None and job.state in IN_FLIGHT and executor.cancel(job_id, USER_CANCEL_REASON)
+
+
+@app.post("/cancel/{job_id}")
+def cancel(job_id: str):
+    """결과 페이지의 취소 버튼. 대기 중이면 바로, 실행 중이면 다음 단계/페이지 전에 멈춘다."""
+    _cancel(job_id)
     return RedirectResponse(url=f"/result/{job_id}", status_code=303)
 
 
 @app.get("/result/{job_id}", response_class=HTMLResponse)
-async def result(request: Request, job_id: str):
-    pdf_path = JOBS_DIR / job_id / "output.pdf"
-    exists = pdf_path.exists()
+def result(request: Request, job_id: str):
+    snap = _job_snapshot(job_id) or {"state": "unknown", "position": 0, "stage": "unknown", "percent": 0, "error": None}
     base_url = str(request.base_url).rstrip('/')
     page_url = str(request.url)
     return templates.TemplateResponse(
+        request,
         "result.html",
         {
-            "request": request,
             "job_id": job_id,
-            "ready": exists,
+            "ready": snap["state"] == "done",
+            "download_url": snap.get("download_url") or f"/download/{job_id}",
+            "state": snap["state"],
+            "position": snap["position"],
+            "stage": snap["stage"],
+            "percent": snap["percent"],
+            "error": snap["error"],
+            "previews": snap.get("previews") or [],
             "version": CAPFIT_VERSION,
             "base_url": base_url,
             "page_url": page_url,
@@ -194,15 +438,407 @@ async def result(request: Request, job_id: str):
     )
 
 
+@app.get("/previews/{job_id}/{index}")
+def page_preview(request: Request, job_id: str, index: int):
+    """변환 중/후 페이지 미리보기(JPEG). 주소에 실행 시각 버전이 붙어 있어 오래 캐시한다."""
+    if not _JOB_ID_RE.match(job_id) or index < 0:
+        return HTMLResponse("미리보기가 없습니다.", status_code=404)
+    path = preview_path(str(JOBS_DIR / job_id), index)
+    if not os.path.exists(path):
+        return HTMLResponse("미리보기가 없습니다.", status_code=404)
+    headers = {"ETag": file_etag(path), "Cache-Control": f"private, {IMMUTABLE}"}
+    if not_modified(request.headers, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/api/layout")
+def layout(dpi: int = 220, margin: int = 60, gutter: int = 50):
+    """선택한 dpi/여백/단 간격에서 입력이 맞춰질 단 폭(px). 브라우저는 업로드 전에 이 폭으로 줄인다."""
+    safe_dpi = max(1, min(int(dpi), 220))
+    error = _layout_error(_convert_options(safe_dpi, margin, gutter, False))
+    if error is not None:
+        return JSONResponse({"detail": error}, status_code=400)
+    page_w, page_h, col_w, usable_h = compute_two_column_layout(dpi=safe_dpi, margin=margin, gutter=gutter)
+    return {
+        "dpi": safe_dpi,
+        "margin": margin,
+        "gutter": gutter,
+        "page_width": page_w,
+        "page_height": page_h,
+        "col_width": col_w,
+        "usable_height": usable_h,
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str):
+    snap = _job_snapshot(job_id)
+    if snap is None:
+        return JSONResponse({"detail": "job not found"}, status_code=404)
+    return snap
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+def job_cancel(job_id: str):
+    """작업 취소 요청. 취소를 받았으면 202 + 상태, 이미 끝났거나 없는 작업이면 409/404."""
+    if _job_snapshot(job_id) is None:
+        return JSONResponse({"detail": "job not found"}, status_code=404)
+    if not _cancel(job_id):
+        return JSONResponse({"detail": "job is not queued or running"}, status_code=409)
+    return JSONResponse(_job_snapshot(job_id), status_code=202)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """작업 상태를 Server-Sent Events로 흘려보낸다. 바뀔 때만 보내고, 끝나면 닫는다."""
+    if await run_in_threadpool(_job_snapshot, job_id) is None:
+        return JSONResponse({"detail": "job not found"}, status_code=404)
+
+    async def stream():
+        last: Optional[Dict[str, Any]] = None
+        idle = 0.0
+        yield "retry: 2000\n\n"
+        while not await request.is_disconnected():
+            snap = await run_in_threadpool(_job_snapshot, job_id)
+            if snap != last:
+                last, idle = snap, 0.0
+                yield f"data: {json.dumps(snap)}\n\n"
+            elif idle >= SSE_KEEPALIVE:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            if snap is None or snap["state"] in FINAL_STATES:
+                break
+            await asyncio.sleep(SSE_INTERVAL)
+            idle += SSE_INTERVAL
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _bool_field(fields: Dict[str, str], name: str) -> bool:
+    return fields.get(name, "").strip().lower() in ("1", "true", "on", "yes")
+
+
+@app.post("/api/v1/convert")
+async def api_convert(request: Request, mode: str = "sync"):
+    """프로그램용 변환: 업로드 → 변환을 한 번에.
+
+    multipart: files(이미지, 보낸 순서대로 — sort=name이면 파일명 숫자 순), dpi/margin/gutter/strip_chrome.
+    - mode=sync(기본): PDF를 인코딩되는 대로 흘려보낸다(작업 id는 X-Capfit-Job-Id 헤더).
+      대기/변환 중 실패하면 오류 JSON, 연결이 끊기면 작업을 취소한다.
+    - mode=async: 202 + 작업 id와 상태/다운로드 주소. 상태를 조회하지 않아도 취소되지 않으므로
+      나중에(결과 보존 기간 안에) 받아 가면 된다.
+    """
+    job_id = uuid.uuid4().hex[:12]
+    job_dir = JOBS_DIR / job_id
+    try:
+        saved, fields = await _receive_upload(request, job_dir, sort_by_name=False)
+    except UploadRejected as e:
+        return JSONResponse({"detail": str(e)}, status_code=e.status_code)
+    if fields.get("sort") == "name":
+        saved.sort(key=lambda f: numeric_sort_key(f.name))
+    mode = fields.get("mode", mode)
+    options = _convert_options(
+        *(_int_field(fields, k, d) for k, d in (("dpi", 220), ("margin", 60), ("gutter", 50))),
+        _bool_field(fields, "strip_chrome"),
+    )
+    error = _layout_error(options)
+    if error is not None:
+        await run_in_threadpool(shutil.rmtree, job_dir, True)
+        return JSONResponse({"detail": error}, status_code=400)
+    await run_in_threadpool(store.create_job, job_id, saved, origin="api")
+    rejected = await run_in_threadpool(_start_conversion, job_id, saved, options)
+    if rejected is not None:
+        status, message, headers = rejected
+        return JSONResponse({"job_id": job_id, "detail": message}, status_code=status, headers=headers)
+    if mode == "async":
+        return JSONResponse(
+            {
+                **(await run_in_threadpool(_job_snapshot, job_id)),
+                "status_url": f"/api/jobs/{job_id}",
+                "events_url": f"/api/jobs/{job_id}/events",
+                "cancel_url": f"/api/jobs/{job_id}/cancel",
+            },
+            status_code=202,
+            headers={"Location": f"/api/jobs/{job_id}"},
+        )
+
+    output = str(job_dir / "output.pdf")
+    # 첫 바이트가 나오기 전(대기/디코드/페이지 나누기)의 실패는 상태 코드로 알린다
+    first = await _wait_for_pdf(request, job_id, output)
+    if isinstance(first, JSONResponse):
+        return first
+    return StreamingResponse(
+        _tail_pdf(job_id, output, first),
+        media_type="application/pdf",
+        headers={
+            "X-Capfit-Job-Id": job_id,
+            "Content-Disposition": f'attachment; filename="capfit_{job_id}.pdf"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@app.post("/api/v1/batch")
+async def api_batch(request: Request, mode: str = "sync"):
+    """ZIP 하나로 여러 작업을 한 번에: 최상위 폴더마다 작업 하나(최상위에 바로 있는 이미지는 따로 하나).
+
+    multipart: archive(ZIP, 받는 대로 풀어 저장), dpi/margin/gutter/strip_chrome(모든 작업 공통).
+    작업들은 한꺼번에 대기열에 넣고(모두 받을 수 없으면 하나도 넣지 않는다), 결과는 <폴더>.pdf들을
+    담은 ZIP 하나로 돌려준다. 실패/취소된 작업은 ZIP 안의 errors.txt에 적는다.
+    - mode=sync(기본): 작업이 끝나는 대로 결과 ZIP을 흘려보낸다(묶음 id는 X-Capfit-Batch-Id 헤더).
+      연결이 끊기면 남은 작업을 취소한다.
+    - mode=async: 202 + 묶음 id와 작업별 상태, 상태/결과 ZIP 주소. 상태를 조회하지 않아도 취소되지
+      않으므로 나중에(결과 보존 기간 안에) 결과 ZIP을 받아 가면 된다.
+    """
+    batch_id = uuid.uuid4().hex[:12]
+    try:
+        groups, ingest = await _receive_archive(request)
+    except UploadRejected as e:
+        return JSONResponse({"detail": str(e)}, status_code=e.status_code)
+    fields = ingest.fields
+    mode = fields.get("mode", mode)
+    options = _convert_options(
+        *(_int_field(fields, k, d) for k, d in (("dpi", 220), ("margin", 60), ("gutter", 50))),
+        _bool_field(fields, "strip_chrome"),
+    )
+    error = _layout_error(options)
+    if error is not None:
+        for job_dir in ingest.job_dirs:
+            await run_in_threadpool(shutil.rmtree, job_dir, True)
+        return JSONResponse({"detail": error}, status_code=400)
+
+    def create_jobs() -> None:
+        for group in groups:
+            store.create_job(group.job_id, group.files, origin="api", batch_id=batch_id, label=group.label)
+
+    await run_in_threadpool(create_jobs)
+    rejected = await run_in_threadpool(_start_batch, groups, options)
+    if rejected is not None:
+        await run_in_threadpool(_discard_jobs, [group.job_id for group in groups])
+        status, message, headers = rejected
+        return JSONResponse({"detail": message}, status_code=status, headers=headers)
+    if mode == "async":
+        return JSONResponse(
+            {**(await run_in_threadpool(_batch_snapshot, batch_id)), "skipped": ingest.skipped},
+            status_code=202,
+            headers={"Location": f"/api/v1/batch/{batch_id}"},
+        )
+    return _batch_archive_response(batch_id, cancel_on_disconnect=True)
+
+
+async def _receive_archive(request: Request) -> Tuple[List[ArchiveGroup], ArchiveIngest]:
+    """ZIP을 받아 폴더별 작업 폴더에 풀어 둔다. 거절/실패하면 만든 폴더를 지운다."""
+    ingest: Optional[ArchiveIngest] = None
+    try:
+        ingest = ArchiveIngest(JOBS_DIR, request.headers.get("content-type", ""), max_file_size=MAX_UPLOAD_FILE,
+                               max_pixels=admission.max_pixels, cas=cas, max_jobs=BATCH_MAX_JOBS,
+                               max_total=MAX_ARCHIVE)
+        groups = await ingest.consume(request.stream())
+        if not groups:
+            raise UploadRejected("ZIP 안에 이미지 파일이 없습니다.")
+    except BaseException:
+        if ingest is not None:
+            for job_dir in ingest.job_dirs:
+                await run_in_threadpool(shutil.rmtree, job_dir, True)
+        raise
+    return groups, ingest
+
+
+def _discard_jobs(job_ids: List[str]) -> None:
+    for job_id in job_ids:
+        store.delete_job(job_id)
+        shutil.rmtree(JOBS_DIR / job_id, ignore_errors=True)
+
+
+def _batch_snapshot(batch_id: str) -> Optional[Dict[str, Any]]:
+    """묶음 상태: 작업별 상태 요약(_job_snapshot + 폴더 이름). 없는 묶음이면 None."""
+    if not _JOB_ID_RE.match(batch_id):
+        return None
+    jobs = store.batch_jobs(batch_id)
+    if not jobs:
+        return None
+    snaps = [{"label": job.label, **(_job_snapshot(job.id) or {})} for job in jobs]
+    return {
+        "batch_id": batch_id,
+        "state": "done" if all(snap.get("state") in FINAL_STATES for snap in snaps) else "running",
+        "jobs": snaps,
+        "status_url": f"/api/v1/batch/{batch_id}",
+        "archive_url": f"/api/v1/batch/{batch_id}/archive",
+    }
+
+
+@app.get("/api/v1/batch/{batch_id}")
+def batch_status(batch_id: str):
+    snap = _batch_snapshot(batch_id)
+    if snap is None:
+        return JSONResponse({"detail": "batch not found"}, status_code=404)
+    return snap
+
+
+@app.get("/api/v1/batch/{batch_id}/archive")
+def batch_archive(batch_id: str):
+    """묶음 결과 ZIP. 아직 끝나지 않은 작업은 끝나는 대로 이어서 담는다(연결이 끊겨도 작업은 계속)."""
+    if _batch_snapshot(batch_id) is None:
+        return JSONResponse({"detail": "batch not found"}, status_code=404)
+    return _batch_archive_response(batch_id, cancel_on_disconnect=False)
+
+
+def _batch_archive_response(batch_id: str, *, cancel_on_disconnect: bool) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_batch(batch_id, cancel_on_disconnect=cancel_on_disconnect),
+        media_type="application/zip",
+        headers={
+            "X-Capfit-Batch-Id": batch_id,
+            "Content-Disposition": f'attachment; filename="capfit_{batch_id}.zip"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+def _watch_batch(batch_id: str):
+    """묶음의 작업들. 결과를 기다리는 동안은 진행 상황을 보고 있는 것으로 기록한다."""
+    jobs = store.batch_jobs(batch_id)
+    for job in jobs:
+        if job.state in IN_FLIGHT and time.time() - (job.watched_at or 0) > WATCH_RESOLUTION:
+            store.watch(job.id)
+    return jobs
+
+
+def _cancel_batch(batch_id: str) -> None:
+    """묶음에서 아직 끝나지 않은 작업을 모두 취소."""
+    for job in store.batch_jobs(batch_id):
+        if job.state in IN_FLIGHT:
+            executor.cancel(job.id, DISCONNECT_REASON)
+
+
+async def _stream_batch(batch_id: str, *, cancel_on_disconnect: bool):
+    """묶음의 작업이 끝나는 대로(끝난 순서) 결과 PDF를 ZIP 항목으로 흘려보낸다."""
+    archive = ResultArchive()
+    written = set()
+    finished = False
+    try:
+        while True:
+            jobs = await run_in_threadpool(_watch_batch, batch_id)
+            for job in jobs:
+                if job.id in written or job.state != "done":
+                    continue
+                written.add(job.id)
+                async for chunk in iterate_in_threadpool(archive.add_file(f"{job.label or job.id}.pdf", job.output)):
+                    if chunk:
+                        yield chunk
+            if all(job.state not in IN_FLIGHT for job in jobs):
+                break
+            await asyncio.sleep(SSE_INTERVAL)
+        failed = [job for job in jobs if job.state != "done"]
+        if failed:
+            yield archive.add_text("errors.txt", "".join(
+                f"{job.label or job.id}: {job.state} {job.error or ''}".rstrip() + "\n" for job in failed))
+        yield archive.close()
+        finished = True
+    finally:
+        if cancel_on_disconnect and not finished:
+            # 결과를 받을 클라이언트가 떠났으면 남은 작업도 멈춘다. 정리 중에는 기다리지 않고 스레드 풀에 맡긴다
+            asyncio.get_running_loop().run_in_executor(None, _cancel_batch, batch_id)
+
+
+# /api/v1/convert가 쓰는 중인 PDF를 확인하는 주기(초) / 한 번에 읽는 크기
+TAIL_INTERVAL = 0.1
+TAIL_CHUNK = 256 * 1024
+
+
+def _open_pdf(job_id: str, output: str):
+    """쓰는 중(.part)이거나 다 쓴 PDF를 연다. 아직 없으면 None, 실패/취소면 JSONResponse.
+
+    .part는 다 쓴 뒤 같은 파일이 output으로 이름만 바뀌므로, 열어 둔 핸들로 끝까지 읽을 수 있다.
+    """
+    job = store.get_job(job_id)
+    state = job.state if job is not None else "unknown"
+    if state in IN_FLIGHT and time.time() - (job.watched_at or 0) > WATCH_RESOLUTION:
+        store.watch(job_id)
+    if state == "done":
+        return open(output, "rb")
+    if state == "running":
+        try:
+            return open(part_path(output), "rb")
+        except FileNotFoundError:
+            return None
+    if state == "queued":
+        return None
+    status = 409 if state == "cancelled" else 500
+    return JSONResponse({"job_id": job_id, "state": state, "detail": job.error if job else "job not found"},
+                        status_code=status)
+
+
+async def _wait_for_pdf(request: Request, job_id: str, output: str):
+    try:
+        while True:
+            opened = await run_in_threadpool(_open_pdf, job_id, output)
+            if opened is not None:
+                return opened
+            if await request.is_disconnected():
+                break
+            await asyncio.sleep(TAIL_INTERVAL)
+    except BaseException:
+        await run_in_threadpool(executor.cancel, job_id, DISCONNECT_REASON)
+        raise
+    # 기다리던 클라이언트가 떠났으면 받을 사람이 없으므로 취소
+    await run_in_threadpool(executor.cancel, job_id, DISCONNECT_REASON)
+    return JSONResponse({"job_id": job_id, "detail": "client disconnected"}, status_code=499)
+
+
+async def _tail_pdf(job_id: str, output: str, f):
+    """쓰는 중인 PDF를 따라 읽으며 내보낸다. 작업이 끝난 뒤 파일 끝까지 읽으면 끝."""
+    finished = False
+    try:
+        while True:
+            job = await run_in_threadpool(store.get_job, job_id)
+            state = job.state if job is not None else "unknown"
+            while chunk := await run_in_threadpool(f.read, TAIL_CHUNK):
+                yield chunk
+            if state == "done":
+                finished = True
+                return
+            if state not in IN_FLIGHT:
+                # 이미 응답 헤더를 보냈으므로 연결을 끊어 잘린 PDF임을 알린다
+                raise RuntimeError(f"job {job_id} {state} while streaming: {job.error if job else ''}")
+            if time.time() - (job.watched_at or 0) > WATCH_RESOLUTION:
+                await run_in_threadpool(store.watch, job_id)
+            await asyncio.sleep(TAIL_INTERVAL)
+    finally:
+        f.close()
+        if not finished:
+            # 클라이언트가 중간에 끊었으면 변환도 멈춘다. 정리 중에는 기다리지 않고 스레드 풀에 맡긴다
+            asyncio.get_running_loop().run_in_executor(None, executor.cancel, job_id, DISCONNECT_REASON)
+
+
 @app.get("/download/{job_id}")
-async def download(job_id: str):
-    pdf_path = JOBS_DIR / job_id / "output.pdf"
-    if not pdf_path.exists():
+def download(request: Request, job_id: str, v: str = ""):
+    """결과 PDF. 강한 ETag로 재검증(304)하고, 버전(v)이 맞는 주소는 오래 캐시한다.
+
+    Range 요청(이어받기, PDF 뷰어의 부분 읽기)은 FileResponse가 206으로 처리한다.
+    """
+    job = store.get_job(job_id)
+    if job is None or job.state != "done" or not job.output or not os.path.exists(job.output):
         return HTMLResponse("변환된 PDF가 없습니다.", status_code=404)
+    etag = file_etag(job.output)
+    headers = {
+        "ETag": etag,
+        # 같은 작업을 다른 옵션으로 다시 변환하면 내용이 바뀌므로, 버전 없는 주소는 매번 재검증
+        "Cache-Control": f"private, {IMMUTABLE}" if v and f'"{v}"' == etag else "private, no-cache",
+    }
+    store.touch(job_id)
+    if not_modified(request.headers, etag):
+        return Response(status_code=304, headers=headers)
     return FileResponse(
-        path=str(pdf_path),
+        path=job.output,
         media_type="application/pdf",
         filename=f"capfit_{job_id}.pdf",
+        headers=headers,
     )
 
 
@@ -211,18 +847,36 @@ def main() -> None:
 
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", "8000"))
-    uvicorn.run("web.server:app", host=host, port=port, reload=False)
+    # uvicorn 워커 여러 개는 변환을 capfit-worker에 맡길 때(CAPFIT_EXECUTOR=external)만 안전하다
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    if workers > 1 and os.environ.get("CAPFIT_EXECUTOR", "local") != "external":
+        raise SystemExit("WEB_CONCURRENCY > 1 requires CAPFIT_EXECUTOR=external (run capfit-worker separately)")
+    uvicorn.run("web.server:app", host=host, port=port, reload=False, workers=workers)
 
 
 @app.get("/og.png")
-def og_image():
+def og_image(request: Request):
+    """링크 미리보기 이미지. 한 번만 그려 두고 ETag + 하루 캐시로 내보낸다(크롤러가 자주 요청)."""
+    body, etag = _og_png()
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if not_modified(request.headers, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="image/png", headers=headers)
+
+
+@lru_cache(maxsize=1)
+def _og_png() -> Tuple[bytes, str]:
+    body = _render_og_png()
+    return body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def _render_og_png() -> bytes:
     try:
         from PIL import Image, ImageDraw, ImageFont
     except Exception:
         # 최소한의 1x1 PNG 투명 이미지 반환 (Pillow 미설치 대비)
-        return Response(
-            b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\x0cIDATx\x9cc``\x00\x00\x00\x02\x00\x01\xe2!\xbc3\x00\x00\x00\x00IEND\xaeB`\x82",
-            media_type="image/png",
+        return (
+            b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\x0cIDATx\x9cc``\x00\x00\x00\x02\x00\x01\xe2!\xbc3\x00\x00\x00\x00IEND\xaeB`\x82"
         )
 
     W, H = 1200, 630
@@ -247,4 +901,4 @@ def og_image():
     from io import BytesIO
     buf = BytesIO()
     im.save(buf, format="PNG")
-    return Response(buf.getvalue(), media_type="image/png")
+    return buf.getvalue()
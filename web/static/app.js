@@ -1,4 +1,4 @@
-// Minimal client: preview controls + file hint only
+// Minimal client: preview controls, file hint/reorder, pre-downscale before upload
 (function () {
   const PAGE_W_PX = 2480; // A4 @300DPI width
   const PREVIEW_W = 420;  // CSS width used in style.css
@@ -45,7 +45,7 @@
   syncRangeToNumber(gutterRange, gutterInput);
   updatePreview();
 
-  // File hint only (no JS upload at all)
+  // File hint + reorder (the form posts the files; see pre-downscale below)
   // Reorder/remove support using DataTransfer when available
   let currentFiles = [];
   let dtSupported = true;
@@ -136,4 +136,84 @@
       updateHint();
     });
   }
+
+  // Pre-downscale in the browser: the server fits every image to the column
+  // width anyway (/api/layout), so phone originals (1440-2160px) are resized
+  // here before upload. Any failure falls back to a plain form submit.
+  const uploadForm = document.getElementById('upload-form');
+  const DOWNSCALE_SLACK = 1.1; // only resize when wider than col width * this
+  // Never resize to a width this small: a bad layout (huge margin) would
+  // otherwise upload unrecoverable thumbnails instead of the originals
+  const MIN_DOWNSCALE_WIDTH = 240;
+  const JPEG_QUALITY = 0.92;
+
+  async function fetchColumnWidth() {
+    const q = new URLSearchParams({ dpi: dpiInput.value, margin: marginInput.value, gutter: gutterInput.value });
+    const res = await fetch(`/api/layout?${q}`);
+    if (!res.ok) throw new Error(`layout ${res.status}`);
+    return (await res.json()).col_width;
+  }
+
+  async function drawScaled(bmp, w, h, type) {
+    if (typeof OffscreenCanvas === 'function') {
+      const canvas = new OffscreenCanvas(w, h);
+      const ctx = canvas.getContext('2d');
+      ctx.imageSmoothingQuality = 'high';
+      ctx.drawImage(bmp, 0, 0, w, h);
+      return canvas.convertToBlob({ type, quality: JPEG_QUALITY });
+    }
+    const canvas = document.createElement('canvas');
+    canvas.width = w; canvas.height = h;
+    const ctx = canvas.getContext('2d');
+    ctx.imageSmoothingQuality = 'high';
+    ctx.drawImage(bmp, 0, 0, w, h);
+    return new Promise((resolve) => canvas.toBlob(resolve, type, JPEG_QUALITY));
+  }
+
+  async function downscale(file, colW) {
+    if (typeof createImageBitmap !== 'function') return file;
+    if (!(colW >= MIN_DOWNSCALE_WIDTH)) return file;
+    const bmp = await createImageBitmap(file);
+    try {
+      if (bmp.width <= colW * DOWNSCALE_SLACK) return file;
+      const h = Math.max(1, Math.round(bmp.height * colW / bmp.width));
+      // Photos stay JPEG; screenshots (PNG/WebP/...) go lossless so text stays crisp
+      const type = file.type === 'image/jpeg' ? 'image/jpeg' : 'image/png';
+      const blob = await drawScaled(bmp, colW, h, type);
+      if (!blob || blob.size >= file.size) return file;
+      const stem = file.name.replace(/\.[^.]*$/, '');
+      return new File([blob], `${stem}${type === 'image/jpeg' ? '.jpg' : '.png'}`, { type });
+    } finally {
+      if (bmp.close) bmp.close();
+    }
+  }
+
+  if (uploadForm && fileInput && window.fetch && window.FormData) {
+    uploadForm.addEventListener('submit', async (ev) => {
+      const files = currentFiles.length ? currentFiles : Array.from(fileInput.files || []);
+      if (!files.length) return;
+      ev.preventDefault();
+      try {
+        const colW = await fetchColumnWidth();
+        const fd = new FormData();
+        // One at a time to bound memory on phones
+        for (let i = 0; i < files.length; i++) {
+          if (fileHint) fileHint.textContent = `사진 줄이는 중… (${i + 1}/${files.length})`;
+          let f = files[i];
+          try { f = await downscale(f, colW); } catch (e) { /* keep original */ }
+          fd.append('files', f, f.name);
+        }
+        fd.append('dpi', dpiInput.value);
+        fd.append('margin', marginInput.value);
+        fd.append('gutter', gutterInput.value);
+        if (fileHint) fileHint.textContent = '업로드 중…';
+        const res = await fetch(uploadForm.action, { method: 'POST', body: fd });
+        if (res.redirected) { window.location.href = res.url; return; }
+        document.open(); document.write(await res.text()); document.close();
+      } catch (e) {
+        updateHint();
+        HTMLFormElement.prototype.submit.call(uploadForm); // originals, no JS
+      }
+    });
+  }
 })();
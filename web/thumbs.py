@@ -0,0 +1,151 @@
+"""
+리뷰 화면용 썸네일
+
+원본(수 MB) 대신 고정 폭(THUMB_WIDTHS)으로 줄인 WebP/JPEG를 작업 폴더의 thumbs/ 아래에
+캐시해 내보낸다. 업로드 직후 스레드 풀에서 미리 만들어 두고(Pillow는 디코드/리사이즈/인코드
+중 GIL을 놓는다), 아직 없으면 요청 시점에 만든다. 원본 이름은 작업 안에서 바뀌지 않으므로
+ETag는 원본 크기/수정 시각 + 폭 + 형식으로 정한다.
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 48px 목록 썸네일(2x) / 리뷰 스트립(1x, 2x)
+THUMB_WIDTHS = (96, 480, 960)
+THUMB_DIR = "thumbs"
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+# 형식별 최대 높이(px). 넘는 긴 캡처는 WebP 대신 JPEG, 그것도 넘으면 원본을 쓴다
+MAX_HEIGHT = {"webp": 16383, "jpeg": 65535}
+
+_pool: Optional[ThreadPoolExecutor] = None
+# 같은 원본을 미리 만들기와 요청이 동시에 처리하지 않도록 원본 경로별 잠금
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _webp_supported() -> bool:
+    from PIL import features
+
+    return bool(features.check("webp"))
+
+
+def thumb_format(accept: str) -> str:
+    """브라우저가 WebP를 받으면 webp, 아니면 jpeg."""
+    return "webp" if "image/webp" in (accept or "") and _webp_supported() else "jpeg"
+
+
+def snap_width(width: int) -> int:
+    """요청 폭을 캐시하는 고정 폭 중 가장 가까운 값(이상)으로."""
+    for w in THUMB_WIDTHS:
+        if width <= w:
+            return w
+    return THUMB_WIDTHS[-1]
+
+
+def thumb_path(job_dir: Path, name: str, width: int, fmt: str) -> Path:
+    stem = os.path.splitext(name)[0]
+    return job_dir / THUMB_DIR / f"{stem}.{width}.{'webp' if fmt == 'webp' else 'jpg'}"
+
+
+def thumb_etag(src: str, width: int, fmt: str) -> str:
+    st = os.stat(src)
+    key = f"{os.path.basename(src)}:{st.st_size}:{st.st_mtime_ns}:{width}:{fmt}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def render_thumbs(src: str, job_dir: Path, name: str, fmts: Tuple[str, ...] = ("webp", "jpeg")) -> List[Path]:
+    """원본을 한 번만 디코드해 모든 폭/형식의 썸네일을 만든다(이미 있으면 건너뜀)."""
+    with _locks_guard:
+        lock = _locks.setdefault(src, threading.Lock())
+    try:
+        with lock:
+            return _render(src, job_dir, name, fmts)
+    finally:
+        with _locks_guard:
+            if not lock.locked():
+                _locks.pop(src, None)
+
+
+def _render(src: str, job_dir: Path, name: str, fmts: Tuple[str, ...]) -> List[Path]:
+    from PIL import Image
+
+    todo = [(w, f) for w in THUMB_WIDTHS for f in fmts if not thumb_path(job_dir, name, w, f).exists()]
+    if "webp" in fmts and not _webp_supported():
+        todo = [(w, f) for w, f in todo if f != "webp"]
+    if not todo:
+        return []
+    with Image.open(src) as im:
+        # 헤더만 보고 형식 한도를 넘는 높이는 뺀다(매 요청마다 디코드하지 않게)
+        todo = [(w, f) for w, f in todo if round(im.height * min(w, im.width) / im.width) <= MAX_HEIGHT[f]]
+        if not todo:
+            return []
+        (job_dir / THUMB_DIR).mkdir(parents=True, exist_ok=True)
+        # JPEG는 디코드 단계에서 바로 축소(1/2, 1/4, 1/8)해 시간을 줄인다
+        im.draft("RGB", (THUMB_WIDTHS[-1], max(1, im.height * THUMB_WIDTHS[-1] // max(1, im.width))))
+        base = im.convert("RGB")
+    out: List[Path] = []
+    # 큰 폭부터 줄여 가며 다음 폭의 입력으로 재사용
+    for width in sorted({w for w, _ in todo}, reverse=True):
+        if base.width > width:
+            base = base.resize((width, max(1, round(base.height * width / base.width))), Image.LANCZOS)
+        for w, fmt in todo:
+            if w != width:
+                continue
+            dst = thumb_path(job_dir, name, w, fmt)
+            tmp = dst.with_name(f"{dst.name}.{threading.get_ident()}.tmp")
+            if fmt == "webp":
+                base.save(tmp, format="WEBP", quality=WEBP_QUALITY, method=4)
+            else:
+                base.save(tmp, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp, dst)
+            out.append(dst)
+    return out
+
+
+def resolve_thumb(src: str, job_dir: Path, name: str, width: int, fmt: str) -> Optional[Tuple[Path, str]]:
+    """(썸네일 경로, 실제 형식). 없으면 만들고, 원하는 형식으로 못 만들면 JPEG, 그것도 없으면 None."""
+    for candidate in dict.fromkeys((fmt, "jpeg")):
+        path = thumb_path(job_dir, name, width, candidate)
+        if not path.exists():
+            render_thumbs(src, job_dir, name)
+        if path.exists():
+            return path, candidate
+    return None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        workers = int(os.environ.get("CAPFIT_THUMB_THREADS", "0") or 0) or min(4, os.cpu_count() or 1)
+        _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capfit-thumb")
+    return _pool
+
+
+def prefetch(job_dir: Path, files: List[Tuple[str, str]]) -> None:
+    """업로드 직후 (이름, 경로) 목록의 썸네일을 백그라운드에서 미리 생성."""
+    pool = _executor()
+    for name, path in files:
+        fut = pool.submit(render_thumbs, path, job_dir, name)
+        fut.add_done_callback(lambda f, name=name: _log_failure(name, f))
+
+
+def _log_failure(name: str, fut: Future) -> None:
+    # 종료 시 취소된 것은 무시(요청 시점에 다시 만든다)
+    if not fut.cancelled() and fut.exception() is not None:
+        logger.warning("thumbnail failed for %s: %s", name, fut.exception())
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
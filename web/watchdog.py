@@ -0,0 +1,93 @@
+"""
+버려진 변환 자동 취소
+
+결과 페이지를 닫거나 떠나 아무도 진행 상황을 보지 않는 작업은 끝나도 받아 갈 사람이 없다.
+서버는 상태 조회(결과 페이지, /api/jobs, SSE)마다 작업의 watched_at을 갱신하고, 이 스레드가
+주기적으로 CAPFIT_ABANDON_AFTER초 넘게 조회되지 않은 대기/실행 중 작업을 취소해 워커를 비운다.
+브라우저에서 만든 작업(origin=ui)만 대상이다. /api/v1로 만든 작업은 제출해 두고 나중에 받아 가는
+것이 정상이므로 취소하지 않는다(sync 모드는 연결이 끊기면 따로 취소한다).
+
+환경 변수
+- CAPFIT_ABANDON_AFTER: 초 (기본 120, 0이면 끔)
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+from .executor import read_cancel
+from .jobstore import JobStore
+
+logger = logging.getLogger(__name__)
+
+ABANDONED_REASON = "진행 상황을 보는 사람이 없어 변환을 취소했습니다."
+
+
+class AbandonWatch:
+    """오래 조회되지 않은 작업을 executor.cancel로 취소하는 백그라운드 스레드."""
+
+    def __init__(self, store: JobStore, executor, *, after: float = 120.0):
+        self.store = store
+        self.executor = executor
+        self.after = float(after)
+        # 확인 주기: 기준 시간의 1/4 (1~10초)
+        self.interval = max(1.0, min(10.0, self.after / 4))
+        self.cancelled = 0
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, store: JobStore, executor) -> "AbandonWatch":
+        return cls(store, executor, after=float(os.environ.get("CAPFIT_ABANDON_AFTER", "120")))
+
+    # ---- 수명 ----
+    def start(self) -> None:
+        if self.after <= 0:
+            return
+        self._started = time.time()
+        self._thread = threading.Thread(target=self._loop, name="capfit-abandon", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception:  # 확인 실패로 서버가 멈추면 안 된다
+                logger.exception("abandoned job check failed")
+
+    # ---- 확인 ----
+    def check_once(self, now: Optional[float] = None) -> int:
+        """오래 조회되지 않은 작업을 취소하고 취소한 수를 반환."""
+        now = time.time() if now is None else now
+        # 재시작 직후에는 브라우저가 다시 연결할 시간을 준다
+        if now - self._started < self.after:
+            return 0
+        n = 0
+        for job in self.store.unwatched_jobs(self.after):
+            if job.output and read_cancel(os.path.dirname(job.output)) is not None:
+                continue  # 이미 취소를 알렸고 워커가 멈추는 중
+            if self.executor.cancel(job.id, ABANDONED_REASON):
+                logger.info("job %s abandoned; cancelling", job.id)
+                n += 1
+        with self._lock:
+            self.cancelled += n
+        return n
+
+    def metrics_lines(self) -> List[str]:
+        with self._lock:
+            cancelled = self.cancelled
+        return [
+            "# TYPE capfit_abandoned_cancels_total counter",
+            f"capfit_abandoned_cancels_total {cancelled}",
+        ]
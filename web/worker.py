@@ -0,0 +1,112 @@
+"""
+변환 워커 (`capfit-worker`)
+
+웹 서버(CAPFIT_EXECUTOR=external)가 JobStore 대기열에 넣은 작업을 가져와 변환하고,
+결과를 작업 폴더에 쓴다. 같은 JOBS_DIR을 보는 워커를 여러 프로세스로 띄워 HTTP와 변환을
+따로 늘릴 수 있다. 대기열은 SQLite WAL이라 웹 서버와 모든 워커가 한 호스트의 로컬 디스크를
+공유해야 한다(NFS/SMB 위의 작업 폴더는 JobStore가 거절한다).
+
+환경 변수
+- CAPFIT_JOBS_DIR: 작업 폴더 (웹 서버와 동일하게)
+- CAPFIT_CAS_DIR: 결과 색인/원본 저장소 (웹 서버와 동일하게, 기본 작업 폴더/cas)
+- CAPFIT_WORKER_POLL: 대기열이 비었을 때 확인 주기(초, 기본 0.5)
+- CAPFIT_WORKER_STALE: 이 시간(초) 넘게 heartbeat가 없는 실행 중 작업은 다시 대기열로 (기본 60)
+"""
+
+from __future__ import annotations
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from shared.core.hooks import ConversionCancelled
+from .cas import ContentStore
+from .executor import run_job
+from .jobstore import DB_NAME, JobRecord, JobStore
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 5.0
+
+
+class Worker:
+    """대기열에서 작업을 하나씩 가져와 실행하는 루프."""
+
+    def __init__(self, store: JobStore, *, poll_interval: float = 0.5, stale_after: float = 60.0,
+                 cas: Optional[ContentStore] = None):
+        self.store = store
+        self.cas = cas
+        self.poll_interval = max(0.05, float(poll_interval))
+        self.stale_after = max(HEARTBEAT_INTERVAL * 2, float(stale_after))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """진행 중인 작업은 마치고 종료."""
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        logger.info("capfit-worker %s: %s", self.worker_id, self.store.path)
+        while not self._stop.is_set():
+            if not self.run_once():
+                self._stop.wait(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """작업 하나를 처리했으면 True, 대기열이 비었으면 False."""
+        requeued = self.store.requeue_stale(self.stale_after)
+        if requeued:
+            logger.warning("requeued %d stale job(s)", requeued)
+        job = self.store.claim_next(self.worker_id)
+        if job is None:
+            return False
+        self._execute(job)
+        return True
+
+    def _execute(self, job: JobRecord) -> None:
+        paths = [f.path for f in self.store.list_files(job.id)]
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job.id, done), daemon=True)
+        beat.start()
+        t0 = time.perf_counter()
+        try:
+            run_job(paths, job.output or "", job.params)
+        except ConversionCancelled as e:
+            logger.info("job %s cancelled: %s", job.id, e)
+            self.store.mark_cancelled(job.id, str(e), worker=self.worker_id)
+        except Exception as e:  # 작업 실패는 기록하고 다음 작업으로
+            logger.exception("job %s failed", job.id)
+            self.store.mark_failed(job.id, str(e), worker=self.worker_id)
+        else:
+            self.store.mark_done(job.id, worker=self.worker_id)
+            if self.cas is not None:
+                self.cas.remember(self.store, job.id)
+            logger.info("job %s done in %.1fs", job.id, time.perf_counter() - t0)
+        finally:
+            done.set()
+            beat.join()
+
+    def _heartbeat(self, job_id: str, done: threading.Event) -> None:
+        while not done.wait(HEARTBEAT_INTERVAL):
+            self.store.heartbeat(job_id, self.worker_id)
+
+
+def main(jobs_dir: Optional[str] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    root = Path(jobs_dir or os.environ.get("CAPFIT_JOBS_DIR") or Path(__file__).resolve().parent / "jobs").resolve()
+    worker = Worker(
+        JobStore(root / DB_NAME),
+        poll_interval=float(os.environ.get("CAPFIT_WORKER_POLL", "0.5")),
+        stale_after=float(os.environ.get("CAPFIT_WORKER_STALE", "60")),
+        cas=ContentStore.from_env(root),
+    )
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: worker.stop())
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()